@@ -1,8 +1,12 @@
+from functools import lru_cache
 from math import pi, sin, log
-from scipy.stats import beta
+import numpy as np
+from Agent.Holdings import Holdings
 from Order.Order import Order
 from Order.OrderAction import OrderAction
+from Order.TimeInForce import TimeInForce
 from Util.Util import Util
+from Util.RandomVariates import RandomVariates
 import logging
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
@@ -11,19 +15,30 @@ class Agent:
     ''' Base class for an agent
     
     - id -> Agent's unique id
-    - cash -> Amount of liquid cash available to the agent
-    - holdings -> Current shares held and available to the agent -> {price: volume}
+    - cash -> Amount of liquid cash available to the agent [int minor units when the book uses a tick_size]
+    - holdings -> Current shares held and available to the agent -> Holdings {price: volume} with sorted lots and running totals [int ticks when the book uses a tick_size]
     - active_asks, active_bids -> Active orders in the market -> {order_id: Order}
     - history -> All orders that were placed on the market -> {order_id: Order}
+    - variates -> RandomVariates limit prices are drawn from [shared by every agent, seed it with Agent.variates.seed(...)]
     '''
+    variates = RandomVariates()
+    VARIANCE_CACHE_SIZE = 65536     # _get_max_variance results kept, prices repeat tick after tick
+
     def __init__(self, id, cash=100):
         self.id: str = id
         self.cash: float = cash
-        self.holdings: dict[float, int] = {}
+        self.holdings: Holdings = Holdings()
         self.active_asks: dict[str, Order] = {}
         self.active_bids: dict[str, Order] = {}
         self.history: dict[str, Order] = {}
 
+    @staticmethod
+    def get_limit_tif(ob, order_ttl=None):
+        ''' (tif, expire_tick) for a new limit order that rests order_ttl ticks [None -> GTC, rests until filled or canceled] '''
+        if order_ttl is None:
+            return TimeInForce.GTC, None
+        return TimeInForce.GTD, ob.tick + order_ttl
+
     def reset(self, cash=100):
         ''' Resets the agent to its initial state '''
         self.cash = cash
@@ -39,44 +54,25 @@ class Agent:
 
     def update_cash(self, amt):
         ''' Update the cash holdings of this agent [Negative amt decreses cash] '''
-        self.cash = round(self.cash + amt, Util.ROUND_NDIGITS)
+        if type(amt) is int and type(self.cash) is int:
+            self.cash += amt  # Fixed-point minor units are exact, no rounding needed
+        else:
+            self.cash = round(self.cash + amt, Util.ROUND_NDIGITS)
 
     def update_holdings(self, price, volume):
         ''' Update/add a share in the agent's holdings '''
-        if price in self.holdings:
-            self.holdings[price] += volume
-        else:
-            self.holdings[price] = volume
+        self.holdings.add(price, volume)
 
     def remove_holding(self, price, volume=0):
         ''' Remove the specified volume from a share [volume=0 -> remove all shares at price] '''
         try:
-            if volume == 0:
-                self.holdings.pop(price)
-            else:
-                self.holdings[price] -= volume
-                if self.holdings[price] == 0:
-                    self.holdings.pop(price)
+            self.holdings.remove(price, volume)
         except Exception as e:
             logger.error(f'ERROR: PRICE {price} DOES NOT EXIST: ERROR DETAILS: {e}')
 
     def remove_holdings(self, volume):
         ''' Remove the given volume of holdings starting from lowest value share, return the list of (price, volume) tuples of the removed shares '''
-        removed_shares = []
-        try:
-            while volume > 0 and len(self.holdings.keys()) > 0:
-                price, vol = self.get_lowest_value_share()
-                if vol > volume:
-                    self.remove_holding(price, volume)
-                    removed_shares.append((price, volume))
-                    volume = 0
-                else:
-                    self.remove_holding(price)
-                    removed_shares.append((price, vol))
-                    volume -= vol
-        except Exception as e:
-            logger.error(f'ERROR: PRICE {price} DOES NOT EXIST: ERROR DETAILS: {e}')
-        return removed_shares
+        return self.holdings.take_lowest(volume)
 
     def upsert_active_ask(self, order):
         self.active_asks[order.id] = order
@@ -101,23 +97,25 @@ class Agent:
         
         Returns -> (price, volume) tuple
         '''
-        highest_price = max(self.holdings.keys())
-        volume = self.holdings[highest_price]
-        return (highest_price, volume)
+        return self.holdings.highest()
 
     def get_lowest_value_share(self):
         ''' Get the least valuble share and volume from agent's holdings
         
         Returns -> (price, volume) tuple
         '''
-        lowest_price = min(self.holdings.keys())
-        volume = self.holdings[lowest_price]
-        return (lowest_price, volume)
+        return self.holdings.lowest()
 
     def get_total_shares(self):
-        return sum(self.holdings.values())
+        return self.holdings.total
+
+    def get_average_share_price(self):
+        ''' Volume weighted average price paid for the held shares [0 if no shares] '''
+        return self.holdings.average_price()
 
-    def _get_max_variance(self, price, scale=0.1, decay_rate=0.25, amplitude=0.1, frequency=pi*2):
+    @staticmethod
+    @lru_cache(maxsize=VARIANCE_CACHE_SIZE)
+    def _get_max_variance(price, scale=0.1, decay_rate=0.25, amplitude=0.1, frequency=pi*2):
         '''
         Get the max variance in price (how much the computed price will differ from passed price)
 
@@ -145,6 +143,10 @@ class Agent:
             b = Higher favors left side (smaller x)\n
             epsilon = Minimum possible price (for bids only)\n
         '''
+        return self._get_beta_offset_price(current_price, side, self.variates.beta(a, b), epsilon)
+
+    def _get_beta_offset_price(self, current_price: float, side: OrderAction, x: float, epsilon = 1e-6):
+        ''' _get_beta_price for an already drawn beta variate x (lets callers draw their variates in bulk) '''
         max_variance = self._get_max_variance(
             current_price,
             scale=0.05,
@@ -154,14 +156,38 @@ class Agent:
         )
         match side:
             case OrderAction.BID:
-                x = beta.rvs(a, b)
                 discount = x * max_variance
                 return round(max(current_price * (1 - discount), epsilon), Util.ROUND_NDIGITS)
             case OrderAction.ASK:
-                x = beta.rvs(a, b)
                 premium = x * max_variance
                 return round(current_price * (1 + premium), Util.ROUND_NDIGITS)
-    
+
+    @classmethod
+    def get_beta_offset_prices(cls, current_price: float, side: OrderAction, x: np.ndarray, epsilon = 1e-6) -> np.ndarray:
+        ''' _get_beta_offset_price for an array of beta variates around one price (for populations that price in bulk) '''
+        max_variance = cls._get_max_variance(
+            current_price,
+            scale=0.05,
+            decay_rate=0.25,
+            amplitude=0.1,
+            frequency=pi*2
+        )
+        match side:
+            case OrderAction.BID:
+                return np.round(np.maximum(current_price * (1 - x * max_variance), epsilon), Util.ROUND_NDIGITS)
+            case OrderAction.ASK:
+                return np.round(current_price * (1 + x * max_variance), Util.ROUND_NDIGITS)
+
+    @staticmethod
+    def pay(agent, amt):
+        ''' agent.update_cash(amt) as a plain function [same call shape as SettlementBuffer.add_cash, keeps subclass overrides] '''
+        agent.update_cash(amt)
+
+    @staticmethod
+    def deliver(agent, price, volume):
+        ''' agent.update_holdings(price, volume) as a plain function [same call shape as SettlementBuffer.add_shares] '''
+        agent.update_holdings(price, volume)
+
     def info(self):
         last_items = list(self.history.items())[-5:]  # get last 5 entries
         return f"""
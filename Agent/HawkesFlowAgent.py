@@ -0,0 +1,110 @@
+import numpy as np
+from math import exp
+import logging
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+log = logging.getLogger(__name__)
+
+from Agent.PoissonFlowAgent import PoissonFlowAgent, EVENTS
+
+# Expected child events of type row triggered by one event of type column [LIMIT_BID, LIMIT_ASK, MARKET_BID, MARKET_ASK, CANCEL]
+# Market orders herd on their own side and pull in fresh limit orders on the side they hit, cancels come in bursts
+DEFAULT_BRANCHING = np.array([
+    [0.20, 0.00, 0.00, 0.30, 0.00],
+    [0.00, 0.20, 0.30, 0.00, 0.00],
+    [0.00, 0.00, 0.30, 0.00, 0.00],
+    [0.00, 0.00, 0.00, 0.30, 0.00],
+    [0.00, 0.00, 0.00, 0.00, 0.10],
+])
+
+
+class HawkesFlowAgent(PoissonFlowAgent):
+    ''' PoissonFlowAgent whose events come from a multivariate Hawkes process (self/cross exciting, clustered flow)
+
+    - decay -> Kernel decay rate per event type (per unit of time), one value or one per type
+    - branching -> Matrix of expected child events of type k (row) per event of type j (column) [default DEFAULT_BRANCHING]
+    - excitation -> Current excitation part of every type's intensity, carried over between act() calls
+    - limit_rate, market_rate, cancel_rate -> Long-run average rates like PoissonFlowAgent, the baselines are solved from them
+      as mu = (I - branching) @ rates so excitation clusters events without changing how many arrive on average
+
+    Intensity of type k: lambda_k(t) = mu_k + sum over past events i of alpha[k, type_i] * exp(-decay_k * (t - t_i)), with
+    alpha = branching * decay. The exponential kernel keeps the whole history in the excitation vector, an event decays it
+    and adds one column of alpha (O(1) in the number of past events).
+
+    Arrivals use Ogata thinning: intensities only fall between events, so the total intensity now bounds everything until
+    the next event. Candidate gaps at that bound are kept or thinned with exponential/uniform variates drawn BATCH at a
+    time in NumPy, the per event update is plain float arithmetic over the event types (cheaper than NumPy calls on
+    arrays this small).
+    '''
+    BATCH = 32
+
+    def __init__(self, id, cash=1_000_000, limit_rate=10.0, market_rate=2.0, cancel_rate=0.05, max_volume=10, a=2, b=5, order_ttl=None, keep_history=False, seed=None, decay=2.0, branching=None):
+        super().__init__(id, cash, limit_rate, market_rate, cancel_rate, max_volume, a, b, order_ttl, keep_history, seed)
+        k = len(EVENTS)
+        self.decay = np.broadcast_to(np.asarray(decay, dtype=np.float64), (k,)).copy()
+        self.branching = np.array(DEFAULT_BRANCHING if branching is None else branching, dtype=np.float64)
+        self.alpha = self.branching * self.decay[:, None]
+        self.excitation = np.zeros(k)
+
+        radius = float(np.max(np.abs(np.linalg.eigvals(self.branching))))
+        if radius >= 1:
+            log.error(f'NON-STATIONARY BRANCHING MATRIX @ HawkesFlowAgent.__init__(...): spectral radius {radius}')
+
+    def baseline(self) -> np.ndarray:
+        ''' Baseline intensities mu for the configured average rates [cancels scale with this agent's resting orders] '''
+        resting = len(self.active_bids) + len(self.active_asks)
+        rates = np.array([self.limit_rate, self.limit_rate, self.market_rate, self.market_rate, self.cancel_rate * resting])
+        return np.maximum(rates - self.branching @ rates, 0)
+
+    def simulate(self, dt=1.0) -> tuple[np.ndarray, np.ndarray]:
+        ''' Hawkes arrivals within the next dt (updates the excitation state)\n
+        Returns: (times, codes) NumPy arrays in arrival order [times relative to the start of the interval]
+        '''
+        rng = self.rng
+        mu = self.baseline().tolist()
+        mu_total = sum(mu)
+        decay = self.decay.tolist()
+        columns = self.alpha.T.tolist()
+        excitation = self.excitation.tolist()
+        gaps, uniforms = [], []
+        times, codes = [], []
+        t = 0.0
+
+        while True:
+            bound = mu_total + sum(excitation)
+            if bound <= 0:
+                break
+            if not gaps:
+                gaps = rng.standard_exponential(self.BATCH).tolist()
+            step = gaps.pop() / bound
+            if t + step >= dt:
+                break
+            t += step
+            excitation = [e * exp(-d * step) for e, d in zip(excitation, decay)]
+            if not uniforms:
+                uniforms = rng.random(self.BATCH).tolist()
+            u = uniforms.pop() * bound
+            if u > mu_total + sum(excitation):
+                continue
+
+            # Accepted, u is uniform over the summed intensities so it also picks the event type
+            code = 0
+            for code, (m, e) in enumerate(zip(mu, excitation)):
+                u -= m + e
+                if u < 0:
+                    break
+            excitation = [e + a for e, a in zip(excitation, columns[code])]
+            times.append(t)
+            codes.append(code)
+
+        # Carry the excitation to the end of the interval
+        self.excitation = np.array(excitation) * np.exp(-self.decay * (dt - t))
+        return np.array(times), np.array(codes, dtype=np.int64)
+
+    def draw_events(self, dt=1.0) -> np.ndarray:
+        ''' Event codes arriving within dt, in arrival order (Hawkes process) '''
+        return self.simulate(dt)[1]
+
+    def reset(self, cash=100):
+        ''' Resets the agent and forgets past events [intensities drop back to their baselines] '''
+        super().reset(cash)
+        self.excitation = np.zeros(len(EVENTS))
@@ -0,0 +1,126 @@
+from bisect import bisect_left, insort
+
+from Util.Util import Util
+
+
+class Holdings(dict):
+    ''' An agent's share lots -> {price: volume}, a dict kept in step with a sorted price index and running totals
+
+    - total -> Shares over all lots
+    - cost -> Sum of price * volume over all lots (cost basis) [exact int minor units when prices are int ticks]
+    - _keys -> Sorted -price of every lot, lowest price last so the lowest lot is taken off the end
+
+    Lowest/highest lot, total and average price are O(1), adding a new price or emptying a lot is O(log lots)
+    (bisect into a flat list). Every dict mutator goes through __setitem__/__delitem__ so the index and totals never drift.
+    '''
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._keys: list = []
+        self.total = 0
+        self.cost = 0
+        self.update(*args, **kwargs)
+
+    def _add_cost(self, price, volume):
+        cost = self.cost + price * volume
+        self.cost = cost if type(cost) is int else round(cost, Util.ROUND_NDIGITS)
+
+    def __setitem__(self, price, volume):
+        old = dict.get(self, price)
+        if old is None:
+            insort(self._keys, -price)
+            old = 0
+        dict.__setitem__(self, price, volume)
+        self.total += volume - old
+        self._add_cost(price, volume - old)
+
+    def __delitem__(self, price):
+        volume = dict.pop(self, price)
+        del self._keys[bisect_left(self._keys, -price)]
+        self.total -= volume
+        self._add_cost(price, -volume)
+
+    def pop(self, price, *default):
+        if price not in self:
+            if default:
+                return default[0]
+            raise KeyError(price)
+        volume = self[price]
+        del self[price]
+        return volume
+
+    def popitem(self):
+        price = next(reversed(self))
+        return price, self.pop(price)
+
+    def setdefault(self, price, volume=None):
+        if price not in self:
+            self[price] = volume
+        return self[price]
+
+    def update(self, *args, **kwargs):
+        for price, volume in dict(*args, **kwargs).items():
+            self[price] = volume
+
+    def clear(self):
+        dict.clear(self)
+        self._keys.clear()
+        self.total = 0
+        self.cost = 0
+
+    def copy(self):
+        return Holdings(self)
+
+    def __reduce__(self):
+        # Rebuild through __init__ so pickle/deepcopy restore the index and totals too
+        return (Holdings, (dict(self),))
+
+    def add(self, price, volume):
+        ''' Add volume to the lot at price (created if missing) '''
+        self[price] = dict.get(self, price, 0) + volume
+
+    def remove(self, price, volume=0):
+        ''' Take volume off the lot at price, dropping the lot when it empties [volume=0 -> remove the whole lot]\n
+        Raises KeyError if there is no lot at price
+        '''
+        if volume == 0 or self[price] - volume == 0:
+            del self[price]
+        else:
+            self[price] -= volume
+
+    def lowest(self) -> tuple:
+        ''' (price, volume) of the lowest priced lot [IndexError if empty] '''
+        price = -self._keys[-1]
+        return price, dict.__getitem__(self, price)
+
+    def highest(self) -> tuple:
+        ''' (price, volume) of the highest priced lot [IndexError if empty] '''
+        price = -self._keys[0]
+        return price, dict.__getitem__(self, price)
+
+    def average_price(self):
+        ''' Volume weighted average price of the held shares [0 if empty] '''
+        return self.cost / self.total if self.total else 0
+
+    def take_lowest(self, volume) -> list[tuple]:
+        ''' Remove volume shares starting from the lowest priced lot\n
+        Returns: [(price, volume), ...] of the removed shares, lowest first [less than volume if holdings run out]
+        '''
+        removed = []
+        keys = self._keys
+        while volume > 0 and keys:
+            price = -keys[-1]
+            lot = dict.__getitem__(self, price)
+            if lot > volume:
+                dict.__setitem__(self, price, lot - volume)
+                self.total -= volume
+                self._add_cost(price, -volume)
+                removed.append((price, volume))
+                break
+            # Whole lot goes, it is the last key so no bisect is needed
+            keys.pop()
+            dict.__delitem__(self, price)
+            self.total -= lot
+            self._add_cost(price, -lot)
+            removed.append((price, lot))
+            volume -= lot
+        return removed
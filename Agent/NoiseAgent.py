@@ -4,15 +4,19 @@ logging.basicConfig(level=logging.INFO, format='%(message)s')
 log = logging.getLogger(__name__)
 
 from Agent.Agent import Agent
-from Order.Order import Order
 from Order.OrderAction import OrderAction
 from Order.OrderType import OrderType
 from OrderBook.OrderBook import OrderBook
 from OrderBook.Matchmaker import MatchMaker
-from Util.Util import Util
 
 class NoiseAgent(Agent):
-    ''' Makes random actions based on it's available holdings, cash, and active orders '''
+    ''' Makes random actions based on it's available holdings, cash, and active orders
+
+    - order_ttl -> Ticks a limit order rests before it expires (GTD) [None -> orders rest until filled or canceled]
+    '''
+    def __init__(self, id, cash=100, order_ttl=None):
+        super().__init__(id, cash)
+        self.order_ttl = order_ttl
 
     def _get_action(self, ob: OrderBook) -> OrderAction:
         ''' Choose a random OrderAction given the agent's current holdings and cash '''
@@ -34,8 +38,7 @@ class NoiseAgent(Agent):
         max_purchasable = int(self.cash / ob.current_price)
         chosen_vol = random.randint(1, max_purchasable)
         
-        mb_order = Order(
-            id=         ob.get_id('ORDER'), 
+        mb_order = ob.new_order(
             agent_id=   self.id, 
             price=      -1,
             volume=     chosen_vol, 
@@ -48,22 +51,29 @@ class NoiseAgent(Agent):
         
         return mb_order
 
+    def _get_limit_price(self, ob: OrderBook, side: OrderAction):
+        ''' Random limit price around the book's current price, in the book's price units '''
+        scale = ob.scale
+        return scale.to_ticks(self._get_beta_price(scale.from_ticks(ob.current_price), side))
+
     def _execute_limit_bid(self, ob: OrderBook):
         ''' Choose random price and volume then make an order '''
-        chosen_val = self._get_beta_price(ob.current_price, OrderAction.BID)
+        chosen_val = self._get_limit_price(ob, OrderAction.BID)
         
         max_purchasable = int(self.cash / chosen_val)
         chosen_vol = random.randint(1, max_purchasable)
 
-        total_value = round(chosen_val * chosen_vol, Util.ROUND_NDIGITS)
+        total_value = ob.scale.value(chosen_val, chosen_vol)
         
-        lb_order = Order(
-            id=         ob.get_id('ORDER'),
+        tif, expire_tick = self.get_limit_tif(ob, self.order_ttl)
+        lb_order = ob.new_order(
             agent_id=   self.id,
             price=      chosen_val,
             volume=     chosen_vol,
             side=       OrderAction.BID,
-            type=       OrderType.LIMIT
+            type=       OrderType.LIMIT,
+            tif=        tif,
+            expire_tick= expire_tick
         )
         
         self.history[lb_order.id] = lb_order
@@ -79,8 +89,7 @@ class NoiseAgent(Agent):
         chosen_vol = random.randint(1, self.get_total_shares())
         removed_shares = self.remove_holdings(chosen_vol)
 
-        ma_order = Order(
-            id=             ob.get_id('ORDER'), 
+        ma_order = ob.new_order(
             agent_id=       self.id, 
             price=          -1, 
             volume=         chosen_vol, 
@@ -97,19 +106,21 @@ class NoiseAgent(Agent):
     def _execute_limit_ask(self, ob: OrderBook):
         assert self.get_total_shares() > 0, "Attempted to place limit ask with zero holdings"
 
-        chosen_val = self._get_beta_price(ob.current_price, OrderAction.ASK)
+        chosen_val = self._get_limit_price(ob, OrderAction.ASK)
         
         chosen_vol = random.randint(1, self.get_total_shares())
         removed_shares = self.remove_holdings(chosen_vol)
 
-        la_order = Order(
-            id=             ob.get_id('ORDER'),
+        tif, expire_tick = self.get_limit_tif(ob, self.order_ttl)
+        la_order = ob.new_order(
             agent_id=       self.id,
             price=          chosen_val,
             volume=         chosen_vol,
             side=           OrderAction.ASK,
             type=           OrderType.LIMIT,
-            reserved_shares= removed_shares
+            reserved_shares= removed_shares,
+            tif=            tif,
+            expire_tick=    expire_tick
         )
         
         self.history[la_order.id] = la_order
@@ -0,0 +1,185 @@
+import numpy as np
+import logging
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+log = logging.getLogger(__name__)
+
+from Agent.Agent import Agent
+from Agent.PooledAgent import PooledAgent
+from Order.Order import Order
+from Order.OrderAction import OrderAction
+from Order.OrderType import OrderType
+from Order.TimeInForce import TimeInForce
+from OrderBook.OrderBook import OrderBook
+from OrderBook.Matchmaker import MatchMaker
+
+# Action codes used in the decision arrays, ACTIONS[code] is the OrderAction
+HOLD, BID, ASK, CANCEL = 0, 1, 2, 3
+ACTIONS = (OrderAction.HOLD, OrderAction.BID, OrderAction.ASK, OrderAction.CANCEL)
+
+
+class NoiseAgentPool:
+    ''' A population of noise agents stored as NumPy arrays (one row per member) that acts together once per tick
+
+    - agents -> list[PooledAgent] members by row, registered in ob.agents under the pool's tag so matching, settlement,
+      expiry and remove_tag work as usual [removed members keep their row, late settlement still lands in it]
+    - cash, shares, cost -> Every member's cash, available (unreserved) shares and their total cost, the source of truth
+      for the members' accounts: fills reach them through settlement, orders reserve from them with array math
+    - live, open_orders -> Rows still in the book and their resting order counts, gathered at every sync()
+    - price -> Book price at the last sync(), every member prices and sizes its order off it
+    - tag -> Tag members are registered in the book with [ob.remove_tag(pool.tag) removes the population]
+    - order_ttl -> Ticks a limit order rests before it expires (GTD) [None -> orders rest until filled or canceled]
+    - rng -> numpy Generator for every decision [seed it for replayable runs]
+
+    Each member's decision follows NoiseAgent.act: a uniform choice between HOLD and the actions it can take (BID if it can
+    afford one share, ASK if it has shares, CANCEL if it has resting orders), a uniform MARKET/LIMIT choice, a beta limit
+    price offset and a uniform volume. decide() draws all of it in one pass and act() turns it into prices, volumes and
+    reservations with array math, then submits each side's orders as one MatchMaker.match_batch (which side goes first is
+    a coin flip every tick). Members act simultaneously: they all price off the tick's starting price instead of the
+    trades of the members before them, so prices move less within a tick than with NoiseAgents acting one by one.
+    '''
+    POOL_TAG = 'NOISE'
+
+    def __init__(self, tag: str = POOL_TAG, order_ttl=None, seed=None):
+        self.tag = tag
+        self.order_ttl = order_ttl
+        self.rng = np.random.default_rng(seed)
+        self.agents: list[PooledAgent] = []
+        self.cash = np.zeros(0)
+        self.shares = np.zeros(0, dtype=np.int64)
+        self.cost = np.zeros(0)
+        self.live = np.zeros(0, dtype=bool)
+        self.open_orders = np.zeros(0, dtype=np.int64)
+        self.price = 0
+        self.mm = MatchMaker()
+
+    def __len__(self):
+        return int(self.live.sum())
+
+    def __iter__(self):
+        return (agent for agent, live in zip(self.agents, self.live.tolist()) if live)
+
+    def new_agent(self, ob: OrderBook, cash=100) -> PooledAgent:
+        ''' Add a member with a fresh id and no shares, register it in the book under the pool's tag and return it '''
+        if not self.agents:
+            # Fixed-point books keep cash in integer minor units
+            self.cash = np.zeros(0, dtype=np.int64 if ob.scale.fixed_point else np.float64)
+        agent = PooledAgent(ob.get_id('AGENT'), self, len(self.agents))
+        self.agents.append(agent)
+        self.cash = np.append(self.cash, np.array(cash, dtype=self.cash.dtype))
+        self.shares = np.append(self.shares, 0)
+        self.cost = np.append(self.cost, 0.0)
+        self.live = np.append(self.live, True)
+        self.open_orders = np.append(self.open_orders, 0)
+        ob.upsert_agent(agent, self.tag)
+        return agent
+
+    def sync(self, ob: OrderBook):
+        ''' Mark members the book no longer has and gather every member's resting order count and the book price '''
+        agents = ob.agents
+        n = len(self.agents)
+        self.price = ob.current_price
+        self.live = np.fromiter((agents.get(agent.id) is agent for agent in self.agents), dtype=bool, count=n)
+        self.open_orders = np.fromiter((len(agent.active_asks) + len(agent.active_bids) for agent in self.agents), dtype=np.int64, count=n)
+
+    def decide(self) -> dict:
+        ''' Every member's draws for this tick from the synced arrays\n
+        Returns: {'action', 'market', 'beta', 'size', 'pick'} NumPy arrays indexed by row
+        - action -> HOLD/BID/ASK/CANCEL codes [always HOLD for removed members]
+        - market -> True for MARKET, False for LIMIT
+        - beta -> Beta(2, 5) variate for the limit price offset (Agent.get_beta_offset_prices)
+        - size -> Uniform [0, 1), the volume is 1 + int(size * max volume) [same as randint(1, max volume)]
+        - pick -> Uniform [0, 1) used to choose which resting order a CANCEL removes
+        '''
+        n = len(self.agents)
+        rng = self.rng
+
+        # Uniform choice among HOLD and the available actions, in NoiseAgent._get_action's order
+        available = np.empty((n, 4), dtype=bool)
+        available[:, HOLD] = True
+        available[:, BID] = self.live & (self.cash >= self.price)
+        available[:, ASK] = self.live & (self.shares > 0)
+        available[:, CANCEL] = self.live & (self.open_orders > 0)
+        choice = rng.integers(0, available.sum(axis=1))
+        action = np.argmax(np.cumsum(available, axis=1) > choice[:, None], axis=1)
+
+        return {
+            'action': action,
+            'market': rng.random(n) < 0.5,
+            'beta': rng.beta(2, 5, n),
+            'size': rng.random(n),
+            'pick': rng.random(n),
+        }
+
+    def act(self, ob: OrderBook) -> int:
+        ''' Draw for every member at once, cancel, then submit one batch of orders per side\n
+        Returns: number of orders and cancels submitted
+        '''
+        self.sync(ob)
+        if not self.live.any():
+            return 0
+        draws = self.decide()
+        submitted = self._cancel(ob, np.flatnonzero(draws['action'] == CANCEL), draws['pick'])
+        for code in ((BID, ASK) if self.rng.random() < 0.5 else (ASK, BID)):
+            orders = self._orders(ob, code, draws)
+            self.mm.match_batch(ob, orders)
+            submitted += len(orders)
+        return submitted
+
+    def _cancel(self, ob: OrderBook, rows: np.ndarray, pick: np.ndarray) -> int:
+        ''' Cancel one resting order of every member in rows, the integer part of pick * sides chooses the side and the
+        fraction the order [like NoiseAgent]
+        '''
+        canceled = 0
+        for row, position in zip(rows.tolist(), pick[rows].tolist()):
+            agent = self.agents[row]
+            sides = [orders for orders in (agent.active_asks, agent.active_bids) if orders]
+            if not sides:
+                continue
+            position *= len(sides)
+            ids = list(sides[int(position)].keys())
+            ob.cancel_order(ids[int((position % 1) * len(ids))], agent)
+            canceled += 1
+        return canceled
+
+    def _orders(self, ob: OrderBook, code: int, draws: dict) -> list[Order]:
+        ''' One side's orders for this tick, priced and sized from the synced price and the arrays in one pass
+        (limit bids reserve their cash, asks reserve their shares at the member's average cost)
+        '''
+        rows = np.flatnonzero(draws['action'] == code)
+        if len(rows) == 0:
+            return []
+        scale = ob.scale
+        side = ACTIONS[code]
+        market = draws['market'][rows]
+        limits = scale.to_ticks_array(Agent.get_beta_offset_prices(scale.from_ticks(self.price), side, draws['beta'][rows]))
+
+        if code == BID:
+            max_volume = (self.cash[rows] / np.where(market, self.price, limits)).astype(np.int64)
+        else:
+            max_volume = self.shares[rows]
+        sized = max_volume >= 1
+        rows, market, limits, max_volume = rows[sized], market[sized], limits[sized], max_volume[sized]
+        volume = 1 + (draws['size'][rows] * max_volume).astype(np.int64)
+
+        if code == BID:
+            reserve = ~market
+            self.cash[rows[reserve]] -= scale.value_array(limits[reserve], volume[reserve])
+            lot_prices = [None] * len(rows)
+        else:
+            average = self.cost[rows] / self.shares[rows]
+            self.shares[rows] -= volume
+            self.cost[rows] = np.where(self.shares[rows] > 0, self.cost[rows] - average * volume, 0)
+            lot_prices = average.tolist()
+
+        # Only limit orders rest, so only they carry the GTD expiry
+        tif, expire_tick = Agent.get_limit_tif(ob, self.order_ttl)
+        new_order = ob.new_order
+        agents = self.agents
+        orders = []
+        for row, is_market, price, order_volume, lot_price in zip(rows.tolist(), market.tolist(), limits.tolist(), volume.tolist(), lot_prices):
+            reserved = () if lot_price is None else [(lot_price, order_volume)]
+            if is_market:
+                orders.append(new_order(agents[row].id, -1, order_volume, side, OrderType.MARKET, reserved, TimeInForce.GTC))
+            else:
+                orders.append(new_order(agents[row].id, price, order_volume, side, OrderType.LIMIT, reserved, tif, expire_tick))
+        return orders
@@ -0,0 +1,130 @@
+import numpy as np
+import logging
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+log = logging.getLogger(__name__)
+
+from Agent.Agent import Agent
+from Order.OrderAction import OrderAction
+from Order.OrderType import OrderType
+from OrderBook.OrderBook import OrderBook
+from OrderBook.Matchmaker import MatchMaker
+from OrderBook.SelfTradePrevention import SelfTradePrevention
+
+# Event codes, EVENTS[code] is (side, order type) [None, None for a cancel]
+LIMIT_BID, LIMIT_ASK, MARKET_BID, MARKET_ASK, CANCEL = 0, 1, 2, 3, 4
+EVENTS = (
+    (OrderAction.BID, OrderType.LIMIT),
+    (OrderAction.ASK, OrderType.LIMIT),
+    (OrderAction.BID, OrderType.MARKET),
+    (OrderAction.ASK, OrderType.MARKET),
+    (None, None),
+)
+
+
+class PoissonFlowAgent(Agent):
+    ''' Zero-intelligence order flow: limit, market and cancel events with Poisson arrivals, all booked to this one agent
+
+    Stands in for a crowd of liquidity-only noise agents without an object per trader, every fill and reservation goes
+    to this agent's cash/holdings (the aggregate liquidity account).
+
+    - limit_rate -> Expected limit orders per side per unit of time
+    - market_rate -> Expected market orders per side per unit of time
+    - cancel_rate -> Expected cancels per resting order per unit of time [a resting order lives 1 / cancel_rate on average]
+    - max_volume -> Order volumes are uniform on 1..max_volume
+    - a, b -> Beta shape of the limit price offset, same curve as Agent._get_beta_price
+    - order_ttl -> Ticks a limit order rests before it expires (GTD) [None -> until filled or canceled]
+    - keep_history -> False clears this agent's history at every act() [the book's order_history is unaffected]
+    - rng -> numpy Generator for every draw [seed it for replayable runs]
+
+    Every act() draws the event counts for the elapsed time, shuffles them into one arrival sequence and submits them in
+    that order, pricing each limit order off the live book price. The account stands for many independent traders, so its
+    orders trade with each other (SelfTradePrevention.NONE), which nets out in its cash/holdings but still forms prices.
+    '''
+    FLOW_TAG = 'FLOW'
+
+    def __init__(self, id, cash=1_000_000, limit_rate=10.0, market_rate=2.0, cancel_rate=0.05, max_volume=10, a=2, b=5, order_ttl=None, keep_history=False, seed=None):
+        super().__init__(id, cash)
+        self.limit_rate = limit_rate
+        self.market_rate = market_rate
+        self.cancel_rate = cancel_rate
+        self.max_volume = max_volume
+        self.a = a
+        self.b = b
+        self.order_ttl = order_ttl
+        self.keep_history = keep_history
+        self.rng = np.random.default_rng(seed)
+        self.mm = MatchMaker(SelfTradePrevention.NONE)
+
+    def draw_events(self, dt=1.0) -> np.ndarray:
+        ''' Event codes arriving within dt, in arrival order (merged Poisson processes) '''
+        rng = self.rng
+        resting = len(self.active_bids) + len(self.active_asks)
+        rates = np.array([self.limit_rate, self.limit_rate, self.market_rate, self.market_rate, self.cancel_rate * resting]) * dt
+        counts = rng.poisson(rates)
+        return rng.permutation(np.repeat(np.arange(len(EVENTS)), counts))
+
+    def act(self, ob: OrderBook, dt=1.0) -> int:
+        ''' Submit the events that arrive within dt\n
+        Returns: number of orders and cancels submitted
+        '''
+        if not self.keep_history:
+            self.history.clear()
+        events = self.draw_events(dt)
+        n = len(events)
+        if n == 0:
+            return 0
+        rng = self.rng
+        beta = rng.beta(self.a, self.b, n).tolist()
+        volumes = rng.integers(1, self.max_volume + 1, n).tolist()
+
+        # Cancel targets: distinct resting orders sampled once, skipped if they fill before their cancel arrives
+        resting = list(self.active_bids) + list(self.active_asks)
+        cancels = min(int((events == CANCEL).sum()), len(resting))
+        targets = iter([resting[j] for j in rng.choice(len(resting), cancels, replace=False).tolist()] if cancels else ())
+        tif, expire_tick = self.get_limit_tif(ob, self.order_ttl)
+        scale = ob.scale
+        submitted = 0
+
+        for i, event in enumerate(events.tolist()):
+            side, order_type = EVENTS[event]
+            volume = volumes[i]
+            match order_type:
+                case OrderType.LIMIT:
+                    price = scale.to_ticks(self._get_beta_offset_price(scale.from_ticks(ob.current_price), side, beta[i]))
+                    if side is OrderAction.BID:
+                        cost = scale.value(price, volume)
+                        if cost > self.cash:
+                            continue
+                        order = ob.new_order(self.id, price, volume, side, order_type, tif=tif, expire_tick=expire_tick)
+                        self.update_cash(-cost)
+                    else:
+                        if self.holdings.total < volume:
+                            continue
+                        order = ob.new_order(self.id, price, volume, side, order_type, self.remove_holdings(volume), tif=tif, expire_tick=expire_tick)
+
+                case OrderType.MARKET:
+                    if side is OrderAction.BID:
+                        if self.cash < ob.current_price:
+                            continue
+                        order = ob.new_order(self.id, -1, volume, side, order_type)
+                    else:
+                        if self.holdings.total < volume:
+                            continue
+                        order = ob.new_order(self.id, -1, volume, side, order_type, self.remove_holdings(volume))
+
+                case None:
+                    target = next(targets, None)
+                    if target is None or (target not in self.active_bids and target not in self.active_asks):
+                        continue
+                    ob.cancel_order(target, self)
+                    submitted += 1
+                    continue
+
+                case _:
+                    log.error(f'INVALID ORDER TYPE @ PoissonFlowAgent.act(ob): {order_type}')
+                    continue
+
+            self.history[order.id] = order
+            self.mm.match(ob, order)
+            submitted += 1
+        return submitted
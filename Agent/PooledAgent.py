@@ -0,0 +1,68 @@
+from Agent.Agent import Agent
+from Order.Order import Order
+
+
+class PooledAgent(Agent):
+    ''' Agent whose cash and shares are one row of its pool's NumPy arrays, the book trades with it like with any agent
+
+    - pool -> Owning pool, its cash/shares/cost arrays are the source of truth [see NoiseAgentPool]
+    - row -> This member's index in the pool's arrays
+    - active_asks, active_bids, history -> Kept by the book like for every agent
+
+    Holdings are a single lot per member: shares and their total cost. Shares reserved for an ask carry the member's
+    average cost and come back at it if the ask is canceled.
+    '''
+    def __init__(self, id, pool, row: int):
+        self.id: str = id
+        self.pool = pool
+        self.row = row
+        self.active_asks: dict[str, Order] = {}
+        self.active_bids: dict[str, Order] = {}
+        self.history: dict[str, Order] = {}
+
+    @property
+    def cash(self):
+        return self.pool.cash[self.row].item()
+
+    @cash.setter
+    def cash(self, value):
+        self.pool.cash[self.row] = value
+
+    @property
+    def holdings(self) -> dict:
+        ''' Snapshot {average price: volume} of the member's shares [empty without shares] '''
+        shares = self.get_total_shares()
+        return {self.get_average_share_price(): shares} if shares > 0 else {}
+
+    def reset(self, cash=100):
+        ''' Resets the member to its initial state '''
+        self.cash = cash
+        self.pool.shares[self.row] = 0
+        self.pool.cost[self.row] = 0
+        self.active_asks.clear()
+        self.active_bids.clear()
+        self.history.clear()
+
+    def update_holdings(self, price, volume):
+        ''' Add volume shares bought at price '''
+        self.pool.shares[self.row] += volume
+        self.pool.cost[self.row] += price * volume
+
+    def remove_holdings(self, volume):
+        ''' Remove up to volume shares at the average cost, return the [(price, volume)] removed [empty without shares] '''
+        shares = self.get_total_shares()
+        volume = min(volume, shares)
+        if volume <= 0:
+            return []
+        price = self.get_average_share_price()
+        self.pool.shares[self.row] -= volume
+        self.pool.cost[self.row] = self.pool.cost[self.row] - price * volume if volume < shares else 0
+        return [(price, volume)]
+
+    def get_total_shares(self):
+        return self.pool.shares[self.row].item()
+
+    def get_average_share_price(self):
+        ''' Average price paid for the held shares [0 if no shares] '''
+        shares = self.get_total_shares()
+        return self.pool.cost[self.row].item() / shares if shares > 0 else 0
@@ -1,6 +1,5 @@
 from Agent.Agent import Agent
 from OrderBook.OrderBook import OrderBook
-from Order.Order import Order
 from Order.OrderAction import OrderAction
 from Order.OrderType import OrderType
 
@@ -9,8 +8,7 @@ class TakerAgent(Agent):
 
     def make_market_bid(self, ob: OrderBook, volume):
         ''' Buy at current price and desired volume '''
-        mb_order = Order(
-            id=         ob.get_id('ORDER'), 
+        mb_order = ob.new_order(
             agent_id=   self.id, 
             price=      -1,
             volume=     volume, 
@@ -26,8 +24,7 @@ class TakerAgent(Agent):
     def make_market_ask(self, ob: OrderBook, volume):
         removed_shares = self.remove_holdings(volume)
 
-        ma_order = Order(
-            id=             ob.get_id('ORDER'), 
+        ma_order = ob.new_order(
             agent_id=       self.id, 
             price=          -1, 
             volume=         volume, 
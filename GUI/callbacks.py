@@ -8,7 +8,6 @@ from Agent.Agent import Agent
 from GUI.layout import order_card
 from Order.OrderAction import OrderAction
 from OrderBook.OrderBook import OrderBook
-from Util.Util import Util
 
 prices = []
 times = []
@@ -23,6 +22,9 @@ def register_callbacks(app: Dash, ob: OrderBook):
         agents = list(ob.agents.values())
         for agent in agents:
             agent.act(ob)
+        ob.run_auction()
+        ob.settle()
+        ob.advance_tick()
         return None
 
     @app.callback(
@@ -56,9 +58,9 @@ def register_callbacks(app: Dash, ob: OrderBook):
             bid_cards.append(order_card('N/A', 'BIDS', None))
 
         current_price = ob.current_price
-        best_ask = ob.get_best(OrderAction.ASK)
-        best_bid = ob.get_best(OrderAction.BID)
-        spread = round(best_ask[0] - best_bid[0], Util.ROUND_NDIGITS) if best_ask != () and best_bid != () else 'N/A'
+        # Read-only, get_best would pop the best orders out of the book
+        indicators = ob.get_indicators(1)
+        spread = indicators['spread'] if indicators['bid_levels'] and indicators['ask_levels'] else 'N/A'
 
         prices.append(current_price)
         times.append(datetime.datetime.now().time())
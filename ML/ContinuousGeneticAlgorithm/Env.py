@@ -73,6 +73,9 @@ class Individual:
         self.agent = ob.agents[self.id]
 
 class Env:
+    # OrderBook tag of the population's agents (independent of the agent id format)
+    CGA_TAG = 'CGA'
+
     def __init__(self, _start_cash: float, _pop_size: int, _mutation_rate: float, _crossover_rate: float, _ob: OrderBook, _num_noise_agents: int, _version: str):
         self.ob = _ob
         self.num_noise_agents = _num_noise_agents
@@ -184,7 +187,7 @@ class Env:
                                 max_cash = 1000.00
                                 print(f'Defaulting to Initial price: ${initial_price} and Num agents: {num_agents}\nDue to Exception: {e}')
                             self.ob.reset(initial_price)
-                            self.ob.agents.clear()
+                            self.ob.remove_agents(list(self.ob.agents), return_assets=False)
                             self.price_history.clear()
                             self.market_info.clear()
                             self._reset_market(num_agents, max_cash, max_holdings, steps_to_mature=25)
@@ -197,7 +200,7 @@ class Env:
                                 cgaa.peak_value = -math.inf
                                 cgaa.fitness = 0.00
                                 cgaa.max_drawdown = 0.00
-                                self.ob.upsert_agent(cgaa.agent)
+                                self.ob.upsert_agent(cgaa.agent, tag=self.CGA_TAG)
                             if self.temp_best != None:
                                 hof.append(
                                     {
@@ -287,7 +290,7 @@ class Env:
             else:
                 for agent in self.ob.agents.values():
                     # Skip CGAAs
-                    if 'CGA' not in agent.id:
+                    if self.ob.get_tag(agent.id) != self.CGA_TAG:
                         agent.act(self.ob)
                 self.price_history.append(self.ob.current_price)
 
@@ -422,19 +425,10 @@ class Env:
 
         self.population = new_pop
 
-        # Remove old CGAAs from ob and replace with new_pop CGAAs
-        _to_delete = []
-        for id, agent in self.ob.agents.items():
-            if 'CGA' in id:
-                _to_delete.append(id)
-                for order_id in agent.active_asks.keys():
-                    self.ob._remove_from_queue(order_id)
-                for order_id in agent.active_bids.keys():
-                    self.ob._remove_from_queue(order_id)
-        for id in _to_delete:
-            del self.ob.agents[id]
+        # Remove old CGAAs (and their resting orders) from ob and replace with new_pop CGAAs
+        self.ob.remove_tag(self.CGA_TAG, return_assets=False)
         for i in self.population:
-            self.ob.upsert_agent(i.agent)
+            self.ob.upsert_agent(i.agent, tag=self.CGA_TAG)
 
     def _update_market_info(self, ob_depth_window=10, short_term_window=5, long_term_window=10, volatility_window=5):
         # Price history length
@@ -464,41 +458,8 @@ class Env:
             variance = sum((r - avg_return) ** 2 for r in returns) / len(returns)
             v = variance ** 0.50
 
-        snapshot = self.ob.get_snapshot(ob_depth_window)
-        asks = snapshot[0]['asks']
-        asks_size = len(asks)
-        bids = snapshot[0]['bids']
-        bids_size = len(bids)
-        spread = 0.0
-        largest_ask_price = 0.00
-        largest_ask_vol = 0
-        largest_ask_position = 0
-        largest_bid_price = 0.00
-        largest_bid_vol = 0
-        largest_bid_position = 0
-        best_ask_price = 0.00
-        best_ask_vol = 0
-        best_bid_price = 0.00
-        best_bid_vol = 0
-        
-        if asks_size > 0:
-            best_ask_price = asks[0]['price']
-            best_ask_vol = asks[0]['size']
-            for a in range(asks_size):
-                if asks[a]['size'] > largest_ask_vol:
-                    largest_ask_vol = asks[a]['size']
-                    largest_ask_price = asks[a]['price']
-                    largest_ask_position = a
-        if bids_size > 0:
-            best_bid_price = bids[0]['price']
-            best_bid_vol = bids[0]['size']
-            for b in range(bids_size):
-                if bids[b]['size'] > largest_bid_vol:
-                    largest_bid_vol = bids[b]['size']
-                    largest_bid_price = bids[b]['price']
-                    largest_bid_position = b
-        if asks_size > 0 and bids_size > 0:
-            spread = asks[0]['price'] - bids[0]['price']
+        # Book indicators are kept by the order book and shared by every individual until the book changes
+        book = self.ob.get_indicators(ob_depth_window)
 
         # 19 market indicators
         self.market_info[str(phl)] = {
@@ -508,19 +469,19 @@ class Env:
             'stma': stma,
             'ltma': ltma,
             'volatility': v,
-            'num_asks': asks_size,
-            'num_bids': bids_size,
-            'spread': spread,
-            'largest_ask_price': largest_ask_price,
-            'largest_ask_vol': largest_ask_vol,
-            'largest_ask_position': largest_ask_position,
-            'largest_bid_price': largest_bid_price,
-            'largest_bid_vol': largest_bid_vol,
-            'largest_bid_position': largest_bid_position,
-            'best_ask_price': best_ask_price,
-            'best_ask_vol': best_ask_vol,
-            'best_bid_price': best_bid_price,
-            'best_bid_vol': best_bid_vol,
+            'num_asks': book['ask_levels'],
+            'num_bids': book['bid_levels'],
+            'spread': book['spread'],
+            'largest_ask_price': book['largest_ask_price'],
+            'largest_ask_vol': book['largest_ask_vol'],
+            'largest_ask_position': book['largest_ask_position'],
+            'largest_bid_price': book['largest_bid_price'],
+            'largest_bid_vol': book['largest_bid_vol'],
+            'largest_bid_position': book['largest_bid_position'],
+            'best_ask_price': book['best_ask_price'],
+            'best_ask_vol': book['best_ask_vol'],
+            'best_bid_price': book['best_bid_price'],
+            'best_bid_vol': book['best_bid_vol'],
         }
         return str(phl)
     
@@ -598,7 +559,7 @@ class Env:
             i = Individual(TakerAgent(f'CGA{self.ob.get_id("AGENT")}', cash=self.start_cash))
             self.population.append(i)
         for i in self.population:
-            self.ob.upsert_agent(i.agent)
+            self.ob.upsert_agent(i.agent, tag=self.CGA_TAG)
 
     def _save_hof(self, hof, save_path='ML/ContinuousGeneticAlgorithm/models/'):
         ''' Saves the current Hall of Fame for all the best CGAAs in this training run'''
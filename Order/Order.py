@@ -1,24 +1,34 @@
 from Order.OrderStatus import OrderStatus
 from Order.OrderAction import OrderAction
 from Order.OrderType import OrderType
-from time import time
+from Order.TimeInForce import TimeInForce
 import logging
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 log = logging.getLogger(__name__)
 
 class Order:
-    ''' Hold all information for one order '''
-    def __init__(self, id: str, agent_id: str, price: float, volume: int, side: OrderAction, type: OrderType, reserved_shares: list[tuple[float, int]] = []):
+    ''' Hold all information for one order [__slots__ keeps it compact, no per-instance __dict__]\n
+    timestamp -> Logical sequence number from the order book's clock (0 until the book stamps it), used for time priority\n
+    tif -> TimeInForce (GTC by default)\n
+    expire_tick -> OrderBook.tick a GTD order expires at [None for other time in force values]\n
+    stop_price -> Trigger price of STOP/STOP_LIMIT orders [None for other order types]
+    '''
+    __slots__ = ('id', 'agent_id', 'price', 'volume', 'entry_volume', 'timestamp', 'status', 'side', 'type', 'reserved_shares', 'tif', 'expire_tick', 'stop_price')
+
+    def __init__(self, id: str, agent_id: str, price: float, volume: int, side: OrderAction, type: OrderType, reserved_shares: list[tuple[float, int]] = (), timestamp: int = 0, tif: TimeInForce = TimeInForce.GTC, expire_tick: int = None, stop_price: float = None):
         self.id = id
         self.agent_id = agent_id
         self.price = price
         self.volume = volume
         self.entry_volume = volume
-        self.timestamp = time()
+        self.timestamp = timestamp
         self.status = OrderStatus.OPEN
         self.side = side
         self.type = type
-        self.reserved_shares = reserved_shares
+        self.reserved_shares = reserved_shares  # Immutable default, never shared mutable state
+        self.tif = tif
+        self.expire_tick = expire_tick
+        self.stop_price = stop_price
 
     def get_returnable_shares(self):
         returnable_shares = []
@@ -34,6 +44,44 @@ class Order:
                 remaining_volume -= use_vol
         return returnable_shares
 
+    def to_dict(self):
+        ''' JSON friendly copy of this order '''
+        return {
+            'id': self.id,
+            'agent_id': self.agent_id,
+            'price': self.price,
+            'volume': self.volume,
+            'entry_volume': self.entry_volume,
+            'timestamp': self.timestamp,
+            'status': self.status.name,
+            'side': self.side.name,
+            'type': self.type.name,
+            'reserved_shares': [list(share) for share in self.reserved_shares],
+            'tif': self.tif.name,
+            'expire_tick': self.expire_tick,
+            'stop_price': self.stop_price,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        ''' Rebuild an order from to_dict() output '''
+        order = cls(
+            data['id'],
+            data['agent_id'],
+            data['price'],
+            data['volume'],
+            OrderAction[data['side']],
+            OrderType[data['type']],
+            [tuple(share) for share in data['reserved_shares']],
+            tif=TimeInForce[data.get('tif', 'GTC')],
+            expire_tick=data.get('expire_tick'),
+            stop_price=data.get('stop_price')
+        )
+        order.entry_volume = data['entry_volume']
+        order.timestamp = data['timestamp']
+        order.status = OrderStatus[data['status']]
+        return order
+
     def info(self):
         return f"""
             ID: {self.id}
@@ -46,4 +94,7 @@ class Order:
             SIDE: {self.side}
             TYPE: {self.type}
             RESERVED_SHARES: {self.reserved_shares}
+            TIF: {self.tif}
+            EXPIRE_TICK: {self.expire_tick}
+            STOP_PRICE: {self.stop_price}
         """
\ No newline at end of file
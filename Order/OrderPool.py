@@ -0,0 +1,34 @@
+from Order.Order import Order
+from Order.OrderAction import OrderAction
+from Order.OrderType import OrderType
+from Order.TimeInForce import TimeInForce
+
+
+class OrderPool:
+    '''
+    Free list of Order objects so closed orders can be recycled instead of reallocated
+    - free -> Released orders waiting to be reused
+    - max_free -> Largest number of released orders kept around
+
+    Only release orders nothing else references anymore (e.g. orders evicted from a bounded order history)
+    '''
+    def __init__(self, max_free=100_000):
+        self.free: list[Order] = []
+        self.max_free = max_free
+
+    def __len__(self):
+        return len(self.free)
+
+    def acquire(self, id, agent_id, price, volume, side: OrderAction, type: OrderType, reserved_shares: list[tuple[float, int]] = (), timestamp: int = 0, tif: TimeInForce = TimeInForce.GTC, expire_tick: int = None, stop_price: float = None) -> Order:
+        ''' Get a fresh order, reusing a released one when available (same arguments as Order) '''
+        if self.free:
+            order = self.free.pop()
+            order.__init__(id, agent_id, price, volume, side, type, reserved_shares, timestamp, tif, expire_tick, stop_price)
+            return order
+        return Order(id, agent_id, price, volume, side, type, reserved_shares, timestamp, tif, expire_tick, stop_price)
+
+    def release(self, order: Order):
+        ''' Hand a no longer referenced order back to the pool '''
+        if len(self.free) < self.max_free:
+            order.reserved_shares = ()
+            self.free.append(order)
@@ -2,4 +2,6 @@ from enum import Enum
 
 class OrderType(Enum):
     MARKET = 0
-    LIMIT = 1
\ No newline at end of file
+    LIMIT = 1
+    STOP = 2        # Becomes a MARKET order when the last trade price reaches stop_price
+    STOP_LIMIT = 3  # Becomes a LIMIT order (at price) when the last trade price reaches stop_price
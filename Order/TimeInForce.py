@@ -0,0 +1,7 @@
+from enum import Enum
+
+class TimeInForce(Enum):
+    GTC = 0     # Good till canceled, rests until filled or canceled
+    IOC = 1     # Immediate or cancel, whatever doesn't fill right away is canceled
+    FOK = 2     # Fill or kill, fills completely right away or is canceled without trading
+    GTD = 3     # Good till tick, rests until OrderBook.tick reaches the order's expire_tick
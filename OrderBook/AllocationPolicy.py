@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+class AllocationPolicy(ABC):
+    ''' Base class for how one price level shares an incoming volume among its resting orders
+
+    - time_priority -> True if an order's allocation only depends on the orders ahead of it, so matching can fill the level
+      order by order and stop early; False makes MatchMaker/CallAuction hand the whole level to allocate()
+    '''
+    time_priority = True
+
+    @abstractmethod
+    def allocate(self, volumes: np.ndarray, total: int) -> np.ndarray:
+        ''' Split total over one level's resting volumes (given in time priority, total <= volumes.sum())\n
+        Returns: int64 array of allocations in the same order [never above volumes, sums to total]
+        '''
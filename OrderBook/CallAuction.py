@@ -0,0 +1,287 @@
+import numpy as np
+import logging
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+log = logging.getLogger(__name__)
+
+from Agent.Agent import Agent
+from OrderBook.AllocationPolicy import AllocationPolicy
+from OrderBook.FifoAllocation import FifoAllocation
+from Order.Order import Order
+from Order.OrderAction import OrderAction
+from Order.OrderStatus import OrderStatus
+from Order.OrderType import OrderType
+from Order.TimeInForce import TimeInForce
+
+
+class CallAuction:
+    ''' Batch (call) auction: collects every order submitted during a tick and clears them together at one uniform price
+
+    - orders -> Orders submitted since the last clear(), in submission order
+    - allocation -> AllocationPolicy that rations the long side of the marginal price level [default FifoAllocation]
+
+    clear() steps:
+    - Participants -> the collected orders plus the resting orders they could reach (resting orders never cross each other)
+    - Price -> maximizes executed volume, then minimizes the demand/supply imbalance, then stays closest to current_price
+      (demand/supply curves are NumPy prefix sums evaluated at every limit price at once)
+    - Allocation -> the short side fills completely, the long side fills in price priority and the marginal level is rationed
+    - Settlement -> everyone trades at the clearing price (limit bids get their price improvement back), unfilled incoming
+      limit orders rest in the book, market/IOC/FOK leftovers are canceled
+
+    Submission order inside a tick doesn't change the result except through time priority (sequence numbers).
+    FOK orders are treated like IOC here and self-trade prevention only applies to continuous matching. Stops the
+    clearing price reaches are queued (as MARKET/LIMIT orders) for the next clear, see OrderBook.run_auction().
+    '''
+    def __init__(self, allocation: AllocationPolicy = None):
+        self.allocation = allocation if allocation is not None else FifoAllocation()
+        self.orders: list[Order] = []
+
+    def __len__(self):
+        return len(self.orders)
+
+    def submit(self, order: Order):
+        ''' Queue an incoming MARKET/LIMIT order for the next clear() '''
+        self.orders.append(order)
+
+    def withdraw(self, ob, agent_ids, return_assets=True) -> int:
+        ''' Cancel the queued orders of these agents (e.g. agents leaving the book before the next clear)\n
+        return_assets=False -> orders are dropped without refunding the agents\n
+        Returns: number of orders withdrawn
+        '''
+        if not self.orders:
+            return 0
+        agent_ids = set(agent_ids)
+        withdrawn = [order for order in self.orders if order.agent_id in agent_ids]
+        if not withdrawn:
+            return 0
+        self.orders = [order for order in self.orders if order.agent_id not in agent_ids]
+        for order in withdrawn:
+            order.status = OrderStatus.CANCELED
+            if return_assets:
+                agent: Agent = ob.agents[order.agent_id]
+                self._return_reserved(ob, order, agent)
+                agent.history[order.id] = order
+            ob.record_closed(order)
+        return len(withdrawn)
+
+    def _return_reserved(self, ob, order: Order, agent: Agent):
+        ''' Give back what an unfilled order still reserves (limit bid cash, ask shares) '''
+        if order.side is OrderAction.BID:
+            if order.type is not OrderType.MARKET:
+                agent.update_cash(ob.scale.value(order.price, order.volume))
+        else:
+            for share_price, volume in order.get_returnable_shares():
+                agent.update_holdings(share_price, volume)
+
+    def _reachable(self, queue, incoming: list[Order], is_bid_queue: bool) -> list[Order]:
+        ''' Resting orders of one side that could trade with the incoming orders of the other side '''
+        if not incoming:
+            return []
+        volume_cap = sum(order.volume for order in incoming)
+        bound = None
+        if all(order.type is OrderType.LIMIT for order in incoming):
+            bound = min(order.price for order in incoming) if is_bid_queue else max(order.price for order in incoming)
+
+        reachable = []
+        volume = 0
+        for order in queue.iter_orders():
+            # Worse ranked resting orders can't fill once better ones cover all incoming volume
+            if volume >= volume_cap:
+                break
+            if bound is not None and (order.price < bound if is_bid_queue else order.price > bound):
+                break
+            reachable.append(order)
+            volume += order.volume
+        return reachable
+
+    def _clearing_price(self, bid_limits, bid_vols, ask_limits, ask_vols, reference):
+        ''' Uniform price over every finite limit price\n
+        Returns: (price, executed volume) [price is None if nothing crosses]
+        '''
+        limits = np.concatenate((bid_limits[np.isfinite(bid_limits)], ask_limits[np.isfinite(ask_limits)]))
+        candidates = np.unique(limits) if limits.size else np.array([reference], dtype=np.float64)
+
+        bid_order = np.argsort(-bid_limits, kind='stable')
+        bid_sorted = -bid_limits[bid_order]                                 # Ascending negated limits
+        bid_cum = np.concatenate(([0], np.cumsum(bid_vols[bid_order])))
+        demand = bid_cum[np.searchsorted(bid_sorted, -candidates, side='right')]     # Bids with limit >= price
+
+        ask_order = np.argsort(ask_limits, kind='stable')
+        ask_cum = np.concatenate(([0], np.cumsum(ask_vols[ask_order])))
+        supply = ask_cum[np.searchsorted(ask_limits[ask_order], candidates, side='right')]   # Asks with limit <= price
+
+        executed = np.minimum(demand, supply)
+        best = np.lexsort((np.abs(candidates - reference), np.abs(demand - supply), -executed))[0]
+        if executed[best] <= 0:
+            return None, 0
+        return candidates[best], int(executed[best])
+
+    def _allocate(self, limits, vols, seqs, total, is_bid):
+        ''' Split total volume over one side's eligible orders in price priority, rationing the marginal level\n
+        Returns: allocation per order (same order as the inputs)
+        '''
+        alloc = np.zeros(len(vols), dtype=np.int64)
+        if total <= 0 or len(vols) == 0:
+            return alloc
+        order = np.lexsort((seqs, -limits if is_bid else limits))
+        sorted_vols = vols[order]
+        sorted_limits = limits[order]
+        cum = np.cumsum(sorted_vols)
+        if cum[-1] <= total:
+            alloc[order] = sorted_vols
+            return alloc
+
+        # Levels ahead of the marginal one fill completely, the marginal level is split by the allocation policy
+        marginal = int(np.searchsorted(cum, total, side='right'))
+        level = sorted_limits == sorted_limits[marginal]
+        start = int(np.argmax(level))
+        fills = np.zeros(len(sorted_vols), dtype=np.int64)
+        fills[:start] = sorted_vols[:start]
+        fills[level] = self.allocation.allocate(sorted_vols[level], total - int(cum[start - 1]) if start else total)
+        alloc[order] = fills
+        return alloc
+
+    def clear(self, ob):
+        ''' Clear every collected order against each other and the reachable resting orders\n
+        Returns: clearing price (book units) or None if nothing traded
+        '''
+        orders, self.orders = self.orders, []
+        if not orders:
+            return None
+        incoming_bids = [o for o in orders if o.side is OrderAction.BID]
+        incoming_asks = [o for o in orders if o.side is OrderAction.ASK]
+        resting_bids = self._reachable(ob.bid_queue, incoming_asks, True)
+        resting_asks = self._reachable(ob.ask_queue, incoming_bids, False)
+        bids = incoming_bids + resting_bids
+        asks = incoming_asks + resting_asks
+
+        bid_limits = np.array([np.inf if o.type is OrderType.MARKET else o.price for o in bids], dtype=np.float64)
+        ask_limits = np.array([-np.inf if o.type is OrderType.MARKET else o.price for o in asks], dtype=np.float64)
+        bid_vols = np.array([o.volume for o in bids], dtype=np.int64)
+        ask_vols = np.array([o.volume for o in asks], dtype=np.int64)
+
+        price, executed = (None, 0)
+        if bids and asks:
+            price, executed = self._clearing_price(bid_limits, bid_vols, ask_limits, ask_vols, ob.current_price)
+        if price is not None:
+            price = int(price) if ob.scale.fixed_point else float(price)
+            # Market bids can only buy what their cash covers at the clearing price
+            settlement = ob.settlement
+            for i, o in enumerate(bids):
+                if o.type is OrderType.MARKET:
+                    agent: Agent = ob.agents[o.agent_id]
+                    cash = agent.cash + (settlement.pending_cash(agent) if settlement is not None else 0)
+                    bid_vols[i] = min(o.volume, max(int(cash / price), 0))
+            eligible_bids = bid_limits >= price
+            eligible_asks = ask_limits <= price
+            executed = min(int(bid_vols[eligible_bids].sum()), int(ask_vols[eligible_asks].sum()))
+
+        bid_alloc = np.zeros(len(bids), dtype=np.int64)
+        ask_alloc = np.zeros(len(asks), dtype=np.int64)
+        if price is not None and executed > 0:
+            bid_seqs = np.array([o.timestamp for o in bids], dtype=np.int64)
+            ask_seqs = np.array([o.timestamp for o in asks], dtype=np.int64)
+            idx = np.flatnonzero(eligible_bids)
+            bid_alloc[idx] = self._allocate(bid_limits[idx], bid_vols[idx], bid_seqs[idx], executed, True)
+            idx = np.flatnonzero(eligible_asks)
+            ask_alloc[idx] = self._allocate(ask_limits[idx], ask_vols[idx], ask_seqs[idx], executed, False)
+        else:
+            price = None
+
+        resting = set(o.id for o in resting_bids) | set(o.id for o in resting_asks)
+        if price is not None:
+            self._record(ob, price, bids, bid_alloc.tolist(), asks, ask_alloc.tolist(), resting)
+            ob.current_price = price
+        for o, qty in zip(bids, bid_alloc.tolist()):
+            if o.id in resting:
+                if qty > 0:
+                    self._settle_resting(ob, o, qty, price)
+            else:
+                self._settle_incoming(ob, o, qty, price)
+        for o, qty in zip(asks, ask_alloc.tolist()):
+            if o.id in resting:
+                if qty > 0:
+                    self._settle_resting(ob, o, qty, price)
+            else:
+                self._settle_incoming(ob, o, qty, price)
+        return price
+
+    def _record(self, ob, price, bids, bid_alloc, asks, ask_alloc, resting):
+        ''' Pair buyers with sellers in allocation order and put the fills on the trade tape (aggressor side 0) '''
+        buyers, sellers, qtys, resting_ids = [], [], [], []
+        sells = [(o, qty) for o, qty in zip(asks, ask_alloc) if qty > 0]
+        s = 0
+        for buy, qty in zip(bids, bid_alloc):
+            while qty > 0:
+                sell, sell_qty = sells[s]
+                traded = min(qty, sell_qty)
+                buyers.append(buy.agent_id)
+                sellers.append(sell.agent_id)
+                qtys.append(traded)
+                resting_ids.append(buy.id if buy.id in resting else sell.id)
+                qty -= traded
+                if traded == sell_qty:
+                    s += 1
+                else:
+                    sells[s] = (sell, sell_qty - traded)
+        first_seq = ob.next_seq
+        ob.next_seq += len(qtys)
+        ob.trades.extend(first_seq, [price] * len(qtys), qtys, 0, buyers, sellers, resting_ids)
+
+    def _pay_deliver(self, ob):
+        buffer = ob.settlement
+        if buffer is None:
+            return Agent.pay, Agent.deliver
+        return buffer.add_cash, buffer.add_shares
+
+    def _settle_fill(self, ob, order: Order, agent: Agent, qty: int, price):
+        ''' Cash/holdings side of one order's fill at the clearing price '''
+        value = ob.scale.value
+        pay, deliver = self._pay_deliver(ob)
+        if order.side is OrderAction.BID:
+            deliver(agent, price, qty)
+            if order.type is OrderType.MARKET:
+                pay(agent, -value(price, qty))
+            else:
+                refund = value(order.price, qty) - value(price, qty)     # Reserved at the limit, traded at the clearing price
+                if refund:
+                    pay(agent, refund)
+        else:
+            pay(agent, value(price, qty))
+
+    def _settle_resting(self, ob, order: Order, qty: int, price):
+        agent: Agent = ob.agents[order.agent_id]
+        self._settle_fill(ob, order, agent, qty, price)
+        if qty >= order.volume:
+            queue = ob.bid_queue if order.side is OrderAction.BID else ob.ask_queue
+            queue.remove(order.id)
+            if order.side is OrderAction.BID:
+                agent.remove_active_bid(order.id)
+            else:
+                agent.remove_active_ask(order.id)
+            ob.fill_order(order)
+        else:
+            ob.partial_fill_order(order, qty)
+
+    def _settle_incoming(self, ob, order: Order, qty: int, price):
+        agent: Agent = ob.agents[order.agent_id]
+        is_bid = order.side is OrderAction.BID
+        if qty > 0:
+            self._settle_fill(ob, order, agent, qty, price)
+            order.volume -= qty
+        agent.history[order.id] = order
+
+        if order.type is OrderType.MARKET:
+            order.price = price if qty > 0 else -1
+        if order.volume == 0:
+            order.status = OrderStatus.CLOSED
+            ob.record_closed(order)
+        elif order.type is OrderType.MARKET or order.tif is TimeInForce.IOC or order.tif is TimeInForce.FOK:
+            order.status = OrderStatus.CANCELED
+            self._return_reserved(ob, order, agent)
+            ob.record_closed(order)
+        else:
+            if is_bid:
+                agent.upsert_active_bid(order)
+            else:
+                agent.upsert_active_ask(order)
+            ob.add_order(order)
@@ -0,0 +1,13 @@
+import numpy as np
+
+from OrderBook.AllocationPolicy import AllocationPolicy
+
+
+class FifoAllocation(AllocationPolicy):
+    ''' Price-time priority: orders at a level fill completely in the order they arrived '''
+    time_priority = True
+
+    def allocate(self, volumes: np.ndarray, total: int) -> np.ndarray:
+        ahead = np.cumsum(volumes)
+        ahead -= volumes
+        return np.minimum(volumes, np.maximum(total - ahead, 0))
@@ -1,288 +1,446 @@
 from OrderBook.OrderBook import OrderBook
+from OrderBook.PriceLevelQueue import PriceLevelQueue
+from OrderBook.SelfTradePrevention import SelfTradePrevention
 from Agent.Agent import Agent
 from Order.Order import Order
 from Order.OrderAction import OrderAction
 from Order.OrderStatus import OrderStatus
-from Util.Util import Util
+from Order.OrderType import OrderType
+from Order.TimeInForce import TimeInForce
+from operator import attrgetter
+import numpy as np
 import logging
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 log = logging.getLogger(__name__)
 
 class MatchMaker:
+    ''' Matches incoming orders against the opposite side of the book
+
+    One kernel handles both sides and both order types:
+    - _walk -> Walks the opposite side's price levels once (best first, FIFO inside a level) and returns the fills,
+      books whose ob.allocation has no time priority (pro-rata) share the last level they reach with _walk_levels instead
+    - _settle -> Applies the fills to the book and agents in one batch (or queues the agent side in ob.settlement) and records them on ob.trades
+    - match_batch -> One side's orders of a tick walk the opposite side once (_walk_batch) and settle in one _settle call
+    - _finish -> Sets the incoming order's final status (market and IOC leftovers are canceled, other limit leftovers rest in the book)
+    - FOK orders are checked against the walk's fills before anything is settled and canceled whole if they can't fill
+    - Books in call auction mode only collect incoming (and triggered stop) orders here, OrderBook.run_auction() clears them
+    - STOP/STOP_LIMIT orders wait in the book's trigger indexes, after every match the stops the new price reached are
+      triggered (as MARKET/LIMIT orders) until no more fire, so cascades run to completion
+
+    - stp -> SelfTradePrevention mode, ownership is checked with each resting order's agent_id while walking
+      [default NONE, agents trade with their own orders like they always have, SKIP can leave an agent's own orders crossed]
+    '''
+    def __init__(self, stp: SelfTradePrevention = SelfTradePrevention.NONE):
+        self.stp = stp
+
     def _get_affordable_vol(self, target_price, acting_agent_cash):
         return int(acting_agent_cash / target_price)
 
-    def match_market_bid(self, ob: OrderBook, order: Order):
-        assert(order.side is OrderAction.BID)
-
-        ba: Agent = ob.agents[order.agent_id]
-        prices = []
-
-        while order.volume > 0 and ob.ask_queue:
-            # Prevent agent from trading with itself
-            if ob.peek_best(OrderAction.ASK)[0][3] == ba.id: continue
-
-            best_ask = ob.get_best(OrderAction.ASK)
-            if not best_ask:
-                log.error('BEST ASK IS EMPTY! @ MatchMaker.match_market_bid()')
-                break
-
-            best_ask_price = best_ask[0]
-            best_ask_time = best_ask[1]
-            best_ask_volume = best_ask[2]
-            best_ask_oid = best_ask[3]
-
-            aa_id = ob.order_history[best_ask_oid].agent_id
-            aa: Agent = ob.agents[aa_id]
-            aa_order: Order = aa.history[best_ask_oid]
-
-            affordable_volume = min(order.volume, self._get_affordable_vol(best_ask_price, ba.cash))
-
-            if affordable_volume <= 0:
-                continue  # Agent cannot afford anything at current ask price
-
-            if aa_order.volume <= affordable_volume:
-                total_value = round(aa_order.volume * aa_order.price, Util.ROUND_NDIGITS)
-
-                aa.update_cash(total_value)
-                aa.remove_active_ask(aa_order.id)
-                aa_order.status = OrderStatus.CLOSED
-                aa.history[aa_order.id] = aa_order
-
-                ba.update_holdings(aa_order.price, aa_order.volume)
-                ba.update_cash(-total_value)
-
-                order.volume = round(order.volume - aa_order.volume, Util.ROUND_NDIGITS)
-
-                ob.fill_order(aa_order)
-                ob.current_price = aa_order.price
-                prices.append(aa_order.price)
-
-            else:
-                total_value = round(affordable_volume * aa_order.price, Util.ROUND_NDIGITS)
-
-                aa.update_cash(total_value)
-                aa.upsert_active_ask(aa_order)
-
-                ba.update_holdings(aa_order.price, affordable_volume)
-                ba.update_cash(-total_value)
-
-                ob.partial_fill_order(aa_order, affordable_volume)
-                ob.current_price = aa_order.price
-                prices.append(aa_order.price)
-
-                order.volume = 0
-
-            ob.upsert_agent(ba)
-            ob.upsert_agent(aa)
-
-        # Final status update
-        if order.volume > 0:
-            order.status = OrderStatus.CANCELED
+    def match(self, ob: OrderBook, order: Order):
+        ''' Match an order using its own side and type '''
+        match order.type:
+            case OrderType.MARKET:
+                self._match(ob, order, market=True)
+            case OrderType.LIMIT:
+                self._match(ob, order, market=False)
+            case OrderType.STOP | OrderType.STOP_LIMIT:
+                self.add_stop(ob, order)
+            case _:
+                log.error(f'INVALID ORDER TYPE @ MatchMaker.match(ob, order): {order.type}')
+
+    def add_stop(self, ob: OrderBook, order: Order):
+        ''' Park a stop order and trigger it right away if the price is already there\n
+        The caller reserves like for limit orders: cash for STOP_LIMIT bids, shares for STOP/STOP_LIMIT asks
+        '''
+        taker: Agent = ob.agents[order.agent_id]
+        taker.history[order.id] = order
+        if order.side is OrderAction.BID:
+            taker.upsert_active_bid(order)
         else:
-            order.status = OrderStatus.CLOSED
-
-        avg_price = (sum(prices) / len(prices)) if len(prices) > 0 else -1
-        order.price = avg_price
+            taker.upsert_active_ask(order)
+        ob.add_stop(order)
+        self._run_stops(ob)
+
+    def _run_stops(self, ob: OrderBook):
+        ''' Trigger stops until the price stops reaching new ones '''
+        triggered = ob.pop_triggered_stops()
+        while triggered:
+            for stop in triggered:
+                self._trigger(ob, stop)
+            triggered = ob.pop_triggered_stops()
+
+    def _trigger(self, ob: OrderBook, order: Order):
+        ''' Turn a triggered stop into its MARKET/LIMIT order (new time priority) and match it '''
+        market = ob.activate_stop(order)
+        if ob.auction is not None:
+            ob.auction.submit(order)    # Clears with the rest of the tick
+            return
+        self._execute(ob, order, market)
+
+    def amend(self, ob: OrderBook, order_id, price=None, volume=None) -> bool:
+        ''' Amend a resting limit order (see OrderBook.amend_order) and match it if the new price crosses the book
+
+        Returns: True if the order was amended
+        '''
+        if not ob.amend_order(order_id, price, volume):
+            return False
+        order = ob.order_history[order_id]
+        if ob.crosses(order):
+            ob.pull_order(order)
+            self._match(ob, order, market=False)
+        return True
 
-        ba.history[order.id] = order
-        ob.upsert_agent(ba)
+    def match_market_bid(self, ob: OrderBook, order: Order):
+        assert(order.side is OrderAction.BID)
+        self._match(ob, order, market=True)
 
     def match_limit_bid(self, ob: OrderBook, order: Order):
         assert(order.side is OrderAction.BID)
-        # Bidding agent
-        ba: Agent = ob.agents[order.agent_id]
-        
-        while ob.ask_queue and ob.peek_best(OrderAction.ASK)[0][0] <= order.price and order.volume > 0:
-            # Prevent agent trading with itself
-            if ob.peek_best(OrderAction.ASK)[0][3] == ba.id: continue
-
-            best_ask = ob.get_best(OrderAction.ASK)
-            if not best_ask: 
-                log.error('BEST ASK IS EMPTY! @ MatchMaker.match_limit_bid()')
-                break
-
-            best_ask_price = best_ask[0]
-            best_ask_time = best_ask[1]
-            best_ask_volume = best_ask[2]
-            best_ask_oid = best_ask[3]
+        self._match(ob, order, market=False)
 
-            # Asking agent
-            aa_id = ob.order_history[best_ask_oid].agent_id
-            aa: Agent = ob.agents[aa_id]
-            aa_order: Order = aa.history[best_ask_oid]
-
-            if aa_order.volume <= order.volume:
-                aa_order_total_value = round(aa_order.volume * aa_order.price, Util.ROUND_NDIGITS)
-                aa.update_cash(aa_order_total_value)
-                aa.remove_active_ask(aa_order.id)
-                aa_order.status = OrderStatus.CLOSED
-                aa.history[aa_order.id] = aa_order
-
-                ba.update_holdings(aa_order.price, aa_order.volume)
+    def match_market_ask(self, ob: OrderBook, order: Order):
+        assert(order.side is OrderAction.ASK)
+        self._match(ob, order, market=True)
 
-                order.volume = round(order.volume - aa_order.volume, Util.ROUND_NDIGITS)
+    def match_limit_ask(self, ob: OrderBook, order: Order):
+        assert(order.side is OrderAction.ASK)
+        self._match(ob, order, market=False)
+
+    def _match(self, ob: OrderBook, order: Order, market: bool):
+        if ob.auction is not None:
+            ob.auction.submit(order)    # Cleared with the rest of the tick by ob.run_auction()
+            return
+        self._execute(ob, order, market)
+        self._run_stops(ob)
+
+    def _execute(self, ob: OrderBook, order: Order, market: bool):
+        ''' Match one incoming order (no stop triggering) '''
+        taker: Agent = ob.agents[order.agent_id]
+        is_bid = order.side is OrderAction.BID
+        book = ob.ask_queue if is_bid else ob.bid_queue
+
+        if ob.allocation.time_priority:
+            fills, own_orders, stopped = self._walk(ob, book, order, taker, market, is_bid)
+        else:
+            fills, own_orders, stopped = self._walk_levels(ob, book, order, taker, market, is_bid)
+        if order.tif is TimeInForce.FOK and sum(volume for _, volume in fills) < order.volume:
+            self._cancel_incoming(ob, order, taker, market, is_bid)
+            return
+        for own in own_orders:
+            ob.cancel_order(own.id, taker)
+        prices, = self._settle(ob, book, is_bid, [(order, taker, market, fills)])
+        self._finish(ob, order, taker, market, is_bid, prices, stopped)
+
+    def match_batch(self, ob: OrderBook, orders: list[Order]):
+        ''' Match MARKET/LIMIT orders of one side in submission order with one walk of the opposite side, one settlement
+        pass and one trade tape block\n
+        Orders of one side never trade with each other, so every order takes the opposite side from where the one before it
+        stopped, like submitting them one by one. Stops the batch reaches trigger after it.
+        FOK orders, self-trade prevention and allocation without time priority need the book between orders, those batches
+        are matched one by one
+        '''
+        if not orders:
+            return
+        side = orders[0].side
+        if any(order.side is not side for order in orders):
+            log.error(f'MIXED SIDES @ MatchMaker.match_batch(ob, orders): {side}')
+            return
+        if ob.auction is not None:
+            for order in orders:
+                ob.auction.submit(order)
+            return
+        if self.stp is not SelfTradePrevention.NONE or not ob.allocation.time_priority or any(order.tif is TimeInForce.FOK for order in orders):
+            for order in orders:
+                self._execute(ob, order, order.type is OrderType.MARKET)
+            self._run_stops(ob)
+            return
+
+        is_bid = side is OrderAction.BID
+        book = ob.ask_queue if is_bid else ob.bid_queue
+        batch = self._walk_batch(ob, book, orders, is_bid)
+        for (order, taker, market, _), prices in zip(batch, self._settle(ob, book, is_bid, batch)):
+            self._finish(ob, order, taker, market, is_bid, prices)
+        self._run_stops(ob)
+
+    def _walk(self, ob: OrderBook, book: PriceLevelQueue, order: Order, taker: Agent, market: bool, is_bid: bool):
+        ''' Walk the opposite side once without mutating it\n
+        Returns: (fills, own_orders, stopped)
+        - fills -> [(resting_order, volume), ...] in priority order
+        - own_orders -> The taker's own resting orders to cancel [CANCEL_RESTING]
+        - stopped -> True if self-trade prevention canceled the rest of the incoming order [CANCEL_INCOMING]
+        '''
+        fills = []
+        own_orders = []
+        remaining = order.volume
+        limit = order.price
+        cash = taker.cash
+        if ob.settlement is not None:
+            cash += ob.settlement.pending_cash(taker)
+        value = ob.scale.value
+        stp = self.stp
+        taker_id = taker.id
+
+        for resting in book.iter_orders():
+            if remaining <= 0:
+                break
+            price = resting.price
+            if not market and (price > limit if is_bid else price < limit):
+                break
 
-                ob.fill_order(aa_order)
-                ob.current_price = aa_order.price
-                ob.upsert_agent(ba)
-                ob.upsert_agent(aa)
+            if resting.agent_id == taker_id and stp is not SelfTradePrevention.NONE:
+                match stp:
+                    case SelfTradePrevention.SKIP:
+                        continue
+                    case SelfTradePrevention.CANCEL_RESTING:
+                        own_orders.append(resting)
+                        continue
+                    case SelfTradePrevention.CANCEL_INCOMING:
+                        return fills, own_orders, True
+
+            volume = resting.volume if resting.volume < remaining else remaining
+
+            # Market bids are only limited by the bidding agent's cash
+            if market and is_bid:
+                affordable = self._get_affordable_vol(price, cash)
+                if affordable <= 0:
+                    break
+                if affordable < volume:
+                    volume = affordable
+                cash -= value(price, volume)
+
+            fills.append((resting, volume))
+            remaining -= volume
+        return fills, own_orders, False
+
+    def _walk_batch(self, ob: OrderBook, book: PriceLevelQueue, orders: list[Order], is_bid: bool):
+        ''' _walk for a batch of one side's orders: each one continues from the resting order (and volume left on it) where
+        the one before stopped, without mutating the book [no self-trade prevention]\n
+        Returns: [(order, taker, market, fills), ...] in submission order, fills like _walk's
+        '''
+        agents = ob.agents
+        value = ob.scale.value
+        settlement = ob.settlement
+        resting_orders = book.iter_orders()
+        resting = next(resting_orders, None)
+        left = resting.volume if resting is not None else 0
+        cash_left = {}      # Market bid cash still unspent per taker, an agent can have more than one order in the batch
+        batch = []
+
+        for order in orders:
+            taker: Agent = agents[order.agent_id]
+            market = order.type is OrderType.MARKET
+            fills = []
+            batch.append((order, taker, market, fills))
+            remaining = order.volume
+            limit = order.price
+            if market and is_bid:
+                cash = cash_left.get(taker.id)
+                if cash is None:
+                    cash = taker.cash + (settlement.pending_cash(taker) if settlement is not None else 0)
+
+            while remaining > 0 and resting is not None:
+                price = resting.price
+                if not market and (price > limit if is_bid else price < limit):
+                    break
+                volume = left if left < remaining else remaining
+
+                # Market bids are only limited by the bidding agent's cash
+                if market and is_bid:
+                    affordable = self._get_affordable_vol(price, cash)
+                    if affordable <= 0:
+                        break
+                    if affordable < volume:
+                        volume = affordable
+                    cash -= value(price, volume)
+
+                fills.append((resting, volume))
+                remaining -= volume
+                left -= volume
+                if left == 0:
+                    resting = next(resting_orders, None)
+                    left = resting.volume if resting is not None else 0
+
+            if market and is_bid:
+                cash_left[taker.id] = cash
+        return batch
+
+    def _walk_levels(self, ob: OrderBook, book: PriceLevelQueue, order: Order, taker: Agent, market: bool, is_bid: bool):
+        ''' _walk for allocation policies without time priority: levels the incoming order clears fill whole,
+        the level it runs out at (volume or market bid cash) is split by ob.allocation.allocate()\n
+        Returns: (fills, own_orders, stopped) like _walk [CANCEL_INCOMING stops before a level holding the taker's own orders]
+        '''
+        fills = []
+        own_orders = []
+        remaining = order.volume
+        limit = order.price
+        cash = taker.cash
+        if ob.settlement is not None:
+            cash += ob.settlement.pending_cash(taker)
+        value = ob.scale.value
+        stp = self.stp
+        taker_id = taker.id
+        # The taker's own resting orders on this side by price, built once so each level is a dict lookup
+        own_by_price = {}
+        if stp is not SelfTradePrevention.NONE:
+            for own in ob.open_orders.get(taker_id, {}).values():
+                if own.id in book:
+                    own_by_price.setdefault(own.price, []).append(own)
+
+        for price, level in book.iter_levels():
+            if remaining <= 0:
+                break
+            if not market and (price > limit if is_bid else price < limit):
+                break
 
+            resting = level.values()
+            level_volume = book.sizes[price]
+            own = own_by_price.get(price)
+            if own:
+                match stp:
+                    case SelfTradePrevention.CANCEL_RESTING:
+                        own_orders.extend(own)
+                    case SelfTradePrevention.CANCEL_INCOMING:
+                        return fills, own_orders, True
+                resting = [r for r in resting if r.agent_id != taker_id]
+                level_volume -= sum(o.volume for o in own)
+                if not resting:
+                    continue
+
+            available = remaining
+            # Market bids are only limited by the bidding agent's cash
+            if market and is_bid:
+                available = min(remaining, self._get_affordable_vol(price, cash))
+                if available <= 0:
+                    break
+
+            if level_volume <= available:
+                fills.extend((r, r.volume) for r in resting)
+                taken = level_volume
             else:
-                order_total_value = round(order.volume * aa_order.price, Util.ROUND_NDIGITS)
-                aa.update_cash(order_total_value)
-                aa.upsert_active_ask(aa_order)
-
-                ba.update_holdings(aa_order.price, order.volume)
-                order.status = OrderStatus.CLOSED
-                ba.history[order.id] = order
-
-                ob.partial_fill_order(aa_order, order.volume)
-                ob.current_price = aa_order.price
-                ob.upsert_agent(ba)
-                ob.upsert_agent(aa)
-
-                order.volume = 0
-
-        if order.volume > 0:
-            ba.history[order.id] = order
-            ba.upsert_active_bid(order)
-            ob.upsert_agent(ba)
-            ob.add_order(order)
+                resting = list(resting)
+                volumes = np.fromiter(map(attrgetter('volume'), resting), dtype=np.int64, count=len(resting))
+                shares = ob.allocation.allocate(volumes, available)
+                filled = np.flatnonzero(shares)
+                fills.extend(zip(map(resting.__getitem__, filled.tolist()), shares[filled].tolist()))
+                taken = available
+
+            if market and is_bid:
+                cash -= value(price, taken)
+            remaining -= taken
+            if taken < level_volume:
+                break
+        return fills, own_orders, False
+
+    def _settle(self, ob: OrderBook, book: PriceLevelQueue, is_bid: bool, batch: list):
+        ''' Apply the fills of one side's incoming orders to the book, the resting agents and (in one update per order) the
+        incoming agents, then record them all on ob.trades in one block\n
+        - batch -> [(order, taker, market, fills), ...] in submission order, fills -> [(resting_order, volume), ...]
+        Returns: list of fill prices per incoming order
+        '''
+        value = ob.scale.value
+        agents = ob.agents
+        buffer = ob.settlement
+        if buffer is None:
+            pay, deliver = Agent.pay, Agent.deliver
         else:
-            order.status = OrderStatus.CLOSED
-            ba.history[order.id] = order
-            ob.upsert_agent(ba)
-
-    def match_market_ask(self, ob: OrderBook, order: Order):
-        assert(order.side is OrderAction.ASK)
-        # Asking agent
-        aa: Agent = ob.agents[order.agent_id]
+            pay, deliver = buffer.add_cash, buffer.add_shares
+        order_prices = []
         prices = []
-        
-        while order.volume > 0 and ob.bid_queue:
-            # Prevent agent trading with itself
-            if ob.peek_best(OrderAction.BID)[0][3] == aa.id: print('skipping');continue
-
-            best_bid = ob.get_best(OrderAction.BID)
-            if not best_bid: 
-                log.error('BEST BID IS EMPTY! @ MatchMaker.match_market_ask()')
-                break
-
-            best_bid_price = best_bid[0]
-            best_bid_time = best_bid[1]
-            best_bid_volume = best_bid[2]
-            best_bid_oid = best_bid[3]
-
-            # Bidding agent
-            ba_id = ob.order_history[best_bid_oid].agent_id
-            ba: Agent = ob.agents[ba_id]
-            ba_order: Order = ba.history[best_bid_oid]
-
-            if ba_order.volume <= order.volume:
-                ba_order_total_value = round(ba_order.volume * ba_order.price, Util.ROUND_NDIGITS)
-                aa.update_cash(ba_order_total_value)
-                
-                ba.update_holdings(ba_order.price, ba_order.volume)
-                ba.remove_active_bid(ba_order.id)
-                ba_order.status = OrderStatus.CLOSED
-                ba.history[ba_order.id] = ba_order
-
-                order.volume = round(order.volume - ba_order.volume, Util.ROUND_NDIGITS)
-
-                ob.fill_order(ba_order)
-                ob.current_price = ba_order.price
-                prices.append(ba_order.price)
-                ob.upsert_agent(aa)
-                ob.upsert_agent(ba)
-
+        qtys = []
+        taker_ids = []
+        maker_ids = []
+        resting_ids = []
+
+        for order, taker, market, fills in batch:
+            taker_cash = 0
+            filled = 0
+            fill_prices = []
+
+            for resting, volume in fills:
+                price = resting.price
+                total_value = value(price, volume)
+                maker: Agent = agents[resting.agent_id]
+
+                if is_bid:
+                    pay(maker, total_value)
+                    deliver(taker, price, volume)
+                    if market:
+                        taker_cash -= total_value
+                    else:
+                        # Limit bids reserved cash at their limit, give back the difference to the resting ask's price
+                        taker_cash += value(order.price, volume) - total_value
+                else:
+                    deliver(maker, price, volume)
+                    taker_cash += total_value
+
+                if volume >= resting.volume:
+                    book.remove(resting.id)
+                    if is_bid:
+                        maker.remove_active_ask(resting.id)
+                    else:
+                        maker.remove_active_bid(resting.id)
+                    ob.fill_order(resting)
+                else:
+                    ob.partial_fill_order(resting, volume)
+
+                filled += volume
+                fill_prices.append(price)
+                maker_ids.append(maker.id)
+                resting_ids.append(resting.id)
+                qtys.append(volume)
+
+            if taker_cash:
+                pay(taker, taker_cash)
+            order.volume -= filled
+            order_prices.append(fill_prices)
+            prices.extend(fill_prices)
+            taker_ids.extend([taker.id] * len(fill_prices))
+
+        if prices:
+            ob.current_price = prices[-1]
+            first_seq = ob.next_seq
+            ob.next_seq += len(prices)
+            if is_bid:
+                ob.trades.extend(first_seq, prices, qtys, 1, taker_ids, maker_ids, resting_ids)
             else:
-                order_total_value = round(order.volume * ba_order.price, Util.ROUND_NDIGITS)
-                aa.update_cash(order_total_value)
-
-                ba.update_holdings(ba_order.price, order.volume)
-                ba.history[ba_order.id] = ba_order
-
-                ob.partial_fill_order(ba_order, order.volume)
-                ob.current_price = ba_order.price
-                prices.append(ba_order.price)
-                ob.upsert_agent(ba)
-                ob.upsert_agent(aa)
-
-                order.volume = 0
-        if order.volume > 0:
-            order.status = OrderStatus.CANCELED
-            for price, volume in order.get_returnable_shares():
-                aa.update_holdings(price, volume)
+                ob.trades.extend(first_seq, prices, qtys, -1, maker_ids, taker_ids, resting_ids)
+        return order_prices
+
+    def _cancel_incoming(self, ob: OrderBook, order: Order, taker: Agent, market: bool, is_bid: bool):
+        ''' Cancel what is left of the incoming order and return what it reserved (limit bid cash, ask shares) '''
+        order.status = OrderStatus.CANCELED
+        if is_bid:
+            if not market:
+                taker.update_cash(ob.scale.value(order.price, order.volume))
         else:
-            order.status = OrderStatus.CLOSED
-        
-        avg_price = (sum(prices) / len(prices)) if len(prices) > 0 else -1
-        order.price = avg_price
-
-        aa.history[order.id] = order
-        ob.upsert_agent(aa)
-
-    def match_limit_ask(self, ob: OrderBook, order: Order):
-        assert(order.side is OrderAction.ASK)
-        # Asking Agent
-        aa: Agent = ob.agents[order.agent_id]
+            for price, volume in order.get_returnable_shares():
+                taker.update_holdings(price, volume)
+        taker.history[order.id] = order
+        ob.record_closed(order)
+
+    def _finish(self, ob: OrderBook, order: Order, taker: Agent, market: bool, is_bid: bool, prices: list, stopped=False):
+        ''' Final status of the incoming order [stopped -> self-trade prevention canceled the rest of it] '''
+        if market:
+            order.price = (sum(prices) / len(prices)) if len(prices) > 0 else -1
+            if order.volume > 0:
+                self._cancel_incoming(ob, order, taker, market, is_bid)
+            else:
+                order.status = OrderStatus.CLOSED
+                taker.history[order.id] = order
+                ob.record_closed(order)
 
-        while ob.bid_queue and ob.peek_best(OrderAction.BID)[0][0] >= order.price and order.volume > 0:
-            # Prevent agent trading with itself
-            if ob.peek_best(OrderAction.BID)[0][3] == aa.id: continue
+        elif order.volume > 0 and (stopped or order.tif is TimeInForce.IOC or order.tif is TimeInForce.FOK):
+            self._cancel_incoming(ob, order, taker, market, is_bid)
 
-            best_bid = ob.get_best(OrderAction.BID)
-            if not best_bid: 
-                log.error('BEST BID IS EMPTY! @ MatchMaker.match_limit_ask()')
-                break
-            
-            best_bid_price = best_bid[0]
-            best_bid_time = best_bid[1]
-            best_bid_volume = best_bid[2]
-            best_bid_oid = best_bid[3]
-
-            # Bidding Agent
-            ba_id = ob.order_history[best_bid_oid].agent_id
-            ba: Agent = ob.agents[ba_id]
-            ba_order: Order = ba.history[best_bid_oid]
-
-            if ba_order.volume <= order.volume:
-                ba_order_total_value = round(ba_order.volume * ba_order.price, Util.ROUND_NDIGITS)
-                aa.update_cash(ba_order_total_value)
-                
-                ba.update_holdings(ba_order.price, ba_order.volume)
-                ba.remove_active_bid(ba_order.id)
-                ba_order.status = OrderStatus.CLOSED
-                ba.history[ba_order.id] = ba_order
-                
-                order.volume = round(order.volume - ba_order.volume, Util.ROUND_NDIGITS)
-                
-                ob.fill_order(ba_order)
-                ob.current_price = ba_order.price
-                ob.upsert_agent(aa)
-                ob.upsert_agent(ba)
-
-                
+        elif order.volume > 0:
+            taker.history[order.id] = order
+            if is_bid:
+                taker.upsert_active_bid(order)
             else:
-                order_total_value = round(order.volume * ba_order.price, Util.ROUND_NDIGITS)
-                aa.update_cash(order_total_value)
-
-                ba.update_holdings(ba_order.price, order.volume)
-                ba.history[ba_order.id] = ba_order
-
-                ob.partial_fill_order(ba_order, order.volume)
-                ob.current_price = ba_order.price
-                ob.upsert_agent(ba)
-                ob.upsert_agent(aa)
-
-                order.volume = 0
-        if order.volume > 0:
-            aa.history[order.id] = order
-            aa.upsert_active_ask(order)
-            ob.upsert_agent(aa)
+                taker.upsert_active_ask(order)
             ob.add_order(order)
+
         else:
             order.status = OrderStatus.CLOSED
-            aa.history[order.id] = order
-            ob.upsert_agent(aa)
\ No newline at end of file
+            taker.history[order.id] = order
+            ob.record_closed(order)
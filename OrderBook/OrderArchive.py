@@ -0,0 +1,52 @@
+import json
+import sqlite3
+
+from Order.Order import Order
+
+
+class OrderArchive:
+    '''
+    Append-only on-disk store for closed/canceled orders evicted from memory, queryable by order id
+    - path -> SQLite file the orders are written to (':memory:' for a throwaway archive)
+    - batch_size -> Orders buffered before they are written in one transaction
+    '''
+    def __init__(self, path: str, batch_size=1000):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending: list[tuple] = []
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS orders (id PRIMARY KEY, agent_id, data TEXT)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS orders_agent ON orders (agent_id)')
+
+    def __len__(self):
+        self.flush()
+        return self._conn.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+
+    def append(self, order: Order):
+        ''' Queue an order to be written, writes the batch once it is full '''
+        self._pending.append((order.id, order.agent_id, json.dumps(order.to_dict())))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        ''' Write all buffered orders '''
+        if self._pending:
+            with self._conn:
+                self._conn.executemany('INSERT OR IGNORE INTO orders VALUES (?, ?, ?)', self._pending)
+            self._pending.clear()
+
+    def get(self, order_id) -> Order:
+        ''' Archived order with matching id or None '''
+        self.flush()
+        row = self._conn.execute('SELECT data FROM orders WHERE id = ?', (order_id,)).fetchone()
+        return Order.from_dict(json.loads(row[0])) if row else None
+
+    def get_agent_orders(self, agent_id) -> list[Order]:
+        ''' All archived orders placed by an agent, oldest first '''
+        self.flush()
+        rows = self._conn.execute('SELECT data FROM orders WHERE agent_id = ? ORDER BY rowid', (agent_id,)).fetchall()
+        return [Order.from_dict(json.loads(row[0])) for row in rows]
+
+    def close(self):
+        self.flush()
+        self._conn.close()
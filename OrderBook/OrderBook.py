@@ -1,89 +1,313 @@
+from collections import OrderedDict
 from copy import copy
-from heapdict import heapdict
-from heapq import nsmallest
 from time import time
+import numpy as np
 import logging
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 log = logging.getLogger(__name__)
 
 from Order.OrderAction import OrderAction
 from Order.OrderStatus import OrderStatus
+from Order.OrderType import OrderType
 from Order.Order import Order
+from Order.OrderPool import OrderPool
+from Order.TimeInForce import TimeInForce
 from Agent.Agent import Agent
+from OrderBook.PriceLevelQueue import PriceLevelQueue
+from OrderBook.OrderArchive import OrderArchive
+from OrderBook.SettlementBuffer import SettlementBuffer
+from OrderBook.TradeTape import TradeTape
+from OrderBook.TimingWheel import TimingWheel
+from OrderBook.StopIndex import StopIndex
+from OrderBook.CallAuction import CallAuction
+from OrderBook.AllocationPolicy import AllocationPolicy
+from OrderBook.FifoAllocation import FifoAllocation
+from Util.PriceScale import PriceScale
+from Util.Util import Util
 
 
 class OrderBook:
     '''
     Holds information for active ask and bid orders
     - manager -> Multiproccessing manager for concurrency
-    - current_price -> Last sale price
-    - bid_queue -> [order_id] = (-price, time, volume, order_id) [negated price so best bid is highest priority]
-    - ask_queue -> [order_id] = (price, time, volume, order_id)
+    - scale -> PriceScale, tick_size=None keeps float prices, otherwise prices are integer ticks and cash integer minor units
+    - current_price -> Last sale price (in scale units)
+    - bid_queue -> PriceLevelQueue of resting bids (highest price first, then time)
+    - ask_queue -> PriceLevelQueue of resting asks (lowest price first, then time)
+    - buy_stops, sell_stops -> StopIndex of pending STOP/STOP_LIMIT orders, nearest trigger first
     - order_history -> {order_id: order}
     - agents -> {agent_id: agent}
+    - open_orders -> {agent_id: {order_id: order}} of every agent's resting orders, kept in step with add/fill/cancel
+    - agent_tags, tagged -> {agent_id: tag} and {tag: {agent_id: None}} for removing groups of agents (e.g. a GA population)
+    - next_order_num, next_agent_num -> Per-book id counters, every book is an independent market
+    - int_ids -> get_id returns compact ints instead of zero-padded strings
+    - history_limit -> Closed/canceled orders kept in order_history and Agent.history [None -> keep everything, at least 1]
+      an evicted order goes back to order_pool and is reused by a later new_order(), so references to closed orders are
+      only safe until history_limit more orders close [0 would recycle an order while its caller still holds it]
+    - archive -> OrderArchive that orders evicted past history_limit are written to [None -> evicted orders are dropped]
+    - order_pool -> OrderPool agents create orders from, evicted orders are recycled into it
+    - next_seq -> Logical clock, every order gets the next sequence number as its time priority (deterministic, replayable)
+    - tick -> Simulation tick counter, advance_tick() moves it and expires GTD orders
+    - expiry -> TimingWheel of GTD order ids by expire_tick
+    - sim_time -> Optional simulated exchange time used in snapshots [None -> wall-clock time]
+    - settlement -> SettlementBuffer that fills' cash/holdings changes are queued in until settle() [None -> fills settle immediately]
+    - allocation -> AllocationPolicy that shares a price level among its resting orders [default FifoAllocation, ProRataAllocation for pro-rata]
+    - auction -> CallAuction that MatchMaker hands incoming orders to until run_auction() [None -> continuous matching]
+    - trades -> TradeTape with every fill (seq, price, qty, aggressor side, buyer, seller, resting order)
+    - version -> Changes on every add, fill and cancel, used to reuse cached depth views
     '''
     # Order/Agent ID info
-    next_order_num = 1
-    next_agent_num = 1
     MAX_ID_DIGITS = 12
 
     # Ticker Symbol
     SYMBOL_ID = 'COIN'
 
-    # Singleton Instance
-    _instance = None
+    def __init__(self, initial_price=1.00, tick_size=None, int_ids=False, history_limit=None, archive_path=None, sim_time=None, deferred_settlement=False, call_auction=False, allocation: AllocationPolicy = None):
+        self.int_ids = int_ids
+        self.next_seq = 1
+        self.sim_time = sim_time
+        self.tick = 0
+        self.expiry = TimingWheel()
+        if history_limit is not None and history_limit < 1:
+            raise ValueError(f'Invalid history_limit: {history_limit}')
+        self.history_limit = history_limit
+        self.archive = OrderArchive(archive_path) if archive_path is not None else None
+        self._closed_ids: OrderedDict = OrderedDict()
+        self.order_pool = OrderPool()
+        self.next_order_num = 1
+        self.next_agent_num = 1
+        self.scale = PriceScale(tick_size)
+        self.settlement = SettlementBuffer() if deferred_settlement else None
+        self.trades = TradeTape(self.scale.fixed_point)
+        self.allocation = allocation if allocation is not None else FifoAllocation()
+        self.auction = CallAuction(self.allocation) if call_auction else None
+        self.current_price = self.scale.to_ticks(initial_price)
+        self.bid_queue = PriceLevelQueue(OrderAction.BID, self.scale.fixed_point)
+        self.ask_queue = PriceLevelQueue(OrderAction.ASK, self.scale.fixed_point)
+        self.buy_stops = StopIndex(OrderAction.BID)
+        self.sell_stops = StopIndex(OrderAction.ASK)
+        self.order_history: dict[str, Order] = {}
+        self.agents: dict[str, Agent] = {}
+        self.open_orders: dict[str, dict[str, Order]] = {}
+        self.agent_tags: dict[str, str] = {}
+        self.tagged: dict[str, dict[str, None]] = {}
+        self._depth_cache: dict[int, tuple] = {}
+        self._indicator_cache: dict[int, tuple] = {}
 
-    def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-    
-    def __init__(self, initial_price=1.00):
-        if not hasattr(self, '_initialized'):
-            self.current_price = initial_price
-            self.bid_queue = heapdict()
-            self.ask_queue = heapdict()
-            self.order_history: dict[str, Order] = {}
-            self.agents: dict[str, Agent] = {}
+    @classmethod
+    def create_markets(cls, n, initial_price=1.00, tick_size=None, int_ids=False, **kwargs):
+        ''' Make n independent order books (e.g. for vectorized envs or parallel GA scenarios)\n
+        Any other OrderBook option (history_limit, deferred_settlement, call_auction, ...) is passed to every book
+        '''
+        return [cls(initial_price, tick_size, int_ids, **kwargs) for _ in range(n)]
 
     def reset(self, initial_price=1.00):
-        ''' Resets the orderbook to its initial state '''
-        self.current_price = initial_price
+        ''' Resets the orderbook to its initial state [fills still waiting in the settlement buffer are applied first] '''
+        self.settle()
+        self.current_price = self.scale.to_ticks(initial_price)
         self.bid_queue.clear()
         self.ask_queue.clear()
+        self.buy_stops.clear()
+        self.sell_stops.clear()
         self.order_history.clear()
+        self.open_orders.clear()
+        self.expiry = TimingWheel(now=self.tick)
+        self._closed_ids.clear()
+        self._depth_cache.clear()
+        self._indicator_cache.clear()
+        self.trades.clear()
+        if self.auction is not None:
+            self.auction.orders.clear()
+
+    @property
+    def version(self):
+        ''' Book version, increases on every change to either side '''
+        return self.bid_queue.version + self.ask_queue.version
 
     def get_id(self, id_type):
-        ''' Returns a unique incremented id for id_types: "ORDER" or "AGENT" '''
-        new_id = ''
+        ''' Returns a unique incremented id for id_types: "ORDER" or "AGENT"\n
+        int_ids=True -> plain ints (render with format_id for display/JSON), otherwise zero-padded strings
+        '''
         match id_type:
             case "ORDER":
-                new_id += 'O-'
-                char_num = len(str(self.next_order_num))
-                remaining_chars = self.MAX_ID_DIGITS - char_num
-                new_id += '0' * remaining_chars
-                new_id += str(self.next_order_num)
+                num = self.next_order_num
                 self.next_order_num += 1
-
             case "AGENT":
-                new_id += 'A-'
-                char_num = len(str(self.next_agent_num))
-                remaining_chars = self.MAX_ID_DIGITS - char_num
-                new_id += '0' * remaining_chars
-                new_id += str(self.next_agent_num)
+                num = self.next_agent_num
                 self.next_agent_num += 1
-            
             case _:
                 log.error(f'INVALID ID TYPE @ OrderBook.get_id(id_type): {id_type}')
-        return new_id
-            
-    def upsert_agent(self, agent: Agent):
-        ''' Add or update an agent in the agents dictionary '''
+                return ''
+
+        if self.int_ids:
+            return num
+        return self.format_id(num, id_type)
+
+    def get_seq(self):
+        ''' Returns the next logical sequence number '''
+        seq = self.next_seq
+        self.next_seq += 1
+        return seq
+
+    def advance_clock(self, dt=1.0):
+        ''' Move the simulated exchange time forward [starts at 0 if no sim_time was given] '''
+        self.sim_time = (self.sim_time or 0.0) + dt
+        return self.sim_time
+
+    def settle(self):
+        ''' Apply the queued fill settlements to the agents [call once per tick, no-op without deferred_settlement] '''
+        if self.settlement is not None:
+            self.settlement.settle()
+
+    def run_auction(self):
+        ''' Clear the orders collected this tick at one uniform price [call once per tick, no-op without call_auction]\n
+        Returns: clearing price or None if nothing traded
+        '''
+        if self.auction is None:
+            return None
+        price = self.auction.clear(self)
+        # Stops the clearing price reached trade in the next clear
+        for stop in self.pop_triggered_stops():
+            self.activate_stop(stop)
+            self.auction.submit(stop)
+        return price
+
+    def advance_tick(self, n=1) -> list[Order]:
+        ''' Move the tick counter forward and cancel (returning assets) every GTD order that expired [O(expired), no book scan]\n
+        Returns: list of expired orders
+        '''
+        self.tick += n
+        expired = []
+        for order_id in self.expiry.advance(self.tick):
+            order = self.order_history.get(order_id)
+            # Lazy cancel: skip orders that filled or were canceled since they were scheduled
+            if order is None or order.status is not OrderStatus.OPEN or order.expire_tick is None or order.expire_tick > self.tick:
+                continue
+            agent = self.agents.get(order.agent_id)
+            if agent is None or order_id not in (self.bid_queue if order.side is OrderAction.BID else self.ask_queue):
+                continue
+            self.cancel_order(order_id, agent)
+            expired.append(order)
+        return expired
+
+    def new_order(self, agent_id, price, volume, side: OrderAction, type: OrderType, reserved_shares: list[tuple[float, int]] = (), tif: TimeInForce = TimeInForce.GTC, expire_tick: int = None, stop_price: float = None) -> Order:
+        ''' Make an order with a new id and sequence number, reusing a pooled Order when available '''
+        return self.order_pool.acquire(self.get_id('ORDER'), agent_id, price, volume, side, type, reserved_shares, self.get_seq(), tif, expire_tick, stop_price)
+
+    @classmethod
+    def format_id(cls, id_value, id_type='ORDER'):
+        ''' Render an integer id in its string form, e.g. 123 -> "O-000000000123" [strings are returned as is] '''
+        if isinstance(id_value, str):
+            return id_value
+        prefix = 'A-' if id_type == 'AGENT' else 'O-'
+        return f'{prefix}{id_value:0{cls.MAX_ID_DIGITS}d}'
+
+    def upsert_agent(self, agent: Agent, tag: str = None):
+        ''' Add or update an agent in the agents dictionary [tag -> group it can be removed with by remove_tag] '''
         self.agents[agent.id] = agent
+        if tag is not None:
+            self._untag(agent.id)
+            self.agent_tags[agent.id] = tag
+            self.tagged.setdefault(tag, {})[agent.id] = None
+
+    def _untag(self, agent_id):
+        tag = self.agent_tags.pop(agent_id, None)
+        if tag is not None:
+            members = self.tagged[tag]
+            del members[agent_id]
+            if not members:
+                del self.tagged[tag]
+
+    def get_tag(self, agent_id):
+        ''' Returns the agent's tag [None if untagged] '''
+        return self.agent_tags.get(agent_id)
+
+    def get_open_orders(self, agent_id) -> list[Order]:
+        ''' Returns the agent's resting orders, oldest first '''
+        return list(self.open_orders.get(agent_id, {}).values())
+
+    def _index_order(self, order: Order):
+        self.open_orders.setdefault(order.agent_id, {})[order.id] = order
+
+    def _unindex_order(self, order: Order):
+        orders = self.open_orders.get(order.agent_id)
+        if orders is not None:
+            orders.pop(order.id, None)
+            if not orders:
+                del self.open_orders[order.agent_id]
+
+    def cancel_all(self, agent_id) -> int:
+        ''' Cancel every resting (and auction queued) order of one agent and return their assets [O(k) in the agent's open orders]
+
+        Returns: number of orders canceled
+        '''
+        withdrawn = self.auction.withdraw(self, (agent_id,)) if self.auction is not None else 0
+        return withdrawn + self._cancel_resting(agent_id)
+
+    def _cancel_resting(self, agent_id) -> int:
+        orders = self.open_orders.get(agent_id)
+        if not orders:
+            return 0
+        agent = self.agents[agent_id]
+        order_ids = list(orders)
+        for order_id in order_ids:
+            self.cancel_order(order_id, agent)
+        return len(order_ids)
+
+    def remove_agents(self, agent_ids, return_assets=True) -> int:
+        ''' Remove agents and pull all their resting and auction queued orders from the book [O(k) in the affected orders]
+
+        return_assets=False -> orders are dropped without refunding the (departing) agents
+
+        Returns: number of orders removed
+        '''
+        agent_ids = list(agent_ids)
+        removed = self.auction.withdraw(self, agent_ids, return_assets) if self.auction is not None else 0
+        for agent_id in agent_ids:
+            if return_assets:
+                removed += self._cancel_resting(agent_id)
+            else:
+                for order in self.open_orders.pop(agent_id, {}).values():
+                    order.status = OrderStatus.CANCELED
+                    self._remove_resting(order)
+                    self.record_closed(order)
+                    removed += 1
+            self._untag(agent_id)
+            self.agents.pop(agent_id, None)
+        return removed
+
+    def remove_tag(self, tag: str, return_assets=True) -> int:
+        ''' Remove every agent with this tag (see remove_agents)
+
+        Returns: number of orders removed
+        '''
+        return self.remove_agents(self.tagged.get(tag, {}), return_assets)
     
     def get_agent_by_id(self, agent_id: str):
         ''' Returns an agent obj with matching agent_id '''
         return self.agents[agent_id]
+
+    def get_order(self, order_id) -> Order:
+        ''' Returns an order from memory or the archive [None if it was never seen or was dropped] '''
+        order = self.order_history.get(order_id)
+        if order is None and self.archive is not None:
+            order = self.archive.get(order_id)
+        return order
+
+    def record_closed(self, order: Order):
+        ''' Order reached CLOSED/CANCELED, evict the oldest closed orders past history_limit to the archive '''
+        if self.history_limit is None:
+            return
+        self._closed_ids[order.id] = order
+        while len(self._closed_ids) > self.history_limit:
+            old_id, old_order = self._closed_ids.popitem(last=False)
+            self.order_history.pop(old_id, None)
+            agent = self.agents.get(old_order.agent_id)
+            if agent is not None:
+                agent.history.pop(old_id, None)
+            if self.archive is not None:
+                self.archive.append(old_order)
+            self.order_pool.release(old_order)
         
     def get_best(self, side: OrderAction):
         ''' Get the best active bid/ask limit order and remove it from the queue 
@@ -94,16 +318,17 @@ class OrderBook:
         best = ()
         match side:
             case OrderAction.BID:
-                try:
-                    id, _best = self.bid_queue.popitem()
-                    best = (-_best[0], _best[1], _best[2], _best[3])  # negate price to positive value, append id for lookups
-                except KeyError as e:
-                    log.error(f'BID QUEUE IS EMPTY! RETURNING EMPTY TUPLE FROM OrderBook.get_best(BID)! {e}')
+                order = self.bid_queue.pop_order()
+                if order is None:
+                    log.error('BID QUEUE IS EMPTY! RETURNING EMPTY TUPLE FROM OrderBook.get_best(BID)!')
+                else:
+                    best = (order.price, order.timestamp, order.volume, order.id)
             case OrderAction.ASK:
-                try:
-                    id, best = self.ask_queue.popitem()
-                except KeyError as e:
-                    log.error(f'ASK QUEUE IS EMPTY! RETURNING EMPTY TUPLE FROM OrderBook.get_best(ASK)! {e}')
+                order = self.ask_queue.pop_order()
+                if order is None:
+                    log.error('ASK QUEUE IS EMPTY! RETURNING EMPTY TUPLE FROM OrderBook.get_best(ASK)!')
+                else:
+                    best = (order.price, order.timestamp, order.volume, order.id)
             case _:
                 log.error(f'INVALID SIDE VALUE @ OrderBook.get_best(side): {side}')
         return best
@@ -117,48 +342,81 @@ class OrderBook:
         best_n = []
         match side:
             case OrderAction.BID:
-                best_n = [(-i[0], *i[1:]) for k, i in nsmallest(n, list(self.bid_queue.items()))]
+                best_n = [(o.price, o.timestamp, o.volume, o.id) for o in self.bid_queue.peek(n)]
             case OrderAction.ASK:
-                best_n = [i for k, i in nsmallest(n, list(self.ask_queue.items()))]
+                best_n = [(o.price, o.timestamp, o.volume, o.id) for o in self.ask_queue.peek(n)]
             case _:
                 log.error(f'INVALID SIDE VALUE @ OrderBook.get_best(side): {side}')
 
         return best_n
 
-    def _add_to_queue(self, order: Order):
-        ''' Add an order tuple into the bid/ask queue '''
+    def _add_to_queue(self, order: Order, front=False):
+        ''' Add an order into the bid/ask queue [front=True -> keep time priority at its price level] '''
         match order.side:
             case OrderAction.BID:
-                try:
-                    self.bid_queue[order.id] = (-order.price, order.timestamp, order.volume, order.id)  # put best bid price at top (highest price)
-                except Exception as e:
-                    log.error(f'Exception Occured @ OrderBook._add_to_queue(BID, info_tuple)! {e}')
+                self.bid_queue.push(order, front)
             case OrderAction.ASK:
-                try:
-                    self.ask_queue[order.id] = (order.price, order.timestamp, order.volume, order.id)
-                except Exception as e:
-                    log.error(f'Exception Occured @ OrderBook._add_to_queue(ASK, info_tuple)! {e}')
+                self.ask_queue.push(order, front)
             case _:
-                log.error(f'INVALID SIDE VALUE @ OrderBook._add_to_queue(side, info_tuple): {order.side}')
+                log.error(f'INVALID SIDE VALUE @ OrderBook._add_to_queue(order): {order.side}')
 
     def add_order(self, order: Order):
-        ''' Add a new order to the bid/ask queue and orderbook '''
+        ''' Add a new order to the bid/ask queue and orderbook [GTD orders are scheduled to expire] '''
         self.order_history[order.id] = order
         self._add_to_queue(order)
+        self._index_order(order)
+        if order.tif is TimeInForce.GTD and order.expire_tick is not None:
+            self.expiry.schedule(order.id, order.expire_tick)
+
+    def add_stop(self, order: Order):
+        ''' Park a STOP/STOP_LIMIT order in its side's trigger index until MatchMaker triggers it '''
+        self.order_history[order.id] = order
+        match order.side:
+            case OrderAction.BID:
+                self.buy_stops.add(order)
+            case OrderAction.ASK:
+                self.sell_stops.add(order)
+            case _:
+                log.error(f'INVALID SIDE VALUE @ OrderBook.add_stop(order): {order.side}')
+                return
+        self._index_order(order)
+
+    def activate_stop(self, order: Order) -> bool:
+        ''' Turn a triggered stop into its MARKET/LIMIT order with a new time priority\n
+        Returns: True if it became a MARKET order
+        '''
+        agent: Agent = self.agents[order.agent_id]
+        agent.active_bids.pop(order.id, None)
+        agent.active_asks.pop(order.id, None)
+        market = order.type is OrderType.STOP
+        order.type = OrderType.MARKET if market else OrderType.LIMIT
+        order.timestamp = self.get_seq()
+        return market
+
+    def pop_triggered_stops(self) -> list[Order]:
+        ''' Remove and return the pending stops current_price has reached (buy-stops first), nearest trigger first '''
+        if not self.buy_stops and not self.sell_stops:
+            return []
+        triggered = self.buy_stops.pop_triggered(self.current_price) + self.sell_stops.pop_triggered(self.current_price)
+        for order in triggered:
+            self._unindex_order(order)
+        return triggered
+
+    def _remove_resting(self, order: Order):
+        ''' Take an order out of the bid/ask queue or, for a pending stop, out of the trigger index '''
+        if order.type is OrderType.STOP or order.type is OrderType.STOP_LIMIT:
+            stops = self.buy_stops if order.side is OrderAction.BID else self.sell_stops
+            stops.remove(order.id)
+        else:
+            self._remove_from_queue(order.side, order.id)
 
     def _remove_from_queue(self, side: OrderAction, order_id):
         ''' Remove an order tuple from the bid/ask queue '''
         match side:
             case OrderAction.BID:
-                try:
-                    del self.bid_queue[order_id]
-                except KeyError:
-                    pass#log.error(f'INVALID KEY VALUE (Order ID does not exist to remove!): {order_id}')
+                self.bid_queue.remove(order_id)
             case OrderAction.ASK:
-                try:
-                    del self.ask_queue[order_id]
-                except KeyError:
-                    pass#log.error(f'INVALID KEY VALUE (Order ID does not exist to remove!): {order_id}')
+                self.ask_queue.remove(order_id)
             case _:
                 log.error(f'INVALID SIDE VALUE @ OrderBook._remove_from_queue(side, info_tuple, order_id): {side}')
 
@@ -166,7 +424,8 @@ class OrderBook:
         ''' Return an agent's assets to them after an order is canceled '''
         match order.side:
             case OrderAction.BID:
-                agent.update_cash(order.price * order.volume)
+                if order.type is not OrderType.STOP:     # Stop bids (market on trigger) don't reserve cash
+                    agent.update_cash(self.scale.value(order.price, order.volume))
                 del agent.active_bids[order.id]
                 agent.history[order.id] = order
                 self.upsert_agent(agent)
@@ -185,19 +444,109 @@ class OrderBook:
         order = self.order_history[order_id]
         order.status = OrderStatus.CANCELED
         self.order_history[order.id] = order
-        self._remove_from_queue(order.side, order.id)
+        self._remove_resting(order)
+        self._unindex_order(order)
         self._return_assets(order, agent)
+        self.record_closed(order)
+
+    def amend_order(self, order_id, price=None, volume=None) -> bool:
+        ''' Change a resting order's price and/or volume in place (same id, same Order, no history entry)\n
+        - Size-down at the same price keeps the order's time priority, any other change re-queues it with a new sequence number
+        - Only the reservation delta is settled: bids pay/get back the cash difference, asks reserve/return lots
+        - Crossing the opposite side is not matched here, use MatchMaker.amend for that
+        Returns: True if the order was amended
+        '''
+        order = self.order_history.get(order_id)
+        queue = self.bid_queue if order is not None and order.side is OrderAction.BID else self.ask_queue
+        if order is None or order_id not in queue:
+            log.error(f'ORDER IS NOT RESTING @ OrderBook.amend_order(order_id, price, volume): {order_id}')
+            return False
+        new_price = order.price if price is None else price
+        new_volume = order.volume if volume is None else volume
+        if new_price <= 0 or new_volume <= 0:
+            log.error(f'INVALID AMEND VALUES @ OrderBook.amend_order(order_id, price, volume): {price}, {volume}')
+            return False
+
+        agent: Agent = self.agents[order.agent_id]
+        delta_volume = new_volume - order.volume
+        match order.side:
+            case OrderAction.BID:
+                delta_cash = self.scale.value(new_price, new_volume) - self.scale.value(order.price, order.volume)
+                available = agent.cash
+                if self.settlement is not None:
+                    available += self.settlement.pending_cash(agent)
+                if delta_cash > available:
+                    log.error(f'NOT ENOUGH CASH @ OrderBook.amend_order(order_id, price, volume): {order_id}')
+                    return False
+                if delta_cash:
+                    agent.update_cash(-delta_cash)
+            case OrderAction.ASK:
+                if delta_volume > agent.get_total_shares():
+                    log.error(f'NOT ENOUGH SHARES @ OrderBook.amend_order(order_id, price, volume): {order_id}')
+                    return False
+                # Normalize to the lots still backing the open volume, then move only the difference
+                reserved = order.get_returnable_shares()
+                if delta_volume > 0:
+                    reserved += agent.remove_holdings(delta_volume)
+                elif delta_volume < 0:
+                    # Keep the lowest lots for the new volume, give the rest back
+                    kept, remaining = [], new_volume
+                    for lot_price, lot_volume in reserved:
+                        use = min(lot_volume, remaining)
+                        if use > 0:
+                            kept.append((lot_price, use))
+                        if lot_volume > use:
+                            agent.update_holdings(lot_price, lot_volume - use)
+                        remaining -= use
+                    reserved = kept
+                order.reserved_shares = reserved
+
+        order.entry_volume += delta_volume
+        if new_price == order.price and delta_volume <= 0:
+            if delta_volume:
+                queue.reduce(order_id, -delta_volume)
+        else:
+            queue.remove(order_id)
+            order.price = new_price
+            order.volume = new_volume
+            order.timestamp = self.get_seq()
+            queue.push(order)
+        return True
+
+    def crosses(self, order: Order) -> bool:
+        ''' True if a limit order's price reaches the opposite side's best price '''
+        if order.side is OrderAction.BID:
+            best = self.ask_queue.best_price()
+            return best is not None and order.price >= best
+        best = self.bid_queue.best_price()
+        return best is not None and order.price <= best
+
+    def pull_order(self, order: Order):
+        ''' Take a resting order out of the book without closing it or returning its assets (e.g. to re-match it) '''
+        self._remove_resting(order)
+        self._unindex_order(order)
+        agent = self.agents.get(order.agent_id)
+        if agent is not None:
+            agent.active_bids.pop(order.id, None)
+            agent.active_asks.pop(order.id, None)
 
     def fill_order(self, order: Order):
         ''' Order was filled, remove from queue, update status to CLOSED '''
         order.status = OrderStatus.CLOSED
         order.volume = 0
         self.order_history[order.id] = order
+        self._unindex_order(order)
+        self.record_closed(order)
 
     def partial_fill_order(self, order: Order, vol_filled: int):
-        ''' Order was partially filled, update volume, re-add it to queue '''
-        order.volume -= vol_filled
-        self.add_order(order)
+        ''' Order was partially filled, update volume in place or re-add it to the front of its price level (keeps time priority) '''
+        queue = self.bid_queue if order.side is OrderAction.BID else self.ask_queue
+        self.order_history[order.id] = order
+        if order.id in queue:
+            queue.reduce(order.id, vol_filled)
+        else:
+            order.volume -= vol_filled
+            self._add_to_queue(order, front=True)
 
     def _find_order_in_queue(self, order_id) -> tuple:
         ''' Get the Order Info tuple with matching order_id\n
@@ -209,12 +558,14 @@ class OrderBook:
         match order.side:
             case OrderAction.BID:
                 try:
-                    matched = self.ask_queue[order_id]
+                    o = self.bid_queue[order_id]
+                    matched = (o.price, o.timestamp, o.volume, o.id)
                 except KeyError:
                     log.error(f'INVALID KEY VALUE (Order ID does not exist to find!): {order_id}')
             case OrderAction.ASK:
                 try:
-                    matched = self.ask_queue[order_id]
+                    o = self.ask_queue[order_id]
+                    matched = (o.price, o.timestamp, o.volume, o.id)
                 except KeyError:
                     log.error(f'INVALID KEY VALUE (Order ID does not exist to find!): {order_id}')
             case _:
@@ -255,36 +606,140 @@ class OrderBook:
             }
         ]
         '''
+        # Price levels come from the incrementally maintained L2 view
+        asks, bids = self.get_depth(depth)
+
+        now = self.sim_time if self.sim_time is not None else time()
         ob_snapshot = [
             {
                 'symbol_id': self.SYMBOL_ID,
-                'time_exchange': time(),
-                'time_coinapi': time(),
-                'current_price': self.current_price,
-                'asks': [],
-                'bids': []
+                'time_exchange': now,
+                'time_coinapi': now,
+                'current_price': self.scale.from_ticks(self.current_price),
+                'asks': asks,
+                'bids': bids
             }
         ]
-        
-        # Peek best n orders in ask and bid
-        asks = self.peek_best(OrderAction.ASK, n=depth)
-        bids = self.peek_best(OrderAction.BID, n=depth)
-
-        # Add order info to snapshot
-        for order in asks:
-            ob_snapshot[0]['asks'].append(
-                {
-                    'price': order[0],
-                    'size': order[2]
-                }
-            )
-        for order in bids:
-            ob_snapshot[0]['bids'].append(
-                {
-                    'price': order[0],
-                    'size': order[2]
-                }
-            )
 
         return ob_snapshot
-                
\ No newline at end of file
+
+    def get_depth(self, depth=10):
+        ''' Aggregated L2 view of the best depth levels per side, reused until the book changes\n
+        Returns: (asks, bids) -> [{'price': float price, 'size': total volume}, ...] (treat as read-only)
+        '''
+        version = self.version
+        cached = self._depth_cache.get(depth)
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+
+        from_ticks = self.scale.from_ticks
+        asks = [{'price': from_ticks(price), 'size': size} for price, size in self.ask_queue.depth(depth)]
+        bids = [{'price': from_ticks(price), 'size': size} for price, size in self.bid_queue.depth(depth)]
+        self._depth_cache[depth] = (version, asks, bids)
+        return asks, bids
+
+    def _opposite_queue(self, side: OrderAction) -> PriceLevelQueue:
+        ''' The queue an incoming order of this side would trade against '''
+        return self.ask_queue if side is OrderAction.BID else self.bid_queue
+
+    def get_mid_price(self):
+        ''' Midpoint of the best bid and ask [current_price if either side is empty] '''
+        best_bid = self.bid_queue.best_price()
+        best_ask = self.ask_queue.best_price()
+        if best_bid is None or best_ask is None:
+            return self.current_price
+        return (best_bid + best_ask) / 2
+
+    def get_fill_cost(self, side: OrderAction, volume: int) -> tuple:
+        ''' What a market order of this side for volume shares would trade, without touching the book\n
+        O(log levels) while the opposite side is unchanged, the first query after a change rebuilds its prefix sums in O(levels)
+        Returns: (volume that would fill, total cash value of those fills)
+        '''
+        prices, cum_volume, cum_value = self._opposite_queue(side).cumulative()
+        if len(prices) == 0 or volume <= 0:
+            return 0, 0
+        i = int(np.searchsorted(cum_volume, volume, side='left'))
+        if i == len(prices):
+            filled, cost = int(cum_volume[-1]), cum_value[-1]
+        else:
+            before_volume = int(cum_volume[i - 1]) if i > 0 else 0
+            before_value = cum_value[i - 1] if i > 0 else 0
+            filled, cost = volume, before_value + prices[i] * (volume - before_volume)
+        if self.scale.fixed_point:
+            return filled, int(cost)
+        return filled, round(float(cost), Util.ROUND_NDIGITS)
+
+    def get_sweep_price(self, side: OrderAction, volume: int):
+        ''' Price of the last level a market order of this side for volume shares would reach\n
+        O(log levels) while the opposite side is unchanged, the first query after a change rebuilds its prefix sums in O(levels)
+        Returns: level price (the deepest level if the side runs out first), None if the side is empty
+        '''
+        prices, cum_volume, _ = self._opposite_queue(side).cumulative()
+        if len(prices) == 0:
+            return None
+        i = min(int(np.searchsorted(cum_volume, max(volume, 1), side='left')), len(prices) - 1)
+        return prices[i].item()
+
+    def get_volume_within(self, side: OrderAction, pct: float) -> int:
+        ''' Shares an incoming order of this side could reach within pct (e.g. 0.01 = 1%) of the mid price\n
+        O(log levels) while the opposite side is unchanged, the first query after a change rebuilds its prefix sums in O(levels)
+        '''
+        queue = self._opposite_queue(side)
+        prices, cum_volume, _ = queue.cumulative()
+        if len(prices) == 0:
+            return 0
+        mid = self.get_mid_price()
+        limit = mid * (1 + pct) if side is OrderAction.BID else mid * (1 - pct)
+        i = queue.levels_within(limit)
+        return int(cum_volume[i - 1]) if i > 0 else 0
+
+    def get_indicators(self, depth=10) -> dict:
+        ''' Microstructure indicators of the book, reused until the book changes (treat as read-only)\n
+        Best levels and per-side totals are O(1) reads of the queues, the top-depth values cost O(depth) once per book version
+        - best_bid_price, best_bid_vol, best_ask_price, best_ask_vol -> Best levels [0 if the side is empty]
+        - spread, mid_price -> Best ask - best bid and their midpoint [0.0 / current_price if either side is empty]
+        - microprice -> Best prices weighted by the opposite side's best volume [mid_price if either side is empty]
+        - imbalance -> (bid vol - ask vol) / (bid vol + ask vol) over the best depth levels, in [-1, 1]
+        - bid_volume, ask_volume -> Total resting volume per side
+        - bid_levels, ask_levels -> Price levels per side within depth
+        - largest_bid_price/vol/position, largest_ask_price/vol/position -> Biggest level within depth and its index from the best
+        '''
+        version = self.version
+        cached = self._indicator_cache.get(depth)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        from_ticks = self.scale.from_ticks
+        indicators = {}
+        top = {}
+        for name, queue in (('bid', self.bid_queue), ('ask', self.ask_queue)):
+            levels = queue.depth(depth)
+            top[name] = sum(size for _, size in levels)
+            best_price, best_vol = levels[0] if levels else (0, 0)
+            largest_position, largest_price, largest_vol = 0, 0, 0
+            for position, (price, size) in enumerate(levels):
+                if size > largest_vol:
+                    largest_position, largest_price, largest_vol = position, price, size
+            indicators[f'best_{name}_price'] = from_ticks(best_price)
+            indicators[f'best_{name}_vol'] = best_vol
+            indicators[f'{name}_volume'] = queue.total_volume
+            indicators[f'{name}_levels'] = len(levels)
+            indicators[f'largest_{name}_price'] = from_ticks(largest_price)
+            indicators[f'largest_{name}_vol'] = largest_vol
+            indicators[f'largest_{name}_position'] = largest_position
+
+        best_bid, best_ask = self.bid_queue.best_price(), self.ask_queue.best_price()
+        if best_bid is not None and best_ask is not None:
+            bid_vol, ask_vol = indicators['best_bid_vol'], indicators['best_ask_vol']
+            indicators['spread'] = round(from_ticks(best_ask - best_bid), Util.ROUND_NDIGITS)
+            indicators['mid_price'] = round(from_ticks(best_bid + best_ask) / 2, Util.ROUND_NDIGITS)
+            indicators['microprice'] = round(from_ticks(best_bid * ask_vol + best_ask * bid_vol) / (bid_vol + ask_vol), Util.ROUND_NDIGITS)
+        else:
+            indicators['spread'] = 0.0
+            indicators['mid_price'] = from_ticks(self.current_price)
+            indicators['microprice'] = indicators['mid_price']
+        total_top = top['bid'] + top['ask']
+        indicators['imbalance'] = (top['bid'] - top['ask']) / total_top if total_top > 0 else 0.0
+
+        self._indicator_cache[depth] = (version, indicators)
+        return indicators
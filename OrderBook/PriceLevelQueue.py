@@ -0,0 +1,170 @@
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from itertools import islice
+
+import numpy as np
+
+from Order.Order import Order
+from Order.OrderAction import OrderAction
+
+
+class PriceLevelQueue:
+    '''
+    One side of the order book kept as sorted price levels with a FIFO queue of orders at each level
+    - side -> OrderAction.BID or OrderAction.ASK
+    - fixed_point -> True if prices are integer ticks (the book's scale.fixed_point), sets the dtype of cumulative()
+    - levels -> {price: OrderedDict{order_id: Order}} [insertion order is time priority]
+    - keys -> Sorted level keys with the best level last [price for bids, -price for asks]
+    - locations -> {order_id: price} so an order can be found/cancelled without a scan
+    - sizes -> {price: total volume} aggregated L2 view, kept up to date on every add, fill and cancel
+    - total_volume -> Resting volume over all levels, kept up to date the same way
+    - version -> Incremented on every change to this side, used to tag cached views
+    - cumulative() -> Prefix sums of volume/value over the levels (best first), rebuilt lazily in O(levels) once per version
+
+    Best order/price is O(1), adding a new price level is O(log levels), cancel by id is O(1)
+    (plus O(log levels) when it empties a level)
+    '''
+    def __init__(self, side: OrderAction, fixed_point=False):
+        self.side = side
+        self.fixed_point = fixed_point
+        self.levels: dict[float, OrderedDict] = {}
+        self.keys: list[float] = []
+        self.locations: dict[str, float] = {}
+        self.sizes: dict[float, int] = {}
+        self.total_volume = 0
+        self.version = 0
+        self._sign = 1 if side is OrderAction.BID else -1
+        self._cumulative = None
+
+    def __len__(self):
+        return len(self.locations)
+
+    def __contains__(self, order_id):
+        return order_id in self.locations
+
+    def __getitem__(self, order_id) -> Order:
+        return self.levels[self.locations[order_id]][order_id]
+
+    def clear(self):
+        self.levels.clear()
+        self.keys.clear()
+        self.locations.clear()
+        self.sizes.clear()
+        self.total_volume = 0
+        self.version += 1
+
+    def best_price(self):
+        ''' Price of the best level or None if this side is empty '''
+        if not self.keys:
+            return None
+        return self._sign * self.keys[-1]
+
+    def push(self, order: Order, front=False):
+        ''' Add an order to the back of its price level [front=True -> keep its time priority, used for partial fills] '''
+        if order.id in self.locations:
+            self.remove(order.id)
+
+        level = self.levels.get(order.price)
+        if level is None:
+            level = OrderedDict()
+            self.levels[order.price] = level
+            self.sizes[order.price] = 0
+            insort(self.keys, self._sign * order.price)
+
+        level[order.id] = order
+        if front:
+            level.move_to_end(order.id, last=False)
+        self.locations[order.id] = order.price
+        self.sizes[order.price] += order.volume
+        self.total_volume += order.volume
+        self.version += 1
+
+    def peek_order(self) -> Order:
+        ''' Best order without removing it [None if empty] '''
+        if not self.keys:
+            return None
+        level = self.levels[self._sign * self.keys[-1]]
+        return next(iter(level.values()))
+
+    def pop_order(self) -> Order:
+        ''' Remove and return the best order [None if empty] '''
+        if not self.keys:
+            return None
+        price = self._sign * self.keys[-1]
+        level = self.levels[price]
+        order_id, order = level.popitem(last=False)
+        del self.locations[order_id]
+        self.sizes[price] -= order.volume
+        self.total_volume -= order.volume
+        if not level:
+            del self.levels[price]
+            del self.sizes[price]
+            self.keys.pop()
+        self.version += 1
+        return order
+
+    def remove(self, order_id) -> Order:
+        ''' Remove an order by id and return it [None if it is not in the queue] '''
+        price = self.locations.pop(order_id, None)
+        if price is None:
+            return None
+        level = self.levels[price]
+        order = level.pop(order_id)
+        self.sizes[price] -= order.volume
+        self.total_volume -= order.volume
+        if not level:
+            del self.levels[price]
+            del self.sizes[price]
+            del self.keys[bisect_left(self.keys, self._sign * price)]
+        self.version += 1
+        return order
+
+    def reduce(self, order_id, volume) -> Order:
+        ''' Take volume off a resting order in place (keeps its time priority) and return it '''
+        order = self[order_id]
+        order.volume -= volume
+        self.sizes[order.price] -= volume
+        self.total_volume -= volume
+        self.version += 1
+        return order
+
+    def iter_orders(self):
+        ''' Yield resting orders in priority order (best price first, then time) '''
+        for key in reversed(self.keys):
+            yield from self.levels[self._sign * key].values()
+
+    def iter_levels(self):
+        ''' Yield (price, OrderedDict{order_id: Order}) for each level, best price first '''
+        for key in reversed(self.keys):
+            price = self._sign * key
+            yield price, self.levels[price]
+
+    def peek(self, n=1) -> list[Order]:
+        ''' Best n orders in priority order without removing them '''
+        return list(islice(self.iter_orders(), n))
+
+    def depth(self, n=10) -> list[tuple[float, int]]:
+        ''' Best n price levels as [(price, total volume), ...] '''
+        sign = self._sign
+        sizes = self.sizes
+        return [(sign * key, sizes[sign * key]) for key in reversed(self.keys[-n:])] if n > 0 else []
+
+    def levels_within(self, limit) -> int:
+        ''' Number of levels (from the best) priced at or better than limit [bids >= limit, asks <= limit] '''
+        return len(self.keys) - bisect_left(self.keys, self._sign * limit)
+
+    def cumulative(self):
+        ''' Level prices (best first) with running totals, cached until this side changes\n
+        Returns: (prices, cum_volume, cum_value) NumPy arrays [cum_value[i] = sum(price * volume) of levels 0..i]
+        '''
+        cached = self._cumulative
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        sign = self._sign
+        keys = self.keys
+        dtype = np.int64 if self.fixed_point else np.float64     # Fixed-point ticks stay exact
+        prices = np.fromiter((sign * key for key in reversed(keys)), dtype=dtype, count=len(keys))
+        volumes = np.fromiter((self.sizes[sign * key] for key in reversed(keys)), dtype=np.int64, count=len(keys))
+        result = (prices, np.cumsum(volumes), np.cumsum(prices * volumes))
+        self._cumulative = (self.version, result)
+        return result
@@ -0,0 +1,35 @@
+import numpy as np
+
+from OrderBook.AllocationPolicy import AllocationPolicy
+
+
+class ProRataAllocation(AllocationPolicy):
+    ''' Pro-rata: every order at a level gets a share of the incoming volume proportional to its own volume
+
+    - min_allocation -> Pro-rata shares are rounded down and shares below this many shares are dropped to 0,
+      whatever that leaves over fills the orders' remaining room in time priority
+
+    One pass of NumPy over the level, no per-order loop.
+    '''
+    time_priority = False
+
+    def __init__(self, min_allocation: int = 1):
+        self.min_allocation = max(int(min_allocation), 1)
+
+    def allocate(self, volumes: np.ndarray, total: int) -> np.ndarray:
+        level_volume = int(volumes.sum())
+        if level_volume <= 0 or total <= 0:
+            return np.zeros(len(volumes), dtype=np.int64)
+        shares = volumes * total // level_volume
+        if self.min_allocation > 1:
+            shares[shares < self.min_allocation] = 0
+        leftover = total - int(shares.sum())
+        if leftover == 0:
+            return shares
+
+        # Leftovers from rounding fill the remaining room in time priority
+        room = volumes - shares
+        ahead = np.cumsum(room)
+        ahead -= room
+        shares += np.minimum(room, np.maximum(leftover - ahead, 0))
+        return shares
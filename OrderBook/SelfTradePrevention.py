@@ -0,0 +1,7 @@
+from enum import Enum
+
+class SelfTradePrevention(Enum):
+    NONE = 0                # Agents may trade with themselves
+    SKIP = 1                # Walk past the agent's own resting orders and leave them in the book
+    CANCEL_RESTING = 2      # Cancel the agent's own resting orders that would have matched
+    CANCEL_INCOMING = 3     # Stop matching and cancel what is left of the incoming order
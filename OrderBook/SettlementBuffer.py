@@ -0,0 +1,53 @@
+from Agent.Agent import Agent
+
+
+class SettlementBuffer:
+    ''' Nets the cash/holdings side of fills during a tick and applies it once per agent at settle()
+
+    - cash -> {agent: net cash change}
+    - shares -> {(agent, price): net volume change}
+    - debits -> {agent: unsettled cash spent this tick}, so affordability checks see money already committed
+    - fills -> Number of queued changes since the last settle()
+    '''
+    def __init__(self):
+        self.cash: dict[Agent, float] = {}
+        self.shares: dict[tuple[Agent, float], int] = {}
+        self.debits: dict[Agent, float] = {}
+        self.fills = 0
+
+    def __len__(self):
+        return self.fills
+
+    def add_cash(self, agent: Agent, amt):
+        ''' Queue a cash change [same call shape as Agent.pay(agent, amt)] '''
+        cash = self.cash
+        cash[agent] = cash.get(agent, 0) + amt
+        if amt < 0:
+            self.debits[agent] = self.debits.get(agent, 0) + amt
+        self.fills += 1
+
+    def add_shares(self, agent: Agent, price, volume):
+        ''' Queue a holdings change [same call shape as Agent.deliver(agent, price, volume)] '''
+        key = (agent, price)
+        shares = self.shares
+        shares[key] = shares.get(key, 0) + volume
+        self.fills += 1
+
+    def pending_cash(self, agent: Agent):
+        ''' Unsettled cash the agent has already spent this tick (<= 0) '''
+        return self.debits.get(agent, 0)
+
+    def settle(self):
+        ''' Apply each agent's net changes (one cash rounding per agent instead of one per fill), then clear the buffer '''
+        for agent, amt in self.cash.items():
+            if amt:
+                agent.update_cash(amt)
+        for (agent, price), volume in self.shares.items():
+            agent.update_holdings(price, volume)
+        self.clear()
+
+    def clear(self):
+        self.cash.clear()
+        self.shares.clear()
+        self.debits.clear()
+        self.fills = 0
@@ -0,0 +1,75 @@
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from Order.Order import Order
+from Order.OrderAction import OrderAction
+
+
+class StopIndex:
+    '''
+    Pending stop/stop-limit orders of one side kept sorted by stop_price
+    - side -> OrderAction.BID (buy-stops, trigger when price >= stop_price) or OrderAction.ASK (sell-stops, trigger when price <= stop_price)
+    - levels -> {stop_price: OrderedDict{order_id: Order}} [insertion order breaks ties between equal triggers]
+    - keys -> Sorted level keys with the nearest trigger last [-stop_price for buy-stops, stop_price for sell-stops]
+    - locations -> {order_id: stop_price}
+
+    Checking a trade price is O(log levels) plus O(k) in the stops it triggers, add/cancel are O(1) + O(log levels)
+    '''
+    def __init__(self, side: OrderAction):
+        self.side = side
+        self.levels: dict[float, OrderedDict] = {}
+        self.keys: list[float] = []
+        self.locations: dict[str, float] = {}
+        self._sign = -1 if side is OrderAction.BID else 1
+
+    def __len__(self):
+        return len(self.locations)
+
+    def __contains__(self, order_id):
+        return order_id in self.locations
+
+    def clear(self):
+        self.levels.clear()
+        self.keys.clear()
+        self.locations.clear()
+
+    def next_trigger(self):
+        ''' stop_price of the nearest pending trigger or None '''
+        if not self.keys:
+            return None
+        return self._sign * self.keys[-1]
+
+    def add(self, order: Order):
+        level = self.levels.get(order.stop_price)
+        if level is None:
+            level = self.levels[order.stop_price] = OrderedDict()
+            insort(self.keys, self._sign * order.stop_price)
+        level[order.id] = order
+        self.locations[order.id] = order.stop_price
+
+    def remove(self, order_id) -> Order:
+        ''' Remove a pending stop by id and return it [None if it is not pending] '''
+        stop_price = self.locations.pop(order_id, None)
+        if stop_price is None:
+            return None
+        level = self.levels[stop_price]
+        order = level.pop(order_id)
+        if not level:
+            del self.levels[stop_price]
+            del self.keys[bisect_left(self.keys, self._sign * stop_price)]
+        return order
+
+    def pop_triggered(self, price) -> list[Order]:
+        ''' Remove and return every stop the trade price reached, nearest trigger first '''
+        keys = self.keys
+        start = bisect_left(keys, self._sign * price)
+        if start == len(keys):
+            return []
+        triggered = []
+        for key in reversed(keys[start:]):
+            level = self.levels.pop(self._sign * key)
+            for order_id, order in level.items():
+                del self.locations[order_id]
+                triggered.append(order)
+        del keys[start:]
+        return triggered
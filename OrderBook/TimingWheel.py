@@ -0,0 +1,68 @@
+class TimingWheel:
+    ''' Hierarchical timing wheel: schedule items for a future tick, collect them when the tick comes
+
+    - slots -> Buckets per wheel, wheel level L covers slots ** (L + 1) ticks
+    - levels -> Number of wheels, items further out than slots ** levels ticks wait in overflow
+    - now -> Last tick advanced to
+
+    schedule() is O(1). advance() costs O(1) per tick plus O(due items), an item is moved down at most once per level.
+    Items are never removed early: callers check whether a due item still applies (lazy cancel).
+    '''
+    def __init__(self, slots=64, levels=4, now=0):
+        self.slots = slots
+        self.levels = levels
+        self.now = now
+        self.wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.overflow: list[tuple[int, object]] = []
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def schedule(self, item, tick: int):
+        ''' Fire item when the wheel reaches tick [ticks that already passed fire on the next advance] '''
+        self._place(max(tick, self.now + 1), item)
+        self.size += 1
+
+    def _place(self, tick, item):
+        delta = tick - self.now
+        span = self.slots
+        for level in range(self.levels):
+            if delta < span:
+                self.wheels[level][(tick * self.slots // span) % self.slots].append((tick, item))
+                return
+            span *= self.slots
+        self.overflow.append((tick, item))
+
+    def advance(self, to_tick: int) -> list:
+        ''' Move time forward to to_tick and return every item that came due, in tick order '''
+        due = []
+        slots = self.slots
+        while self.now < to_tick:
+            self.now += 1
+            now = self.now
+
+            # Cascade higher wheels whose bucket starts at this tick down to finer ones
+            span = slots
+            for level in range(1, self.levels):
+                if now % span:
+                    break
+                index = (now // span) % slots
+                bucket = self.wheels[level][index]
+                if bucket:
+                    self.wheels[level][index] = []
+                    for tick, item in bucket:
+                        self._place(tick, item)
+                span *= slots
+            else:
+                if self.overflow and now % span == 0:
+                    overflow, self.overflow = self.overflow, []
+                    for tick, item in overflow:
+                        self._place(tick, item)
+
+            bucket = self.wheels[0][now % slots]
+            if bucket:
+                self.wheels[0][now % slots] = []
+                due.extend(item for _, item in bucket)
+        self.size -= len(due)
+        return due
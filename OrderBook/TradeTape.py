@@ -0,0 +1,122 @@
+import numpy as np
+
+
+class TradeTape:
+    ''' Append-only record of every fill, stored as growable NumPy columns
+
+    - seq -> Logical sequence number of the fill (from the book's clock)
+    - price, qty -> Fill price (book units) and volume
+    - side -> Aggressor side: 1 = buyer-initiated (incoming bid), -1 = seller-initiated (incoming ask)
+    - buyer, seller, resting -> Agent/order id codes [int ids are stored as is, other ids are interned, see decode()]
+    - size -> Number of recorded fills, columns are views of the first size rows
+    '''
+    COLUMNS = ('seq', 'price', 'qty', 'side', 'buyer', 'seller', 'resting')
+
+    def __init__(self, fixed_point=False, capacity=1024):
+        self.dtypes = {
+            'seq': np.int64,
+            'price': np.int64 if fixed_point else np.float64,
+            'qty': np.int64,
+            'side': np.int8,
+            'buyer': np.int64,
+            'seller': np.int64,
+            'resting': np.int64,
+        }
+        self.size = 0
+        self._cols = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.dtypes.items()}
+        self._codes: dict = {}
+        self._names: list = []
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, name):
+        ''' Zero-copy view of one column '''
+        return self._cols[name][:self.size]
+
+    def _code(self, id_value):
+        ''' Int ids are their own code, anything else is interned to a negative code '''
+        if type(id_value) is int:
+            return id_value
+        code = self._codes.get(id_value)
+        if code is None:
+            self._names.append(id_value)
+            code = self._codes[id_value] = -len(self._names)
+        return code
+
+    def decode(self, code):
+        ''' Column code -> original agent/order id '''
+        code = int(code)
+        return self._names[-code - 1] if code < 0 else code
+
+    def _reserve(self, n):
+        ''' Make room for n more rows [capacity doubles so appends stay amortized O(1)] '''
+        needed = self.size + n
+        capacity = len(self._cols['seq'])
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, col in self._cols.items():
+            grown = np.empty(capacity, dtype=col.dtype)
+            grown[:self.size] = col[:self.size]
+            self._cols[name] = grown
+
+    def extend(self, first_seq, prices: list, qtys: list, side: int, buyers: list, sellers: list, resting: list):
+        ''' Record the fills of one incoming order in one block (seqs first_seq, first_seq + 1, ...) '''
+        n = len(prices)
+        if n == 0:
+            return
+        self._reserve(n)
+        start, stop = self.size, self.size + n
+        code = self._code
+        cols = self._cols
+        cols['seq'][start:stop] = np.arange(first_seq, first_seq + n)
+        cols['price'][start:stop] = prices
+        cols['qty'][start:stop] = qtys
+        cols['side'][start:stop] = side
+        cols['buyer'][start:stop] = [code(agent_id) for agent_id in buyers]
+        cols['seller'][start:stop] = [code(agent_id) for agent_id in sellers]
+        cols['resting'][start:stop] = [code(order_id) for order_id in resting]
+        self.size = stop
+
+    def slice(self, start=0, stop=None):
+        ''' Zero-copy views of every column for rows [start, stop) '''
+        stop = self.size if stop is None else min(stop, self.size)
+        return {name: col[start:stop] for name, col in self._cols.items()}
+
+    def since(self, seq):
+        ''' Zero-copy views of every fill with seq >= seq [seqs only increase, so this is a binary search] '''
+        return self.slice(int(np.searchsorted(self['seq'], seq, side='left')))
+
+    def vwap(self, start=0, stop=None):
+        ''' Volume weighted average fill price of rows [start, stop) [None if there were no fills] '''
+        rows = self.slice(start, stop)
+        qty = rows['qty']
+        total = qty.sum()
+        if total == 0:
+            return None
+        return float(np.dot(rows['price'], qty) / total)
+
+    def last(self, n):
+        ''' Zero-copy views of the last n fills '''
+        return self.slice(max(self.size - n, 0))
+
+    def flush(self, path):
+        ''' Write the tape to a memory-mapped .npy file (one structured record per fill) and return the memmap '''
+        dtype = np.dtype([(name, self.dtypes[name]) for name in self.COLUMNS])
+        mm = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(self.size,))
+        for name in self.COLUMNS:
+            mm[name] = self[name]
+        mm.flush()
+        return mm
+
+    @staticmethod
+    def load(path):
+        ''' Read-only memmap of a flushed tape '''
+        return np.load(path, mmap_mode='r')
+
+    def clear(self):
+        self.size = 0
+        self._codes.clear()
+        self._names.clear()
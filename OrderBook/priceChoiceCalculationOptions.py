@@ -1,14 +1,16 @@
 import numpy as np
-from numpy.random import pareto
 import matplotlib.pyplot as plt
-from scipy.stats import beta, truncnorm
+from functools import lru_cache
 from math import pi, sin, log10
+from Util.RandomVariates import RandomVariates
+
+variates = RandomVariates()  # Buffered draws, same distributions as the per-call numpy/scipy versions
 
 def generate_price(current_price, volatility=0.01, drift=0.01):
     ''' Generates a normal distribution with a drift% away from the current price then clips anything outside acceptable range back to current price
         Dosen't really work since the clipping causes unnatural biases right next to the current price
     '''
-    log_return = np.random.normal(loc=drift, scale=volatility)
+    log_return = variates.normal(drift, volatility)
     price = current_price * np.exp(log_return)
     if drift < 0:
         price = np.clip(price, 0, current_price)
@@ -22,11 +24,11 @@ def exponential_price(current_price, side, A=0.05, lam=5):
     '''
     match side:
         case 'BID':
-            x = np.random.rand()
+            x = variates.uniform()
             offset = A * (1 - np.exp(lam * x))
             return current_price * (1 + offset)
         case 'ASK':
-            x = np.random.rand()
+            x = variates.uniform()
             offset = A * (1 - np.exp(lam * x))
             return current_price * (1 - offset)
 
@@ -36,13 +38,14 @@ def pareto_price(current_price, side, shape=5, scale=0.01):
     '''
     match side:
         case 'BID':
-            offset = pareto(shape) * scale
+            offset = variates.pareto(shape) * scale
             return current_price / (1 + offset)
         case 'ASK':
-            offset = pareto(shape) * scale  # scale adjusts closeness
+            offset = variates.pareto(shape) * scale  # scale adjusts closeness
             return current_price * (1 + offset)
 
 #######################################################################################################
+@lru_cache(maxsize=65536)   # Same caching as Agent._get_max_variance, the curve only depends on the price and its parameters
 def get_max_variance(price, scale=0.1, decay_rate=0.25, amplitude=0.1, frequency=pi*2):
     '''
     Get the max variance in price (how much the computed price will differ from passed price)
@@ -78,11 +81,11 @@ def beta_price(current_price, side, a=2, b=5):
     epsilon = 0.000001  # Min possible price
     match side:
         case 'BID':
-            x = beta.rvs(a, b)
+            x = variates.beta(a, b)
             discount = x * max_variance
             return max(current_price * (1 - discount), epsilon)
         case 'ASK':
-            x = beta.rvs(a, b)
+            x = variates.beta(a, b)
             premium = x * max_variance
             return current_price * (1 + premium)
 
@@ -95,11 +98,11 @@ def soft_limit_buy_price(current_price, side, alpha=0.02, steepness=7):
     '''
     match side:
         case 'BID':
-            x = np.random.rand()
+            x = variates.uniform()
             offset = alpha / (1 + np.exp(steepness * x))
             return current_price * (1 - offset)
         case 'ASK':
-            x = np.random.rand()
+            x = variates.uniform()
             offset = alpha / (1 + np.exp(steepness * x))
             return current_price * (1 + offset)
 
@@ -112,12 +115,12 @@ def log_uniform_price(current_price, side, min_pct=0.001, max_pct=0.05):
         case 'BID':
             low = np.log(1 - max_pct)
             high = np.log(1 - min_pct)
-            offset = np.exp(np.random.uniform(low, high))
+            offset = np.exp(variates.uniform(low, high))
             return current_price * offset
         case 'ASK':
             low = np.log(1 + min_pct)
             high = np.log(1 + max_pct)
-            offset = np.exp(np.random.uniform(low, high))
+            offset = np.exp(variates.uniform(low, high))
             return current_price * offset
 
  
@@ -128,25 +131,24 @@ def truncated_price(current_price, side, volatility=0.001):
     match side:
         case 'BID':
             # mean = 0, std = volatility, but only take NEGATIVE log-returns
-            a, b = -np.inf, 0
-            log_return = truncnorm.rvs(a, b, loc=0, scale=volatility)
+            log_return = -variates.half_normal(volatility)
             return current_price * np.exp(log_return)
         case 'ASK':
-            a, b = 0, np.inf
-            log_return = truncnorm.rvs(a, b, loc=0, scale=volatility)
+            log_return = variates.half_normal(volatility)
             return current_price * np.exp(log_return)
 
 
-current_price = 1.00
+if __name__ == '__main__':
+    current_price = 1.00
 
-buy_prices = [beta_price(current_price, 'BID') for _ in range(10000)]
-sell_prices = [beta_price(current_price, 'ASK') for _ in range(10000)]
+    buy_prices = [beta_price(current_price, 'BID') for _ in range(10000)]
+    sell_prices = [beta_price(current_price, 'ASK') for _ in range(10000)]
 
-plt.hist(buy_prices, bins=1000, alpha=0.5, label='Buy Orders')
-plt.hist(sell_prices, bins=1000, alpha=0.5, label='Sell Orders')
-plt.axvline(current_price, color='black', linestyle='--', label='Current Price')
-plt.legend()
-plt.title("Buy vs Sell Order Price Distribution")
-plt.xlabel("Price")
-plt.ylabel("Frequency")
-plt.show()
\ No newline at end of file
+    plt.hist(buy_prices, bins=1000, alpha=0.5, label='Buy Orders')
+    plt.hist(sell_prices, bins=1000, alpha=0.5, label='Sell Orders')
+    plt.axvline(current_price, color='black', linestyle='--', label='Current Price')
+    plt.legend()
+    plt.title("Buy vs Sell Order Price Distribution")
+    plt.xlabel("Price")
+    plt.ylabel("Frequency")
+    plt.show()
@@ -0,0 +1,55 @@
+import numpy as np
+from Util.Util import Util
+
+class PriceScale:
+    ''' Converts prices and cash between floats and the order book's internal representation
+
+    - tick_size -> None keeps float prices/cash (rounded to Util.ROUND_NDIGITS)
+    - tick_size -> float turns on fixed-point mode: prices are integer ticks and cash is integer minor units of one tick,
+      so price * volume is already in cash units and never needs rounding
+    '''
+    def __init__(self, tick_size: float = None):
+        self.tick_size = tick_size
+        self.fixed_point = tick_size is not None
+
+    def to_ticks(self, price: float):
+        ''' Float price -> internal price [fixed-point prices are at least 1 tick] '''
+        if self.fixed_point:
+            return max(int(round(price / self.tick_size)), 1)
+        return round(price, Util.ROUND_NDIGITS)
+
+    def to_ticks_array(self, prices: np.ndarray) -> np.ndarray:
+        ''' to_ticks for a NumPy array of float prices '''
+        if self.fixed_point:
+            return np.maximum(np.rint(prices / self.tick_size), 1).astype(np.int64)
+        return np.round(prices, Util.ROUND_NDIGITS)
+
+    def from_ticks(self, ticks):
+        ''' Internal price -> float price '''
+        if self.fixed_point:
+            return round(ticks * self.tick_size, Util.ROUND_NDIGITS)
+        return ticks
+
+    def to_units(self, cash: float):
+        ''' Float cash -> internal cash '''
+        if self.fixed_point:
+            return int(round(cash / self.tick_size))
+        return round(cash, Util.ROUND_NDIGITS)
+
+    def from_units(self, units):
+        ''' Internal cash -> float cash '''
+        if self.fixed_point:
+            return round(units * self.tick_size, Util.ROUND_NDIGITS)
+        return units
+
+    def value(self, price, volume):
+        ''' Cash value of volume shares at an internal price '''
+        if self.fixed_point:
+            return price * volume
+        return round(price * volume, Util.ROUND_NDIGITS)
+
+    def value_array(self, prices: np.ndarray, volumes: np.ndarray) -> np.ndarray:
+        ''' value for NumPy arrays of internal prices and volumes '''
+        if self.fixed_point:
+            return prices * volumes
+        return np.round(prices * volumes, Util.ROUND_NDIGITS)
@@ -0,0 +1,55 @@
+import numpy as np
+
+
+class RandomVariates:
+    ''' Hands out random variates one at a time from NumPy blocks drawn ahead of time
+
+    - block_size -> Variates drawn per refill of one buffer
+    - rng -> numpy Generator every block is drawn from [seed it for replayable runs]
+    - _buffers -> {(distribution, *params): [variate, ...]} a buffer per distribution and parameter set, popped from the end
+
+    Each variate costs a list pop instead of a scipy/NumPy call, the distributions are the same as the per-call versions:
+    - beta(a, b) -> scipy.stats.beta.rvs(a, b)
+    - pareto(shape) -> numpy.random.pareto(shape) (Lomax / Pareto II)
+    - exponential(scale) -> numpy.random.exponential(scale)
+    - normal(loc, scale) -> numpy.random.normal(loc, scale)
+    - half_normal(scale) -> scipy.stats.truncnorm.rvs(0, inf, loc=0, scale=scale) [negate it for the (-inf, 0) side]
+    - uniform(low, high) -> numpy.random.uniform(low, high) / numpy.random.rand()
+    '''
+    def __init__(self, block_size=4096, seed=None):
+        self.block_size = block_size
+        self.rng = np.random.default_rng(seed)
+        self._buffers: dict[tuple, list[float]] = {}
+
+    def seed(self, seed=None):
+        ''' Restart from a new generator and drop every buffered variate '''
+        self.rng = np.random.default_rng(seed)
+        self._buffers.clear()
+
+    def _draw(self, key, sampler, *args) -> float:
+        ''' Pop one variate from key's buffer, refilling it with sampler(*args, block_size) when empty '''
+        buffer = self._buffers.get(key)
+        if not buffer:
+            buffer = self._buffers[key] = sampler(*args, self.block_size).tolist()
+        return buffer.pop()
+
+    def _half_normal_block(self, scale, size):
+        return np.abs(self.rng.normal(0.0, scale, size))
+
+    def beta(self, a, b) -> float:
+        return self._draw(('beta', a, b), self.rng.beta, a, b)
+
+    def pareto(self, shape) -> float:
+        return self._draw(('pareto', shape), self.rng.pareto, shape)
+
+    def exponential(self, scale=1.0) -> float:
+        return self._draw(('exponential', scale), self.rng.exponential, scale)
+
+    def normal(self, loc=0.0, scale=1.0) -> float:
+        return self._draw(('normal', loc, scale), self.rng.normal, loc, scale)
+
+    def half_normal(self, scale=1.0) -> float:
+        return self._draw(('half_normal', scale), self._half_normal_block, scale)
+
+    def uniform(self, low=0.0, high=1.0) -> float:
+        return self._draw(('uniform', low, high), self.rng.uniform, low, high)
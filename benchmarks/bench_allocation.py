@@ -0,0 +1,54 @@
+''' Micro-benchmark for matching into deep price levels: price-time FIFO vs pro-rata allocation
+
+Run from the repo root: python -m benchmarks.bench_allocation
+'''
+import logging
+from time import perf_counter
+
+from Agent.Agent import Agent
+from Order.OrderAction import OrderAction
+from Order.OrderType import OrderType
+from OrderBook.FifoAllocation import FifoAllocation
+from OrderBook.Matchmaker import MatchMaker
+from OrderBook.OrderBook import OrderBook
+from OrderBook.ProRataAllocation import ProRataAllocation
+
+MAKERS = 1_000  # One resting ask per maker
+LEVELS = 5
+TAKERS = 200    # Market bids per run, each takes part of the best level
+VOLUME = 25
+REPEATS = 5
+
+
+def build(allocation):
+    ob = OrderBook(allocation=allocation)
+    makers = [Agent(ob.get_id('AGENT'), cash=0) for _ in range(MAKERS)]
+    takers = [Agent(ob.get_id('AGENT'), cash=1_000_000) for _ in range(TAKERS)]
+    for agent in makers + takers:
+        ob.upsert_agent(agent)
+    for i, maker in enumerate(makers):
+        order = ob.new_order(maker.id, round(1.01 + (i % LEVELS) * 0.01, 2), 100, OrderAction.ASK, OrderType.LIMIT, [(1.00, 100)])
+        maker.upsert_active_ask(order)
+        ob.add_order(order)
+    return ob, takers
+
+
+def match_seconds(allocation):
+    ''' Best of REPEATS runs, each one matches TAKERS market bids of VOLUME shares '''
+    best = float('inf')
+    mm = MatchMaker()
+    for _ in range(REPEATS):
+        ob, takers = build(allocation)
+        start = perf_counter()
+        for taker in takers:
+            mm.match(ob, ob.new_order(taker.id, -1, VOLUME, OrderAction.BID, OrderType.MARKET))
+        best = min(best, perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+    logging.disable(logging.CRITICAL)
+    print(f'{MAKERS // LEVELS} orders per level')
+    print(f'{"":<24}{"us/match":>14}')
+    for name, allocation in (('fifo', FifoAllocation()), ('pro-rata', ProRataAllocation()), ('pro-rata min 5', ProRataAllocation(5))):
+        print(f'{name:<24}{match_seconds(allocation) / TAKERS * 1e6:>14.2f}')
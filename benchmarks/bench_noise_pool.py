@@ -0,0 +1,55 @@
+''' Ticks/sec (and trades per tick) of a noise trader population: NoiseAgent objects acting one by one vs one NoiseAgentPool
+
+Pool members act simultaneously off the tick's starting price, so they trade less per tick than agents acting in turn.
+
+Run from the repo root: python -m benchmarks.bench_noise_pool
+'''
+import logging
+import random
+from time import perf_counter
+
+from Agent.NoiseAgent import NoiseAgent
+from Agent.NoiseAgentPool import NoiseAgentPool
+from OrderBook.OrderBook import OrderBook
+
+AGENTS = (250, 1000)
+TICKS = 100
+
+
+def build(n: int, pooled: bool):
+    random.seed(0)
+    ob = OrderBook()
+    pool = NoiseAgentPool(seed=0)
+    for _ in range(n):
+        cash = random.randint(10, 1000)
+        if pooled:
+            agent = pool.new_agent(ob, cash)
+        else:
+            agent = NoiseAgent(ob.get_id('AGENT'), cash)
+            ob.upsert_agent(agent)
+        agent.update_holdings(1.00, random.randint(0, 100))
+    return ob, pool
+
+
+def ticks_per_second(n: int, pooled: bool):
+    ''' Returns: (ticks/s, trades per tick) '''
+    ob, pool = build(n, pooled)
+    agents = list(ob.agents.values())
+    start = perf_counter()
+    for _ in range(TICKS):
+        if pooled:
+            pool.act(ob)
+        else:
+            for agent in agents:
+                agent.act(ob)
+        ob.advance_tick()
+    return TICKS / (perf_counter() - start), len(ob.trades) / TICKS
+
+
+if __name__ == '__main__':
+    logging.disable(logging.CRITICAL)
+    print(f'{"agents":<10}{"per-agent ticks/s":>20}{"trades/tick":>14}{"pool ticks/s":>16}{"trades/tick":>14}')
+    for n in AGENTS:
+        per_agent, per_agent_trades = ticks_per_second(n, False)
+        pool, pool_trades = ticks_per_second(n, True)
+        print(f'{n:<10}{per_agent:>20.1f}{per_agent_trades:>14.1f}{pool:>16.1f}{pool_trades:>14.1f}')
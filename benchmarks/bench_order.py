@@ -0,0 +1,72 @@
+''' Micro-benchmark for Order allocation: orders/sec and bytes/order before (__dict__ Order) and after (__slots__ Order + OrderPool)
+
+Run from the repo root: python -m benchmarks.bench_order
+'''
+import tracemalloc
+from time import perf_counter, time
+
+from Order.Order import Order
+from Order.OrderAction import OrderAction
+from Order.OrderPool import OrderPool
+from Order.OrderStatus import OrderStatus
+from Order.OrderType import OrderType
+
+N = 200_000
+REPEATS = 5
+
+
+class DictOrder:
+    ''' The previous Order layout: per-instance __dict__ and a time() call per order '''
+    def __init__(self, id, agent_id, price, volume, side, type, reserved_shares=[]):
+        self.id = id
+        self.agent_id = agent_id
+        self.price = price
+        self.volume = volume
+        self.entry_volume = volume
+        self.timestamp = time()
+        self.status = OrderStatus.OPEN
+        self.side = side
+        self.type = type
+        self.reserved_shares = reserved_shares
+
+
+def orders_per_sec(make):
+    ''' Best of REPEATS runs '''
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = perf_counter()
+        for i in range(N):
+            make(i, 7, 1.25, 10, OrderAction.BID, OrderType.LIMIT)
+        best = min(best, perf_counter() - start)
+    return N / best
+
+
+def bytes_per_order(make):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    held = [make(i, 7, 1.25, 10, OrderAction.BID, OrderType.LIMIT) for i in range(N)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    # Don't count the list holding the orders
+    return (total - (len(held) * 8)) / N
+
+
+def pooled_orders_per_sec():
+    ''' Steady state of a bounded history: every new order reuses a released one '''
+    pool = OrderPool()
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = perf_counter()
+        for i in range(N):
+            order = pool.acquire(i, 7, 1.25, 10, OrderAction.BID, OrderType.LIMIT)
+            pool.release(order)
+        best = min(best, perf_counter() - start)
+    return N / best
+
+
+if __name__ == '__main__':
+    print(f'{"":<24}{"orders/sec":>14}{"bytes/order":>14}')
+    print(f'{"before (__dict__)":<24}{orders_per_sec(DictOrder):>14,.0f}{bytes_per_order(DictOrder):>14.1f}')
+    print(f'{"after (__slots__)":<24}{orders_per_sec(Order):>14,.0f}{bytes_per_order(Order):>14.1f}')
+    print(f'{"after (pooled)":<24}{pooled_orders_per_sec():>14,.0f}{"-":>14}')
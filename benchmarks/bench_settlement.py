@@ -0,0 +1,54 @@
+''' Micro-benchmark for a busy tick: immediate per-fill settlement vs deferred settlement applied once at the end of the tick
+
+Run from the repo root: python -m benchmarks.bench_settlement
+'''
+import logging
+from time import perf_counter
+
+from Agent.Agent import Agent
+from Order.OrderAction import OrderAction
+from Order.OrderType import OrderType
+from OrderBook.Matchmaker import MatchMaker
+from OrderBook.OrderBook import OrderBook
+
+MAKERS = 50
+FILLS = 500     # Resting 1 share asks swept per tick
+TAKERS = 10
+REPEATS = 5
+
+
+def build(deferred: bool):
+    ob = OrderBook(deferred_settlement=deferred)
+    makers = [Agent(ob.get_id('AGENT'), cash=0) for _ in range(MAKERS)]
+    takers = [Agent(ob.get_id('AGENT'), cash=1_000_000) for _ in range(TAKERS)]
+    for agent in makers + takers:
+        ob.upsert_agent(agent)
+    for i in range(FILLS):
+        maker = makers[i % MAKERS]
+        order = ob.new_order(maker.id, round(1.01 + (i % 50) * 0.01, 2), 1, OrderAction.ASK, OrderType.LIMIT, [(1.00, 1)])
+        maker.upsert_active_ask(order)
+        ob.add_order(order)
+    return ob, takers
+
+
+def tick_seconds(deferred: bool):
+    ''' Best of REPEATS ticks, each one sweeps FILLS resting orders with TAKERS market bids '''
+    best = float('inf')
+    mm = MatchMaker()
+    for _ in range(REPEATS):
+        ob, takers = build(deferred)
+        start = perf_counter()
+        for taker in takers:
+            mm.match(ob, ob.new_order(taker.id, -1, FILLS // TAKERS, OrderAction.BID, OrderType.MARKET))
+        ob.settle()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+    logging.disable(logging.CRITICAL)
+    immediate = tick_seconds(False)
+    deferred = tick_seconds(True)
+    print(f'{"":<24}{"us/fill":>14}')
+    print(f'{"immediate":<24}{immediate / FILLS * 1e6:>14.2f}')
+    print(f'{"deferred + settle()":<24}{deferred / FILLS * 1e6:>14.2f}')
@@ -0,0 +1,44 @@
+import unittest
+import numpy as np
+from OrderBook.AllocationPolicy import AllocationPolicy
+from OrderBook.FifoAllocation import FifoAllocation
+from OrderBook.ProRataAllocation import ProRataAllocation
+
+class TestAllocationPolicy(unittest.TestCase):
+
+    def test_policy_needs_allocate(self):
+        class NoAllocate(AllocationPolicy):
+            time_priority = False
+        with self.assertRaises(TypeError):
+            NoAllocate()
+        with self.assertRaises(TypeError):
+            AllocationPolicy()
+
+    def test_fifo(self):
+        shares = FifoAllocation().allocate(np.array([5, 10, 20]), 12)
+        self.assertEqual(shares.tolist(), [5, 7, 0])
+
+    def test_pro_rata(self):
+        shares = ProRataAllocation().allocate(np.array([10, 30, 60]), 50)
+        self.assertEqual(shares.tolist(), [5, 15, 30])
+
+    def test_pro_rata_min_allocation(self):
+        # Plain shares are 1, 3, 6 -> the 1 is dropped and its share goes to the first order with room
+        shares = ProRataAllocation(min_allocation=2).allocate(np.array([10, 30, 60]), 10)
+        self.assertEqual(shares.tolist(), [1, 3, 6])
+        shares = ProRataAllocation(min_allocation=2).allocate(np.array([5, 30, 65]), 10)
+        self.assertEqual(shares.tolist(), [1, 3, 6])
+        shares = ProRataAllocation(min_allocation=4).allocate(np.array([5, 30, 65]), 10)
+        self.assertEqual(shares.tolist(), [4, 0, 6])
+
+    def test_random_levels(self):
+        rng = np.random.default_rng(0)
+        policies = [FifoAllocation(), ProRataAllocation(), ProRataAllocation(5)]
+        for _ in range(200):
+            volumes = rng.integers(1, 50, size=rng.integers(1, 30))
+            total = int(rng.integers(0, volumes.sum() + 1))
+            for policy in policies:
+                shares = policy.allocate(volumes, total)
+                self.assertEqual(int(shares.sum()), total)
+                self.assertTrue(np.all(shares >= 0))
+                self.assertTrue(np.all(shares <= volumes))
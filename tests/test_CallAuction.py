@@ -0,0 +1,164 @@
+import random
+import unittest
+from OrderBook.OrderBook import OrderBook
+from OrderBook.Matchmaker import MatchMaker
+from OrderBook.ProRataAllocation import ProRataAllocation
+from Order.OrderAction import OrderAction
+from Order.OrderType import OrderType
+from Order.OrderStatus import OrderStatus
+from Agent.Agent import Agent
+
+def setup_auction(allocation=None, n=4):
+    ob = OrderBook(tick_size=0.01, call_auction=True, allocation=allocation)
+    agents = []
+    for _ in range(n):
+        agent = Agent(ob.get_id('AGENT'), cash=10_000)
+        agent.update_holdings(100, 100)
+        ob.upsert_agent(agent)
+        agents.append(agent)
+    return ob, agents
+
+def limit(ob, agent, side, price, volume):
+    ''' Reserve like NoiseAgent does and submit through the MatchMaker '''
+    if side is OrderAction.BID:
+        order = ob.new_order(agent.id, price, volume, side, OrderType.LIMIT)
+        agent.update_cash(-ob.scale.value(price, volume))
+    else:
+        order = ob.new_order(agent.id, price, volume, side, OrderType.LIMIT, agent.remove_holdings(volume))
+    MatchMaker().match(ob, order)
+    return order
+
+
+class TestCallAuction(unittest.TestCase):
+
+    def test_orders_wait_for_clear(self):
+        ob, (a, b, c, d) = setup_auction()
+        limit(ob, a, OrderAction.BID, 105, 10)
+        limit(ob, b, OrderAction.ASK, 100, 10)
+        self.assertEqual(len(ob.auction), 2)
+        self.assertEqual(len(ob.bid_queue) + len(ob.ask_queue), 0)
+        self.assertEqual(len(ob.trades), 0)
+
+    def test_uniform_price_and_refund(self):
+        ob, (a, b, c, d) = setup_auction()
+        ob.current_price = 103
+        bid1 = limit(ob, a, OrderAction.BID, 105, 10)
+        bid2 = limit(ob, b, OrderAction.BID, 102, 10)
+        ask1 = limit(ob, c, OrderAction.ASK, 101, 15)
+        ask2 = limit(ob, d, OrderAction.ASK, 104, 10)
+
+        price = ob.run_auction()
+
+        # 102 and 101 both trade 15 with a 5 share imbalance, 102 is closer to the last price
+        self.assertEqual(price, 102)
+        self.assertEqual(ob.current_price, 102)
+        self.assertEqual(bid1.status, OrderStatus.CLOSED)
+        self.assertEqual(a.holdings, {100: 100, 102: 10})
+        self.assertEqual(a.cash, 10_000 - 1020)
+        self.assertEqual(bid2.volume, 5)
+        self.assertIn(bid2.id, b.active_bids)
+        self.assertEqual(ask1.status, OrderStatus.CLOSED)
+        self.assertEqual(c.cash, 10_000 + 1530)
+        self.assertEqual(ob.bid_queue.depth(), [(102, 5)])
+        self.assertEqual(ob.ask_queue.depth(), [(104, 10)])
+        self.assertEqual(ob.trades['price'].tolist(), [102, 102])
+        self.assertEqual(ob.trades['side'].tolist(), [0, 0])
+
+    def test_time_priority_vs_pro_rata(self):
+        for allocation, expected in ((None, [10, 2]), (ProRataAllocation(), [6, 6])):
+            ob, (a, b, c, d) = setup_auction(allocation)
+            first = limit(ob, a, OrderAction.BID, 100, 10)
+            second = limit(ob, b, OrderAction.BID, 100, 10)
+            limit(ob, c, OrderAction.ASK, 100, 12)
+
+            ob.run_auction()
+
+            filled = [first.entry_volume - first.volume, second.entry_volume - second.volume]
+            self.assertEqual(filled, expected)
+
+    def test_resting_orders_participate(self):
+        ob, (a, b, c, d) = setup_auction()
+        limit(ob, a, OrderAction.ASK, 101, 10)
+        ob.run_auction()
+        self.assertEqual(ob.ask_queue.depth(), [(101, 10)])
+
+        market = ob.new_order(b.id, -1, 15, OrderAction.BID, OrderType.MARKET)
+        MatchMaker().match(ob, market)
+        ob.run_auction()
+
+        self.assertEqual(market.status, OrderStatus.CANCELED)
+        self.assertEqual(market.price, 101)
+        self.assertEqual(b.holdings, {100: 100, 101: 10})
+        self.assertEqual(b.cash, 10_000 - 1010)
+        self.assertEqual(a.active_asks, {})
+        self.assertEqual(len(ob.ask_queue), 0)
+
+    def test_submission_order_independent(self):
+        results = []
+        for seed in range(3):
+            ob, agents = setup_auction(n=6)
+            orders = []
+            for i, agent in enumerate(agents):
+                side = OrderAction.BID if i % 2 else OrderAction.ASK
+                price, volume = 98 + i, 5 + i
+                if side is OrderAction.BID:
+                    order = ob.new_order(agent.id, price, volume, side, OrderType.LIMIT)
+                    agent.update_cash(-ob.scale.value(price, volume))
+                else:
+                    order = ob.new_order(agent.id, price, volume, side, OrderType.LIMIT, agent.remove_holdings(volume))
+                orders.append(order)
+            random.Random(seed).shuffle(orders)
+            for order in orders:
+                ob.auction.submit(order)
+            price = ob.run_auction()
+            results.append((price, [(a.cash, a.get_total_shares()) for a in agents]))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+
+    def test_removed_agents_leave_the_auction(self):
+        ob, (a, b, c, d) = setup_auction()
+        bid = limit(ob, a, OrderAction.BID, 105, 10)
+        ask = limit(ob, b, OrderAction.ASK, 100, 10)
+        limit(ob, c, OrderAction.BID, 90, 10)
+
+        self.assertEqual(ob.remove_agents([a.id, b.id]), 2)
+        self.assertEqual(len(ob.auction), 1)
+        self.assertEqual(bid.status, OrderStatus.CANCELED)
+        self.assertEqual(a.cash, 10_000)
+        self.assertEqual(b.holdings, {100: 100})
+        self.assertIsNone(ob.run_auction())
+        self.assertEqual(len(ob.bid_queue), 1)
+
+        # Without returning assets the orders are just dropped
+        limit(ob, d, OrderAction.ASK, 100, 10)
+        ob.remove_agents([d.id], return_assets=False)
+        self.assertEqual(len(ob.auction), 0)
+        self.assertEqual(d.get_total_shares(), 90)
+
+    def test_cancel_all_and_reset_clear_queued_orders(self):
+        ob, (a, b, c, d) = setup_auction()
+        limit(ob, a, OrderAction.BID, 105, 10)
+        self.assertEqual(ob.cancel_all(a.id), 1)
+        self.assertEqual(a.cash, 10_000)
+        limit(ob, b, OrderAction.BID, 105, 10)
+        ob.reset()
+        self.assertEqual(len(ob.auction), 0)
+
+    def test_stops_trigger_into_next_clear(self):
+        ob, (a, b, c, d) = setup_auction()
+        ob.current_price = 100
+        stop = ob.new_order(d.id, -1, 5, OrderAction.BID, OrderType.STOP, stop_price=103)
+        MatchMaker().match(ob, stop)
+        limit(ob, a, OrderAction.BID, 104, 10)
+        limit(ob, b, OrderAction.ASK, 104, 10)
+        limit(ob, c, OrderAction.ASK, 106, 10)
+
+        self.assertEqual(ob.run_auction(), 104)
+        # The stop fires on the clearing price but waits for the next clear instead of trading continuously
+        self.assertEqual(stop.type, OrderType.MARKET)
+        self.assertEqual(ob.auction.orders, [stop])
+        self.assertEqual(d.holdings, {100: 100})
+
+        self.assertEqual(ob.run_auction(), 106)
+        self.assertEqual(stop.status, OrderStatus.CLOSED)
+        self.assertEqual(d.holdings, {100: 100, 106: 5})
@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+from Agent.HawkesFlowAgent import HawkesFlowAgent
+from Agent.PoissonFlowAgent import PoissonFlowAgent, LIMIT_BID, LIMIT_ASK, MARKET_BID, MARKET_ASK, CANCEL
+
+def make_flow(cls=HawkesFlowAgent, seed=0, **kwargs):
+    ''' Event draws only, submission is shared with PoissonFlowAgent and tested there '''
+    return cls('FLOW', seed=seed, **kwargs)
+
+
+class TestHawkesFlowAgent(unittest.TestCase):
+
+    def test_average_rates_match_configuration(self):
+        flow = make_flow(limit_rate=8, market_rate=2)
+        counts = np.zeros(5)
+        for _ in range(4000):
+            counts += np.bincount(flow.draw_events(), minlength=5)
+        means = counts / 4000
+        self.assertTrue(np.allclose(means[[LIMIT_BID, LIMIT_ASK, MARKET_BID, MARKET_ASK]], [8, 8, 2, 2], rtol=0.05))
+        self.assertEqual(means[CANCEL], 0)      # No resting orders to cancel yet
+
+    def test_flow_is_clustered(self):
+        # Same average rate, but self excitation makes per tick counts overdispersed (Poisson has variance == mean)
+        totals = {}
+        for cls in (PoissonFlowAgent, HawkesFlowAgent):
+            flow = make_flow(cls, limit_rate=8, market_rate=2)
+            totals[cls] = np.array([len(flow.draw_events()) for _ in range(4000)])
+        poisson, hawkes = totals[PoissonFlowAgent], totals[HawkesFlowAgent]
+        self.assertAlmostEqual(hawkes.mean() / poisson.mean(), 1, delta=0.05)
+        self.assertLess(poisson.var() / poisson.mean(), 1.15)
+        self.assertGreater(hawkes.var() / hawkes.mean(), 1.3)
+
+    def test_events_excite_intensity(self):
+        flow = make_flow(limit_rate=0, market_rate=0, branching=np.eye(5) * 0.5)
+        self.assertEqual(len(flow.draw_events()), 0)
+        flow.excitation[MARKET_BID] = 50
+        times, codes = flow.simulate(0.5)
+        self.assertGreater(len(codes), 0)
+        self.assertTrue(np.all(codes == MARKET_BID))
+        self.assertTrue(np.all(np.diff(times) > 0) and times[-1] < 0.5)
+        # Excitation decays away and resets with the agent
+        for _ in range(20):
+            flow.simulate(1.0)
+        self.assertLess(flow.excitation.sum(), 1e-6)
+        flow.excitation[LIMIT_BID] = 5
+        flow.reset(100)
+        self.assertEqual(flow.excitation.sum(), 0)
+
+    def test_seeded_runs_repeat(self):
+        draws = []
+        for _ in range(2):
+            flow = make_flow(seed=7)
+            draws.append(np.concatenate([flow.draw_events() for _ in range(50)]))
+        self.assertTrue(np.array_equal(draws[0], draws[1]))
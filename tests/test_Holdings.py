@@ -0,0 +1,87 @@
+import copy
+import pickle
+import random
+import unittest
+from Agent.Holdings import Holdings
+from Agent.Agent import Agent
+
+class TestHoldings(unittest.TestCase):
+
+    def test_running_totals(self):
+        h = Holdings()
+        h.add(1.10, 10)
+        h.add(0.90, 5)
+        h.add(1.10, 5)
+        self.assertEqual(h, {1.10: 15, 0.90: 5})
+        self.assertEqual(h.total, 20)
+        self.assertAlmostEqual(h.cost, 21.0)
+        self.assertAlmostEqual(h.average_price(), 1.05)
+        self.assertEqual(h.lowest(), (0.90, 5))
+        self.assertEqual(h.highest(), (1.10, 15))
+
+    def test_take_lowest(self):
+        h = Holdings({100: 5, 90: 5, 110: 10})
+        self.assertEqual(h.take_lowest(12), [(90, 5), (100, 5), (110, 2)])
+        self.assertEqual(h, {110: 8})
+        self.assertEqual(h.total, 8)
+        self.assertEqual(h.cost, 880)
+        self.assertEqual(h.take_lowest(20), [(110, 8)])
+        self.assertEqual(h.total, 0)
+        self.assertEqual(h.cost, 0)
+        self.assertEqual(h.take_lowest(1), [])
+
+    def test_dict_mutators(self):
+        h = Holdings()
+        h[100] = 10
+        h.setdefault(90, 4)
+        h.update({120: 1})
+        self.assertEqual(h.pop(100), 10)
+        self.assertEqual(h.pop(100, None), None)
+        del h[90]
+        self.assertEqual(h.total, 1)
+        self.assertEqual(h.lowest(), (120, 1))
+        h.clear()
+        self.assertEqual(h.total, 0)
+        self.assertEqual(len(h), 0)
+
+    def test_copy_and_pickle(self):
+        h = Holdings({100: 5, 90: 5})
+        for other in (h.copy(), copy.deepcopy(h), pickle.loads(pickle.dumps(h))):
+            self.assertIsInstance(other, Holdings)
+            self.assertEqual(other, h)
+            self.assertEqual(other.total, 10)
+            self.assertEqual(other.lowest(), (90, 5))
+
+    def test_matches_plain_dict(self):
+        rng = random.Random(0)
+        h = Holdings()
+        plain = {}
+        for _ in range(2000):
+            price = rng.randint(1, 50)
+            if rng.random() < 0.6:
+                volume = rng.randint(1, 20)
+                h.add(price, volume)
+                plain[price] = plain.get(price, 0) + volume
+            else:
+                volume = rng.randint(1, 30)
+                removed = h.take_lowest(volume)
+                for p, v in removed:
+                    plain[p] -= v
+                    if plain[p] == 0:
+                        del plain[p]
+            self.assertEqual(h, plain)
+            self.assertEqual(h.total, sum(plain.values()))
+            self.assertEqual(h.cost, sum(p * v for p, v in plain.items()))
+            if plain:
+                self.assertEqual(h.lowest()[0], min(plain))
+                self.assertEqual(h.highest()[0], max(plain))
+
+    def test_agent_uses_holdings(self):
+        agent = Agent(1, cash=100)
+        agent.update_holdings(1.00, 10)
+        agent.update_holdings(1.01, 10)
+        self.assertEqual(agent.remove_holdings(15), [(1.00, 10), (1.01, 5)])
+        self.assertEqual(agent.get_total_shares(), 5)
+        self.assertEqual(agent.get_average_share_price(), 1.01)
+        agent.remove_holding(1.01, 5)
+        self.assertEqual(agent.holdings, {})
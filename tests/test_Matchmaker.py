@@ -1,12 +1,16 @@
 import unittest
 from OrderBook.OrderBook import OrderBook
 from OrderBook.Matchmaker import MatchMaker
+from OrderBook.SelfTradePrevention import SelfTradePrevention
+from OrderBook.ProRataAllocation import ProRataAllocation
+from Order.TimeInForce import TimeInForce
 from Order.Order import Order
 from Order.OrderAction import OrderAction
 from Order.OrderType import OrderType
 from Order.OrderStatus import OrderStatus
 from Agent.Agent import Agent
 from Agent.NoiseAgent import NoiseAgent
+from Agent.NoiseAgentPool import NoiseAgentPool
 
 def setup():
     ob = OrderBook()
@@ -673,4 +677,497 @@ class TestMatchMaker(unittest.TestCase):
         # Check asking agent active asks
         self.assertIn(order.id, aa_after.active_asks)
         # Check Order book ask queue
-        self.assertFalse(ob.ask_queue.empty())
\ No newline at end of file
+        self.assertFalse(ob.ask_queue.empty())
+
+def setup_levels(levels=50):
+    ''' Book with one 10 share ask per price level from 1.01 upwards, owned by one maker '''
+    ob = OrderBook()
+    maker = Agent(ob.get_id('AGENT'), cash=0)
+    ob.upsert_agent(maker)
+    for i in range(levels):
+        order = ob.new_order(maker.id, round(1.01 + (i * 0.01), 2), 10, OrderAction.ASK, OrderType.LIMIT, [(1.00, 10)])
+        maker.history[order.id] = order
+        maker.upsert_active_ask(order)
+        ob.add_order(order)
+    return ob, maker
+
+
+class TestMatchKernel(unittest.TestCase):
+
+    def test_market_bid_sweeps_levels(self):
+        ob, maker = setup_levels(50)
+        taker = Agent(ob.get_id('AGENT'), cash=10_000)
+        ob.upsert_agent(taker)
+        order = ob.new_order(taker.id, -1, 495, OrderAction.BID, OrderType.MARKET)
+
+        MatchMaker().match(ob, order)
+
+        self.assertEqual(order.status, OrderStatus.CLOSED)
+        self.assertEqual(order.volume, 0)
+        self.assertEqual(taker.get_total_shares(), 495)
+        self.assertEqual(len(ob.ask_queue), 1)
+        self.assertEqual(ob.peek_best(OrderAction.ASK)[0][2], 5)
+        self.assertEqual(ob.current_price, 1.50)
+        self.assertEqual(len(maker.active_asks), 1)
+        self.assertAlmostEqual(taker.cash + maker.cash, 10_000)
+
+    def test_market_bid_cash_limited(self):
+        ob, maker = setup_levels(3)
+        taker = Agent(ob.get_id('AGENT'), cash=15.20)
+        ob.upsert_agent(taker)
+        order = ob.new_order(taker.id, -1, 30, OrderAction.BID, OrderType.MARKET)
+
+        MatchMaker().match_market_bid(ob, order)
+
+        # 10 @ 1.01 + 5 @ 1.02, then out of cash
+        self.assertEqual(taker.get_total_shares(), 15)
+        self.assertEqual(order.volume, 15)
+        self.assertEqual(order.status, OrderStatus.CANCELED)
+        self.assertEqual(ob.peek_best(OrderAction.ASK)[0][2], 5)
+        self.assertAlmostEqual(taker.cash, 0)
+
+    def test_limit_bid_rests_remainder(self):
+        ob, maker = setup_levels(3)
+        taker = Agent(ob.get_id('AGENT'), cash=100)
+        ob.upsert_agent(taker)
+        order = ob.new_order(taker.id, 1.02, 25, OrderAction.BID, OrderType.LIMIT)
+        taker.update_cash(-ob.scale.value(order.price, order.volume))
+
+        MatchMaker().match(ob, order)
+
+        self.assertEqual(taker.get_total_shares(), 20)
+        self.assertEqual(order.volume, 5)
+        self.assertEqual(order.status, OrderStatus.OPEN)
+        self.assertIn(order.id, taker.active_bids)
+        self.assertEqual(ob.peek_best(OrderAction.BID)[0], (1.02, order.timestamp, 5, order.id))
+        self.assertEqual(ob.peek_best(OrderAction.ASK)[0][0], 1.03)
+
+    def test_market_ask_returns_unfilled_shares(self):
+        ob = OrderBook()
+        bidder = Agent(ob.get_id('AGENT'), cash=100)
+        seller = Agent(ob.get_id('AGENT'), cash=0)
+        ob.upsert_agent(bidder)
+        ob.upsert_agent(seller)
+        bid = ob.new_order(bidder.id, 0.90, 10, OrderAction.BID, OrderType.LIMIT)
+        bidder.update_cash(-9)
+        MatchMaker().match(ob, bid)
+
+        seller.update_holdings(0.50, 15)
+        order = ob.new_order(seller.id, -1, 15, OrderAction.ASK, OrderType.MARKET, seller.remove_holdings(15))
+        MatchMaker().match(ob, order)
+
+        self.assertEqual(order.status, OrderStatus.CANCELED)
+        self.assertEqual(order.price, 0.90)
+        self.assertEqual(seller.cash, 9)
+        self.assertEqual(seller.holdings, {0.50: 5})
+        self.assertEqual(bidder.holdings, {0.90: 10})
+        self.assertEqual(bid.status, OrderStatus.CLOSED)
+        self.assertEqual(len(ob.bid_queue), 0)
+
+
+class TestMatchBatch(unittest.TestCase):
+
+    def run_orders(self, batched, tif=TimeInForce.GTC):
+        ''' Same book and bids matched one by one or as one batch '''
+        ob, maker = setup_levels(5)
+        takers = [Agent(ob.get_id('AGENT'), cash=cash) for cash in (100, 100, 12.00, 100)]
+        for taker in takers:
+            ob.upsert_agent(taker)
+        orders = []
+        for taker, price, volume in zip(takers, (-1, 1.02, -1, 1.00), (15, 20, 30, 5)):
+            order_type = OrderType.MARKET if price == -1 else OrderType.LIMIT
+            order = ob.new_order(taker.id, price, volume, OrderAction.BID, order_type, tif=TimeInForce.GTC if price == -1 else tif)
+            if order_type is OrderType.LIMIT:
+                taker.update_cash(-ob.scale.value(price, volume))
+            orders.append(order)
+        mm = MatchMaker()
+        if batched:
+            mm.match_batch(ob, orders)
+        else:
+            for order in orders:
+                mm.match(ob, order)
+        return ob, maker, takers, orders
+
+    def test_batch_matches_one_by_one(self):
+        ob, maker, takers, orders = self.run_orders(batched=False)
+        batch_ob, batch_maker, batch_takers, batch_orders = self.run_orders(batched=True)
+
+        for column in ('price', 'qty', 'side'):
+            self.assertEqual(ob.trades[column].tolist(), batch_ob.trades[column].tolist())
+        for column in ('buyer', 'seller', 'resting'):
+            self.assertEqual([ob.trades.decode(c) for c in ob.trades[column]], [batch_ob.trades.decode(c) for c in batch_ob.trades[column]])
+        self.assertEqual([(t.cash, dict(t.holdings)) for t in takers], [(t.cash, dict(t.holdings)) for t in batch_takers])
+        self.assertEqual([(o.status, o.volume, o.price) for o in orders], [(o.status, o.volume, o.price) for o in batch_orders])
+        self.assertEqual(maker.cash, batch_maker.cash)
+        for side in ('bids', 'asks'):
+            self.assertEqual(ob.get_snapshot()[0][side], batch_ob.get_snapshot()[0][side])
+        self.assertEqual(ob.current_price, batch_ob.current_price)
+        # The 1.00 limit bid rests, the 1.02 one took what was left up to its limit
+        self.assertEqual(batch_orders[3].status, OrderStatus.OPEN)
+        self.assertEqual(batch_takers[1].get_total_shares(), 5)
+
+    def test_fok_batch_matches_one_by_one(self):
+        ob, _, takers, orders = self.run_orders(batched=False, tif=TimeInForce.FOK)
+        batch_ob, _, batch_takers, batch_orders = self.run_orders(batched=True, tif=TimeInForce.FOK)
+        self.assertEqual(ob.trades['qty'].tolist(), batch_ob.trades['qty'].tolist())
+        self.assertEqual([o.status for o in orders], [o.status for o in batch_orders])
+        self.assertEqual(batch_orders[1].status, OrderStatus.CANCELED)
+
+    def test_mixed_sides_are_rejected(self):
+        ob, maker = setup_levels(1)
+        taker = Agent(ob.get_id('AGENT'), cash=100)
+        ob.upsert_agent(taker)
+        bid = ob.new_order(taker.id, -1, 5, OrderAction.BID, OrderType.MARKET)
+        ask = ob.new_order(taker.id, -1, 5, OrderAction.ASK, OrderType.MARKET)
+        with self.assertLogs(level='ERROR'):
+            MatchMaker().match_batch(ob, [bid, ask])
+        self.assertEqual(len(ob.trades), 0)
+
+
+class TestCashConservation(unittest.TestCase):
+    ''' Fixed-point book (integer ticks and cash units), so any cash created or lost shows up exactly '''
+
+    def setup_book(self, allocation=None):
+        ob = OrderBook(tick_size=0.01, allocation=allocation)
+        maker = Agent(ob.get_id('AGENT'), cash=0)
+        taker = Agent(ob.get_id('AGENT'), cash=100_000)
+        ob.upsert_agent(maker)
+        ob.upsert_agent(taker)
+        for price in (719, 720, 721):
+            order = ob.new_order(maker.id, price, 10, OrderAction.ASK, OrderType.LIMIT, [(700, 10)])
+            maker.upsert_active_ask(order)
+            ob.add_order(order)
+        return ob, maker, taker
+
+    def limit_bid(self, ob, taker, price, volume, tif=TimeInForce.GTC):
+        order = ob.new_order(taker.id, price, volume, OrderAction.BID, OrderType.LIMIT, tif=tif)
+        taker.update_cash(-ob.scale.value(order.price, order.volume))
+        return order
+
+    def total_cash(self, ob):
+        resting = sum(ob.scale.value(o.price, o.volume) for o in ob.bid_queue.iter_orders())
+        return sum(agent.cash for agent in ob.agents.values()) + resting
+
+    def test_limit_bid_refunds_price_improvement(self):
+        for allocation in (None, ProRataAllocation()):
+            ob, maker, taker = self.setup_book(allocation)
+            order = self.limit_bid(ob, taker, 720, 10)
+            MatchMaker().match(ob, order)
+            self.assertEqual(taker.holdings, {719: 10})
+            self.assertEqual(taker.cash, 100_000 - 7190)
+            self.assertEqual(maker.cash, 7190)
+            self.assertEqual(self.total_cash(ob), 100_000)
+
+    def test_resting_and_ioc_remainders(self):
+        ob, maker, taker = self.setup_book()
+        MatchMaker().match(ob, self.limit_bid(ob, taker, 721, 25))
+        self.assertEqual(taker.cash, 100_000 - (7190 + 7200 + 5 * 721))
+        self.assertEqual(self.total_cash(ob), 100_000)
+
+        ob, maker, taker = self.setup_book()
+        MatchMaker().match(ob, self.limit_bid(ob, taker, 725, 15, TimeInForce.IOC))
+        self.assertEqual(taker.cash, 100_000 - (7190 + 5 * 720))
+        self.assertEqual(self.total_cash(ob), 100_000)
+
+    def test_amend_into_the_book(self):
+        ob, maker, taker = self.setup_book()
+        order = self.limit_bid(ob, taker, 710, 10)
+        mm = MatchMaker()
+        mm.match(ob, order)
+        self.assertTrue(mm.amend(ob, order.id, price=725))
+        self.assertEqual(taker.holdings, {719: 10})
+        self.assertEqual(taker.cash, 100_000 - 7190)
+        self.assertEqual(self.total_cash(ob), 100_000)
+
+    def test_noise_agents_conserve_cash(self):
+        ob = OrderBook(tick_size=0.01)
+        pool = NoiseAgentPool(seed=1)
+        for _ in range(100):
+            agent = pool.new_agent(ob, ob.scale.to_units(500))
+            agent.update_holdings(ob.scale.to_ticks(1.00), 100)
+        start = self.total_cash(ob)
+        for _ in range(200):
+            pool.act(ob)
+        self.assertGreater(len(ob.trades), 0)
+        self.assertEqual(self.total_cash(ob), start)
+
+
+class TestSelfTradePrevention(unittest.TestCase):
+
+    def setup_own_ask(self):
+        ''' Maker asks from 1.01 upwards, plus the taker's own 10 share ask at 1.00 in front of them '''
+        ob, maker = setup_levels(3)
+        taker = Agent(ob.get_id('AGENT'), cash=100)
+        ob.upsert_agent(taker)
+        own = ob.new_order(taker.id, 1.00, 10, OrderAction.ASK, OrderType.LIMIT, [(0.50, 10)])
+        taker.history[own.id] = own
+        taker.upsert_active_ask(own)
+        ob.add_order(own)
+        return ob, maker, taker, own
+
+    def test_skip(self):
+        ob, maker, taker, own = self.setup_own_ask()
+        order = ob.new_order(taker.id, -1, 15, OrderAction.BID, OrderType.MARKET)
+
+        MatchMaker(SelfTradePrevention.SKIP).match(ob, order)
+
+        self.assertEqual(order.status, OrderStatus.CLOSED)
+        self.assertEqual(taker.holdings, {1.01: 10, 1.02: 5})
+        self.assertEqual(own.status, OrderStatus.OPEN)
+        self.assertEqual(ob.peek_best(OrderAction.ASK)[0], (1.00, own.timestamp, 10, own.id))
+
+    def test_cancel_resting(self):
+        ob, maker, taker, own = self.setup_own_ask()
+        order = ob.new_order(taker.id, -1, 15, OrderAction.BID, OrderType.MARKET)
+
+        MatchMaker(SelfTradePrevention.CANCEL_RESTING).match(ob, order)
+
+        self.assertEqual(order.status, OrderStatus.CLOSED)
+        self.assertEqual(own.status, OrderStatus.CANCELED)
+        self.assertNotIn(own.id, ob.ask_queue)
+        self.assertNotIn(own.id, taker.active_asks)
+        self.assertEqual(taker.holdings, {0.50: 10, 1.01: 10, 1.02: 5})
+
+    def test_cancel_incoming(self):
+        ob, maker, taker, own = self.setup_own_ask()
+        order = ob.new_order(taker.id, 1.05, 15, OrderAction.BID, OrderType.LIMIT)
+        taker.update_cash(-ob.scale.value(order.price, order.volume))
+
+        MatchMaker(SelfTradePrevention.CANCEL_INCOMING).match(ob, order)
+
+        self.assertEqual(order.status, OrderStatus.CANCELED)
+        self.assertEqual(order.volume, 15)
+        self.assertAlmostEqual(taker.cash, 100)
+        self.assertEqual(len(ob.bid_queue), 0)
+        self.assertEqual(own.status, OrderStatus.OPEN)
+
+    def test_default_is_none(self):
+        self.assertIs(MatchMaker().stp, SelfTradePrevention.NONE)
+
+    def test_none(self):
+        ob, maker, taker, own = self.setup_own_ask()
+        order = ob.new_order(taker.id, -1, 5, OrderAction.BID, OrderType.MARKET)
+
+        MatchMaker(SelfTradePrevention.NONE).match(ob, order)
+
+        self.assertEqual(taker.holdings, {1.00: 5})
+        self.assertEqual(ob.peek_best(OrderAction.ASK)[0][2], 5)
+
+
+class TestTimeInForce(unittest.TestCase):
+
+    def setup_taker(self, cash=100):
+        ob, maker = setup_levels(3)
+        taker = Agent(ob.get_id('AGENT'), cash=cash)
+        ob.upsert_agent(taker)
+        return ob, maker, taker
+
+    def limit_bid(self, ob, taker, price, volume, tif):
+        order = ob.new_order(taker.id, price, volume, OrderAction.BID, OrderType.LIMIT, tif=tif)
+        taker.update_cash(-ob.scale.value(order.price, order.volume))
+        return order
+
+    def test_ioc_cancels_remainder(self):
+        ob, maker, taker = self.setup_taker()
+        order = self.limit_bid(ob, taker, 1.01, 15, TimeInForce.IOC)
+
+        MatchMaker().match(ob, order)
+
+        self.assertEqual(order.status, OrderStatus.CANCELED)
+        self.assertEqual(order.volume, 5)
+        self.assertEqual(taker.holdings, {1.01: 10})
+        self.assertAlmostEqual(taker.cash, 100 - 10.1)
+        self.assertEqual(len(ob.bid_queue), 0)
+
+    def test_fok_kill(self):
+        ob, maker, taker = self.setup_taker()
+        order = self.limit_bid(ob, taker, 1.02, 25, TimeInForce.FOK)
+
+        MatchMaker().match(ob, order)
+
+        self.assertEqual(order.status, OrderStatus.CANCELED)
+        self.assertEqual(order.volume, 25)
+        self.assertEqual(taker.holdings, {})
+        self.assertAlmostEqual(taker.cash, 100)
+        self.assertEqual(len(ob.ask_queue), 3)
+        self.assertEqual(len(ob.trades), 0)
+
+    def test_fok_fill(self):
+        ob, maker, taker = self.setup_taker()
+        order = self.limit_bid(ob, taker, 1.02, 20, TimeInForce.FOK)
+
+        MatchMaker().match(ob, order)
+
+        self.assertEqual(order.status, OrderStatus.CLOSED)
+        self.assertEqual(taker.holdings, {1.01: 10, 1.02: 10})
+
+    def test_fok_market_bid_needs_cash(self):
+        ob, maker, taker = self.setup_taker(cash=10)
+        order = ob.new_order(taker.id, -1, 10, OrderAction.BID, OrderType.MARKET, tif=TimeInForce.FOK)
+
+        MatchMaker().match(ob, order)
+
+        self.assertEqual(order.status, OrderStatus.CANCELED)
+        self.assertEqual(taker.cash, 10)
+        self.assertEqual(ob.peek_best(OrderAction.ASK)[0][2], 10)
+
+
+class TestStopOrders(unittest.TestCase):
+
+    def test_buy_stop_triggers(self):
+        ob, maker = setup_levels(5)
+        trader = Agent(ob.get_id('AGENT'), cash=100)
+        stopper = Agent(ob.get_id('AGENT'), cash=100)
+        ob.upsert_agent(trader)
+        ob.upsert_agent(stopper)
+        mm = MatchMaker()
+
+        buy_stop = ob.new_order(stopper.id, -1, 10, OrderAction.BID, OrderType.STOP, stop_price=1.02)
+        mm.match(ob, buy_stop)
+        self.assertIn(buy_stop.id, stopper.active_bids)
+        self.assertEqual(ob.get_open_orders(stopper.id), [buy_stop])
+
+        # Trading through 1.02 fires the stop, which buys the next 10 shares
+        mm.match(ob, ob.new_order(trader.id, -1, 20, OrderAction.BID, OrderType.MARKET))
+
+        self.assertEqual(buy_stop.type, OrderType.MARKET)
+        self.assertEqual(buy_stop.status, OrderStatus.CLOSED)
+        self.assertEqual(stopper.holdings, {1.03: 10})
+        self.assertEqual(stopper.active_bids, {})
+        self.assertEqual(ob.get_open_orders(stopper.id), [])
+        self.assertEqual(ob.current_price, 1.03)
+
+    def test_sell_stop_cascade(self):
+        ob = OrderBook()
+        buyer = Agent(ob.get_id('AGENT'), cash=100)
+        ob.upsert_agent(buyer)
+        for price in (0.99, 0.98, 0.97, 0.96):
+            bid = ob.new_order(buyer.id, price, 10, OrderAction.BID, OrderType.LIMIT)
+            buyer.update_cash(-ob.scale.value(price, 10))
+            buyer.upsert_active_bid(bid)
+            ob.add_order(bid)
+
+        mm = MatchMaker()
+        stops = []
+        for stop_price in (0.99, 0.98, 0.97):
+            seller = Agent(ob.get_id('AGENT'), cash=0)
+            seller.update_holdings(0.50, 10)
+            ob.upsert_agent(seller)
+            order = ob.new_order(seller.id, -1, 10, OrderAction.ASK, OrderType.STOP, seller.remove_holdings(10), stop_price=stop_price)
+            mm.match(ob, order)
+            stops.append(order)
+
+        trader = Agent(ob.get_id('AGENT'), cash=0)
+        trader.update_holdings(0.50, 10)
+        ob.upsert_agent(trader)
+        mm.match(ob, ob.new_order(trader.id, -1, 10, OrderAction.ASK, OrderType.MARKET, trader.remove_holdings(10)))
+
+        # 0.99 trade fires the 0.99 stop -> 0.98 trade fires the next one -> ...
+        self.assertEqual([s.status for s in stops], [OrderStatus.CLOSED] * 3)
+        self.assertEqual(ob.current_price, 0.96)
+        self.assertEqual(len(ob.bid_queue), 0)
+        self.assertEqual(len(ob.sell_stops), 0)
+
+    def test_cancel_stop_limit(self):
+        ob = OrderBook()
+        agent = Agent(ob.get_id('AGENT'), cash=100)
+        ob.upsert_agent(agent)
+        order = ob.new_order(agent.id, 1.10, 10, OrderAction.BID, OrderType.STOP_LIMIT, stop_price=1.05)
+        agent.update_cash(-ob.scale.value(order.price, order.volume))
+        MatchMaker().match(ob, order)
+
+        ob.cancel_order(order.id, agent)
+
+        self.assertEqual(order.status, OrderStatus.CANCELED)
+        self.assertAlmostEqual(agent.cash, 100)
+        self.assertEqual(len(ob.buy_stops), 0)
+        self.assertEqual(agent.active_bids, {})
+
+
+class TestProRataMatching(unittest.TestCase):
+
+    def setup_level(self, volumes=(10, 30, 60)):
+        ''' Pro-rata book with one maker ask per volume at 1.01 and one 10 share ask at 1.02 '''
+        ob = OrderBook(allocation=ProRataAllocation())
+        makers, asks = [], []
+        for volume in list(volumes) + [10]:
+            maker = Agent(ob.get_id('AGENT'), cash=0)
+            ob.upsert_agent(maker)
+            price = 1.01 if len(asks) < len(volumes) else 1.02
+            order = ob.new_order(maker.id, price, volume, OrderAction.ASK, OrderType.LIMIT, [(1.00, volume)])
+            maker.history[order.id] = order
+            maker.upsert_active_ask(order)
+            ob.add_order(order)
+            makers.append(maker)
+            asks.append(order)
+        taker = Agent(ob.get_id('AGENT'), cash=1_000)
+        ob.upsert_agent(taker)
+        return ob, makers, asks, taker
+
+    def test_partial_level_split_by_volume(self):
+        ob, makers, asks, taker = self.setup_level()
+        order = ob.new_order(taker.id, -1, 50, OrderAction.BID, OrderType.MARKET)
+
+        MatchMaker().match(ob, order)
+
+        self.assertEqual(order.status, OrderStatus.CLOSED)
+        self.assertEqual([a.entry_volume - a.volume for a in asks], [5, 15, 30, 0])
+        self.assertEqual(ob.ask_queue.depth(), [(1.01, 50), (1.02, 10)])
+        self.assertAlmostEqual(makers[2].cash, 30.3)
+
+    def test_full_level_then_next(self):
+        ob, makers, asks, taker = self.setup_level()
+        order = ob.new_order(taker.id, 1.02, 105, OrderAction.BID, OrderType.LIMIT)
+        taker.update_cash(-ob.scale.value(order.price, order.volume))
+
+        MatchMaker().match(ob, order)
+
+        self.assertEqual([a.status for a in asks[:3]], [OrderStatus.CLOSED] * 3)
+        self.assertEqual(asks[3].volume, 5)
+        self.assertEqual(taker.holdings, {1.01: 100, 1.02: 5})
+
+    def test_rounding_leftover_goes_by_time(self):
+        ob, makers, asks, taker = self.setup_level((3, 3, 3))
+        order = ob.new_order(taker.id, -1, 4, OrderAction.BID, OrderType.MARKET)
+
+        MatchMaker().match(ob, order)
+
+        # 4 * 3 / 9 rounds down to 1 each, the leftover share goes to the first order
+        self.assertEqual([a.entry_volume - a.volume for a in asks[:3]], [2, 1, 1])
+
+    def test_market_bid_cash_limited(self):
+        ob, makers, asks, taker = self.setup_level()
+        taker.cash = 20.2
+        order = ob.new_order(taker.id, -1, 50, OrderAction.BID, OrderType.MARKET)
+
+        MatchMaker().match(ob, order)
+
+        self.assertEqual(taker.get_total_shares(), 20)
+        self.assertEqual([a.entry_volume - a.volume for a in asks[:3]], [2, 6, 12])
+        self.assertEqual(order.status, OrderStatus.CANCELED)
+
+    def test_self_trade_skip(self):
+        ob, makers, asks, taker = self.setup_level()
+        order = ob.new_order(makers[2].id, -1, 20, OrderAction.BID, OrderType.MARKET)
+        makers[2].cash = 100
+
+        MatchMaker(SelfTradePrevention.SKIP).match(ob, order)
+
+        self.assertEqual([a.entry_volume - a.volume for a in asks[:3]], [5, 15, 0])
+
+    def test_self_trade_cancel_resting_on_each_level(self):
+        ob, makers, asks, taker = self.setup_level()
+        own = []
+        for price in (1.01, 1.02):
+            order = ob.new_order(taker.id, price, 5, OrderAction.ASK, OrderType.LIMIT, [(1.00, 5)])
+            taker.upsert_active_ask(order)
+            ob.add_order(order)
+            own.append(order)
+        order = ob.new_order(taker.id, -1, 105, OrderAction.BID, OrderType.MARKET)
+
+        MatchMaker(SelfTradePrevention.CANCEL_RESTING).match(ob, order)
+
+        self.assertEqual([o.status for o in own], [OrderStatus.CANCELED] * 2)
+        self.assertEqual(taker.active_asks, {})
+        self.assertEqual([a.status for a in asks], [OrderStatus.CLOSED] * 3 + [OrderStatus.OPEN])
+        self.assertEqual(asks[3].volume, 5)
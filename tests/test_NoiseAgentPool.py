@@ -0,0 +1,139 @@
+import random
+import unittest
+import numpy as np
+from Agent.Agent import Agent
+from Agent.NoiseAgentPool import NoiseAgentPool, HOLD, BID, ASK, CANCEL
+from OrderBook.OrderBook import OrderBook
+from OrderBook.Matchmaker import MatchMaker
+from Order.OrderAction import OrderAction
+from Order.OrderType import OrderType
+from Order.TimeInForce import TimeInForce
+
+def setup_pool(n=200, seed=0, **kwargs):
+    ob = OrderBook(**kwargs)
+    pool = NoiseAgentPool(seed=seed)
+    rng = random.Random(seed)
+    for _ in range(n):
+        agent = pool.new_agent(ob, ob.scale.to_units(rng.randint(10, 1000)))
+        agent.update_holdings(ob.scale.to_ticks(1.00), rng.randint(0, 100))
+    return ob, pool
+
+def check_book(test, ob, pool):
+    best_bid, best_ask = ob.bid_queue.best_price(), ob.ask_queue.best_price()
+    if best_bid is not None and best_ask is not None:
+        test.assertLess(best_bid, best_ask)
+    test.assertTrue(np.all(pool.cash >= 0))
+    test.assertTrue(np.all(pool.shares >= 0))
+    for agent in pool:
+        test.assertEqual(set(ob.open_orders.get(agent.id, {})), set(agent.active_asks) | set(agent.active_bids))
+
+
+class TestNoiseAgentPool(unittest.TestCase):
+
+    def test_members_are_tagged_agents(self):
+        ob, pool = setup_pool(10)
+        self.assertEqual(len(pool), 10)
+        self.assertTrue(all(ob.get_tag(agent.id) == pool.tag for agent in pool))
+        removed = pool.agents[0]
+        ob.remove_agents([removed.id])
+        pool.sync(ob)
+        self.assertEqual(len(pool), 9)
+        self.assertNotIn(removed, list(pool))
+        # Removed members keep their row but never act again
+        for _ in range(20):
+            self.assertEqual(pool.decide()['action'][removed.row], HOLD)
+
+    def test_arrays_are_the_accounts(self):
+        ob, pool = setup_pool(3)
+        agent = pool.agents[1]
+        agent.update_cash(-5)
+        agent.update_holdings(1.50, 10)
+        self.assertEqual(agent.cash, pool.cash[1])
+        self.assertEqual(agent.get_total_shares(), pool.shares[1])
+        average = pool.cost[1] / pool.shares[1]
+        self.assertEqual(agent.remove_holdings(4), [(average, 4)])
+        self.assertEqual(agent.holdings, {average: pool.shares[1]})
+        agent.reset(7)
+        self.assertEqual((pool.cash[1], pool.shares[1], pool.cost[1]), (7, 0, 0))
+        self.assertEqual(agent.holdings, {})
+
+    def test_fills_reach_arrays_through_settlement(self):
+        for deferred in (False, True):
+            ob, pool = setup_pool(1, deferred_settlement=deferred)
+            member = pool.agents[0]
+            pool.cash[0], pool.shares[0], pool.cost[0] = 0, 10, 10.0
+            ask = ob.new_order(member.id, 1.10, 10, OrderAction.ASK, OrderType.LIMIT, member.remove_holdings(10))
+            MatchMaker().match(ob, ask)
+            taker = Agent(ob.get_id('AGENT'), cash=100)
+            ob.upsert_agent(taker)
+            MatchMaker().match(ob, ob.new_order(taker.id, -1, 10, OrderAction.BID, OrderType.MARKET))
+            self.assertEqual(pool.cash[0], 0 if deferred else 11)
+            ob.settle()
+            self.assertEqual(pool.cash[0], 11)
+            self.assertEqual(pool.shares[0], 0)
+
+    def test_limit_prices_match_agent_pricing(self):
+        x = np.random.default_rng(0).beta(2, 5, 100)
+        for side in (OrderAction.BID, OrderAction.ASK):
+            prices = Agent.get_beta_offset_prices(1.25, side, x)
+            self.assertEqual(prices.tolist(), [Agent(0)._get_beta_offset_price(1.25, side, v) for v in x.tolist()])
+
+    def test_actions_only_from_available(self):
+        ob, pool = setup_pool(4)
+        broke, holder, resting, rich = pool.agents
+        broke.reset(0)
+        holder.cash = 0
+        resting.reset(0)
+        resting.active_bids['X'] = None
+        rich.remove_holdings(rich.get_total_shares())
+        pool.sync(ob)
+        seen = [set() for _ in range(4)]
+        for _ in range(200):
+            for i, action in enumerate(pool.decide()['action'].tolist()):
+                seen[i].add(action)
+        self.assertEqual(seen, [{HOLD}, {HOLD, ASK}, {HOLD, CANCEL}, {HOLD, BID}])
+
+    def test_action_frequencies_match_noise_agent(self):
+        ob, pool = setup_pool(2000)
+        pool.sync(ob)
+        counts = np.bincount(pool.decide()['action'], minlength=4) / 2000
+        # Cash >= price and shares > 0 for most members, no resting orders -> HOLD/BID/ASK about 1/3 each
+        agents = [a for a in pool if a.get_total_shares() > 0]
+        expected = np.array([1 / 3, 1 / 3, 1 / 3, 0]) * len(agents) / 2000 + np.array([1 / 2, 1 / 2, 0, 0]) * (2000 - len(agents)) / 2000
+        self.assertTrue(np.allclose(counts, expected, atol=0.04))
+
+    def test_ticks_keep_book_consistent(self):
+        for kwargs in ({}, {'tick_size': 0.01}, {'tick_size': 0.01, 'call_auction': True}):
+            ob, pool = setup_pool(100, **kwargs)
+            shares = pool.shares.sum()
+            for _ in range(30):
+                pool.act(ob)
+                ob.run_auction()
+                ob.settle()
+                ob.advance_tick()
+                check_book(self, ob, pool)
+            self.assertGreater(len(ob.trades), 0)
+            resting = sum(o.volume for o in ob.ask_queue.iter_orders())
+            self.assertEqual(pool.shares.sum() + resting, shares)
+
+    def test_order_ttl(self):
+        ob = OrderBook()
+        pool = NoiseAgentPool(order_ttl=5, seed=1)
+        for _ in range(50):
+            pool.new_agent(ob, 100).update_holdings(1.00, 50)
+        pool.act(ob)
+        limits = [o for o in ob.order_history.values() if o.type is OrderType.LIMIT]
+        self.assertTrue(limits)
+        self.assertTrue(all(o.tif is TimeInForce.GTD and o.expire_tick == 5 for o in limits))
+        markets = [o for agent in pool for o in agent.history.values() if o.type is OrderType.MARKET]
+        self.assertTrue(markets)
+        self.assertTrue(all(o.tif is TimeInForce.GTC and o.expire_tick is None for o in markets))
+
+    def test_seeded_runs_repeat(self):
+        results = []
+        for _ in range(2):
+            ob, pool = setup_pool(50, seed=3)
+            for _ in range(10):
+                pool.act(ob)
+            results.append((ob.current_price, pool.cash.tolist(), pool.shares.tolist()))
+        self.assertEqual(results[0], results[1])
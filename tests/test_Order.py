@@ -1,5 +1,4 @@
 import unittest
-from time import time
 from Order.Order import Order
 from Order.OrderAction import OrderAction
 from Order.OrderStatus import OrderStatus
@@ -7,25 +6,28 @@ from Order.OrderType import OrderType
 
 class TestOrder(unittest.TestCase):
     def test_order_init_ask(self):
-        TIME = time()
         ORDER = Order(1, 1, 1.00, 10, OrderAction.ASK, OrderType.LIMIT)
         self.assertEqual(ORDER.id, 1)
         self.assertEqual(ORDER.agent_id, 1)
         self.assertEqual(ORDER.price, 1.00)
         self.assertEqual(ORDER.volume, 10)
-        self.assertAlmostEqual(ORDER.timestamp, TIME)
+        self.assertEqual(ORDER.timestamp, 0)
         self.assertEqual(ORDER.status, OrderStatus.OPEN)
         self.assertEqual(ORDER.side, OrderAction.ASK)
         self.assertEqual(ORDER.type, OrderType.LIMIT)
 
     def test_order_init_bid(self):
-        TIME = time()
         ORDER = Order(1, 1, 1.00, 10, OrderAction.BID, OrderType.MARKET)
         self.assertEqual(ORDER.id, 1)
         self.assertEqual(ORDER.agent_id, 1)
         self.assertEqual(ORDER.price, 1.00)
         self.assertEqual(ORDER.volume, 10)
-        self.assertAlmostEqual(ORDER.timestamp, TIME)
+        self.assertEqual(ORDER.timestamp, 0)
         self.assertEqual(ORDER.status, OrderStatus.OPEN)
         self.assertEqual(ORDER.side, OrderAction.BID)
-        self.assertEqual(ORDER.type, OrderType.MARKET)
\ No newline at end of file
+        self.assertEqual(ORDER.type, OrderType.MARKET)
+
+    def test_order_timestamp(self):
+        ORDER = Order(1, 1, 1.00, 10, OrderAction.BID, OrderType.LIMIT, timestamp=7)
+        self.assertEqual(ORDER.timestamp, 7)
+        self.assertEqual(ORDER.reserved_shares, ())
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from OrderBook.OrderArchive import OrderArchive
+from OrderBook.OrderBook import OrderBook
+from Order.Order import Order
+from Order.OrderAction import OrderAction
+from Order.OrderStatus import OrderStatus
+from Order.OrderType import OrderType
+from Agent.Agent import Agent
+
+class TestOrderArchive(unittest.TestCase):
+
+    def test_append_get(self):
+        archive = OrderArchive(':memory:', batch_size=2)
+        o1 = Order('O-1', 'A-1', 1.10, 10, OrderAction.ASK, OrderType.LIMIT, [(1.00, 10)])
+        o1.status = OrderStatus.CLOSED
+        o2 = Order(2, 'A-1', 0.90, 5, OrderAction.BID, OrderType.LIMIT)
+        archive.append(o1)
+        archive.append(o2)
+
+        found = archive.get('O-1')
+        self.assertEqual(found.price, 1.10)
+        self.assertEqual(found.status, OrderStatus.CLOSED)
+        self.assertEqual(found.side, OrderAction.ASK)
+        self.assertEqual(found.reserved_shares, [(1.00, 10)])
+        self.assertEqual(archive.get(2).volume, 5)
+        self.assertIsNone(archive.get('O-3'))
+        self.assertEqual([o.id for o in archive.get_agent_orders('A-1')], ['O-1', 2])
+        self.assertEqual(len(archive), 2)
+
+    def test_history_limit(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            ob = OrderBook(history_limit=2, archive_path=os.path.join(tmp, 'orders.db'))
+            a = Agent('A-1', 100)
+            ob.upsert_agent(a)
+
+            orders = []
+            for i in range(4):
+                o = Order(ob.get_id('ORDER'), a.id, 1.00, 10, OrderAction.BID, OrderType.LIMIT)
+                a.history[o.id] = o
+                a.upsert_active_bid(o)
+                ob.add_order(o)
+                orders.append(o)
+            open_order = orders.pop()
+
+            for o in orders:
+                ob.cancel_order(o.id, a)
+
+            # Oldest closed order is archived, open order and last 2 closed stay in memory
+            self.assertNotIn(orders[0].id, ob.order_history)
+            self.assertNotIn(orders[0].id, a.history)
+            self.assertIn(orders[1].id, ob.order_history)
+            self.assertIn(open_order.id, ob.order_history)
+            self.assertIn(open_order.id, a.history)
+            self.assertEqual(ob.get_order(orders[0].id).status, OrderStatus.CANCELED)
+            self.assertIs(ob.get_order(orders[2].id), orders[2])
+            ob.archive.close()
+
+    def test_history_limit_must_keep_one(self):
+        # With 0 an order would be recycled the moment it closes, while its caller still holds it
+        for limit in (0, -1):
+            with self.assertRaises(ValueError):
+                OrderBook(history_limit=limit)
+        self.assertEqual(OrderBook(history_limit=1).history_limit, 1)
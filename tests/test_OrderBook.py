@@ -4,6 +4,7 @@ from Order.Order import Order
 from Order.OrderAction import OrderAction
 from Order.OrderStatus import OrderStatus
 from Order.OrderType import OrderType
+from Order.TimeInForce import TimeInForce
 from Agent.Agent import Agent
 
 class TestOrderBook(unittest.TestCase):
@@ -16,7 +17,7 @@ class TestOrderBook(unittest.TestCase):
         self.assertIsNotNone(ob.ask_queue)
         self.assertIsNotNone(ob.order_history)
         self.assertIsNotNone(ob.agents)
-        self.assertIs(ob, ob2)
+        self.assertIsNot(ob, ob2)
 
     def test_get_id_agent(self):
         ob = OrderBook()
@@ -32,6 +33,51 @@ class TestOrderBook(unittest.TestCase):
         self.assertEqual(id, 'O-000000000001')
         self.assertEqual(id2, 'O-000000000002')
 
+    def test_get_id_int(self):
+        ob = OrderBook(int_ids=True)
+        id = ob.get_id('ORDER')
+        id2 = ob.get_id('AGENT')
+        self.assertEqual(id, 1)
+        self.assertEqual(id2, 1)
+        self.assertEqual(OrderBook.format_id(id, 'ORDER'), 'O-000000000001')
+        self.assertEqual(OrderBook.format_id(id2, 'AGENT'), 'A-000000000001')
+        self.assertEqual(OrderBook.format_id('--ACTOR--', 'AGENT'), '--ACTOR--')
+
+    def test_sequence_clock(self):
+        ob = OrderBook(sim_time=0.0)
+        o1 = ob.new_order(1, 1.00, 10, OrderAction.ASK, OrderType.LIMIT)
+        o2 = ob.new_order(1, 1.00, 10, OrderAction.ASK, OrderType.LIMIT)
+        o3 = Order(3, 1, 1.00, 10, OrderAction.ASK, OrderType.LIMIT)
+        ob.add_order(o1)
+        ob.add_order(o2)
+        ob.add_order(o3)
+
+        self.assertEqual((o1.timestamp, o2.timestamp, o3.timestamp), (1, 2, 0))
+        self.assertEqual(ob.peek_best(OrderAction.ASK, 2), [(1.00, 1, 10, o1.id), (1.00, 2, 10, o2.id)])
+        ob.advance_clock(60)
+        self.assertEqual(ob.get_snapshot()[0]['time_exchange'], 60.0)
+
+    def test_independent_markets(self):
+        ob, ob2 = OrderBook.create_markets(2)
+        self.assertIsNot(ob, ob2)
+        self.assertEqual(ob.get_id('ORDER'), 'O-000000000001')
+        self.assertEqual(ob2.get_id('ORDER'), 'O-000000000001')
+
+        o1 = Order(1, 1, 1.00, 10, OrderAction.ASK, OrderType.LIMIT)
+        ob.add_order(o1)
+        self.assertIn(o1.id, ob.order_history)
+        self.assertNotIn(o1.id, ob2.order_history)
+        self.assertEqual(ob2.peek_best(OrderAction.ASK), [])
+
+    def test_create_markets_forwards_options(self):
+        markets = OrderBook.create_markets(2, 1.00, 0.01, history_limit=5, deferred_settlement=True, call_auction=True)
+        for ob in markets:
+            self.assertTrue(ob.scale.fixed_point)
+            self.assertEqual(ob.history_limit, 5)
+            self.assertIsNotNone(ob.settlement)
+            self.assertIsNotNone(ob.auction)
+        self.assertIsNot(markets[0].auction, markets[1].auction)
+
     def test_get_id_fail(self):
         ob = OrderBook()
         id = ob.get_id('TEST_FAIL')
@@ -378,4 +424,260 @@ class TestOrderBook(unittest.TestCase):
         pass
 
     def test_get_snapshot_empty_both(self):
-        pass
\ No newline at end of file
+        pass
+
+class TestOpenOrderIndex(unittest.TestCase):
+
+    def setup_agents(self):
+        ob = OrderBook()
+        a1 = Agent(ob.get_id('AGENT'), cash=100)
+        a2 = Agent(ob.get_id('AGENT'), cash=100)
+        ob.upsert_agent(a1, tag='POP')
+        ob.upsert_agent(a2)
+        orders = []
+        for agent, price in ((a1, 0.90), (a1, 0.95), (a2, 0.80)):
+            order = ob.new_order(agent.id, price, 10, OrderAction.BID, OrderType.LIMIT)
+            agent.update_cash(-ob.scale.value(price, 10))
+            agent.upsert_active_bid(order)
+            ob.add_order(order)
+            orders.append(order)
+        return ob, a1, a2, orders
+
+    def test_index_follows_book(self):
+        ob, a1, a2, orders = self.setup_agents()
+        self.assertEqual(ob.get_open_orders(a1.id), orders[:2])
+
+        ob.cancel_order(orders[0].id, a1)
+        self.assertEqual(ob.get_open_orders(a1.id), [orders[1]])
+
+        ob.bid_queue.remove(orders[1].id)
+        ob.fill_order(orders[1])
+        self.assertEqual(ob.get_open_orders(a1.id), [])
+        self.assertNotIn(a1.id, ob.open_orders)
+
+    def test_cancel_all(self):
+        ob, a1, a2, orders = self.setup_agents()
+        self.assertEqual(ob.cancel_all(a1.id), 2)
+        self.assertAlmostEqual(a1.cash, 100)
+        self.assertEqual(a1.active_bids, {})
+        self.assertEqual([o.id for o in ob.bid_queue.iter_orders()], [orders[2].id])
+        self.assertEqual(ob.cancel_all(a1.id), 0)
+
+    def test_remove_tag(self):
+        ob, a1, a2, orders = self.setup_agents()
+        self.assertEqual(ob.get_tag(a1.id), 'POP')
+        self.assertEqual(ob.remove_tag('POP', return_assets=False), 2)
+
+        self.assertNotIn(a1.id, ob.agents)
+        self.assertIn(a2.id, ob.agents)
+        self.assertIsNone(ob.get_tag(a1.id))
+        self.assertNotIn('POP', ob.tagged)
+        self.assertEqual(orders[0].status, OrderStatus.CANCELED)
+        self.assertEqual(len(ob.bid_queue), 1)
+
+    def test_remove_agents_returns_assets(self):
+        ob, a1, a2, orders = self.setup_agents()
+        self.assertEqual(ob.remove_agents([a1.id, a2.id]), 3)
+        self.assertAlmostEqual(a1.cash, 100)
+        self.assertAlmostEqual(a2.cash, 100)
+        self.assertEqual(ob.agents, {})
+        self.assertEqual(len(ob.bid_queue), 0)
+
+
+class TestAmendOrder(unittest.TestCase):
+
+    def setup_book(self):
+        ob = OrderBook()
+        agent = Agent(ob.get_id('AGENT'), cash=100)
+        other = Agent(ob.get_id('AGENT'), cash=100)
+        ob.upsert_agent(agent)
+        ob.upsert_agent(other)
+        return ob, agent, other
+
+    def rest(self, ob, agent, price, volume, side, reserved_shares=()):
+        order = ob.new_order(agent.id, price, volume, side, OrderType.LIMIT, reserved_shares)
+        if side is OrderAction.BID:
+            agent.update_cash(-ob.scale.value(price, volume))
+            agent.upsert_active_bid(order)
+        else:
+            agent.upsert_active_ask(order)
+        ob.add_order(order)
+        return order
+
+    def test_size_down_keeps_priority(self):
+        ob, agent, other = self.setup_book()
+        first = self.rest(ob, agent, 0.90, 10, OrderAction.BID)
+        second = self.rest(ob, other, 0.90, 10, OrderAction.BID)
+        timestamp = first.timestamp
+
+        self.assertTrue(ob.amend_order(first.id, volume=4))
+
+        self.assertAlmostEqual(agent.cash, 100 - 3.6)
+        self.assertEqual(first.timestamp, timestamp)
+        self.assertEqual([o.id for o in ob.bid_queue.peek(2)], [first.id, second.id])
+        self.assertEqual(ob.bid_queue.depth(1), [(0.90, 14)])
+        self.assertEqual(first.entry_volume, 4)
+
+    def test_size_up_and_price_change_requeue(self):
+        ob, agent, other = self.setup_book()
+        first = self.rest(ob, agent, 0.90, 10, OrderAction.BID)
+        second = self.rest(ob, other, 0.90, 10, OrderAction.BID)
+        history = len(ob.order_history)
+
+        self.assertTrue(ob.amend_order(first.id, volume=20))
+        self.assertEqual([o.id for o in ob.bid_queue.peek(2)], [second.id, first.id])
+        self.assertAlmostEqual(agent.cash, 100 - 18)
+
+        self.assertTrue(ob.amend_order(first.id, price=0.80))
+        self.assertAlmostEqual(agent.cash, 100 - 16)
+        self.assertEqual(ob.bid_queue.depth(2), [(0.90, 10), (0.80, 20)])
+        self.assertEqual(len(ob.order_history), history)
+
+        self.assertFalse(ob.amend_order(first.id, volume=200))
+        self.assertEqual(first.volume, 20)
+
+    def test_ask_reservation_delta(self):
+        ob, agent, other = self.setup_book()
+        agent.update_holdings(0.50, 5)
+        agent.update_holdings(0.60, 5)
+        order = self.rest(ob, agent, 1.10, 10, OrderAction.ASK, agent.remove_holdings(10))
+        agent.update_holdings(0.70, 5)
+
+        ob.amend_order(order.id, volume=3)
+        self.assertEqual(order.reserved_shares, [(0.50, 3)])
+        self.assertEqual(agent.holdings, {0.50: 2, 0.60: 5, 0.70: 5})
+
+        ob.amend_order(order.id, volume=6)
+        self.assertEqual(order.volume, 6)
+        self.assertEqual(sum(v for _, v in order.reserved_shares), 6)
+        self.assertEqual(agent.get_total_shares(), 9)
+
+    def test_crossing_amend_matches(self):
+        from OrderBook.Matchmaker import MatchMaker
+        ob, agent, other = self.setup_book()
+        ask = self.rest(ob, other, 1.05, 10, OrderAction.ASK, [(1.00, 10)])
+        bid = self.rest(ob, agent, 1.00, 15, OrderAction.BID)
+
+        self.assertTrue(MatchMaker().amend(ob, bid.id, price=1.05))
+
+        self.assertEqual(ask.status, OrderStatus.CLOSED)
+        self.assertEqual(agent.holdings, {1.05: 10})
+        self.assertEqual(bid.volume, 5)
+        self.assertIn(bid.id, agent.active_bids)
+        self.assertEqual(ob.peek_best(OrderAction.BID)[0][3], bid.id)
+        self.assertEqual(ob.get_open_orders(agent.id), [bid])
+        self.assertAlmostEqual(agent.cash, 100 - 15.75)
+
+    def test_gtd_expiry(self):
+        ob, agent, other = self.setup_book()
+        agent.update_holdings(0.50, 10)
+        gtd = ob.new_order(agent.id, 1.10, 10, OrderAction.ASK, OrderType.LIMIT, agent.remove_holdings(10), TimeInForce.GTD, expire_tick=3)
+        agent.upsert_active_ask(gtd)
+        ob.add_order(gtd)
+        canceled = ob.new_order(other.id, 0.90, 10, OrderAction.BID, OrderType.LIMIT, tif=TimeInForce.GTD, expire_tick=3)
+        other.update_cash(-9)
+        other.upsert_active_bid(canceled)
+        ob.add_order(canceled)
+        ob.cancel_order(canceled.id, other)
+
+        self.assertEqual(ob.advance_tick(2), [])
+        self.assertEqual(ob.advance_tick(), [gtd])
+
+        self.assertEqual(gtd.status, OrderStatus.CANCELED)
+        self.assertEqual(agent.holdings, {0.50: 10})
+        self.assertEqual(agent.active_asks, {})
+        self.assertEqual(len(ob.ask_queue), 0)
+        self.assertEqual(ob.tick, 3)
+
+
+class TestDepthQueries(unittest.TestCase):
+
+    def setup_book(self, tick_size=None):
+        ob = OrderBook(tick_size=tick_size)
+        to_ticks = ob.scale.to_ticks
+        for i, (price, volume) in enumerate(((1.01, 10), (1.02, 5), (1.02, 5), (1.05, 20))):
+            ob.add_order(Order(f'a{i}', 1, to_ticks(price), volume, OrderAction.ASK, OrderType.LIMIT))
+        for i, (price, volume) in enumerate(((0.99, 10), (0.97, 30))):
+            ob.add_order(Order(f'b{i}', 1, to_ticks(price), volume, OrderAction.BID, OrderType.LIMIT))
+        return ob
+
+    def test_fill_cost(self):
+        ob = self.setup_book()
+        self.assertEqual(ob.get_fill_cost(OrderAction.BID, 15), (15, 15.20))
+        self.assertEqual(ob.get_fill_cost(OrderAction.BID, 10), (10, 10.10))
+        self.assertEqual(ob.get_fill_cost(OrderAction.BID, 100), (40, 41.30))
+        self.assertEqual(ob.get_fill_cost(OrderAction.ASK, 20), (20, 19.60))
+        self.assertEqual(ob.get_fill_cost(OrderAction.ASK, 0), (0, 0))
+
+    def test_fill_cost_fixed_point(self):
+        ob = self.setup_book(tick_size=0.01)
+        filled, cost = ob.get_fill_cost(OrderAction.BID, 25)
+        self.assertEqual((filled, cost), (25, 2555))
+        self.assertIs(type(cost), int)
+
+    def test_fill_cost_float_book_with_whole_price(self):
+        # Float books keep a whole price like 2.0 as the int 2, the other levels must not be truncated to ints
+        ob = OrderBook()
+        ob.add_order(Order('a0', 1, 1.5, 10, OrderAction.ASK, OrderType.LIMIT))
+        ob.add_order(Order('a1', 1, 2, 10, OrderAction.ASK, OrderType.LIMIT))
+        self.assertEqual(ob.get_fill_cost(OrderAction.BID, 10), (10, 15.0))
+        self.assertEqual(ob.get_fill_cost(OrderAction.BID, 20), (20, 35.0))
+        self.assertEqual(ob.get_sweep_price(OrderAction.BID, 5), 1.5)
+
+    def test_sweep_price(self):
+        ob = self.setup_book()
+        self.assertEqual(ob.get_sweep_price(OrderAction.BID, 10), 1.01)
+        self.assertEqual(ob.get_sweep_price(OrderAction.BID, 11), 1.02)
+        self.assertEqual(ob.get_sweep_price(OrderAction.BID, 1000), 1.05)
+        self.assertEqual(ob.get_sweep_price(OrderAction.ASK, 11), 0.97)
+        self.assertIsNone(OrderBook().get_sweep_price(OrderAction.BID, 5))
+
+    def test_volume_within(self):
+        ob = self.setup_book()
+        # mid = 1.00
+        self.assertEqual(ob.get_volume_within(OrderAction.BID, 0.02), 20)
+        self.assertEqual(ob.get_volume_within(OrderAction.BID, 0.001), 0)
+        self.assertEqual(ob.get_volume_within(OrderAction.ASK, 0.01), 10)
+        self.assertEqual(ob.get_volume_within(OrderAction.ASK, 0.05), 40)
+
+    def test_cache_follows_book(self):
+        ob = self.setup_book()
+        self.assertEqual(ob.get_fill_cost(OrderAction.BID, 10), (10, 10.10))
+        ob.ask_queue.remove('a0')
+        self.assertEqual(ob.get_fill_cost(OrderAction.BID, 10), (10, 10.20))
+
+
+class TestIndicators(unittest.TestCase):
+
+    def test_indicators(self):
+        ob = OrderBook()
+        ob.add_order(Order('a1', 1, 1.02, 10, OrderAction.ASK, OrderType.LIMIT))
+        ob.add_order(Order('a2', 1, 1.03, 30, OrderAction.ASK, OrderType.LIMIT))
+        ob.add_order(Order('b1', 1, 1.00, 30, OrderAction.BID, OrderType.LIMIT))
+
+        ind = ob.get_indicators(5)
+        self.assertEqual((ind['best_bid_price'], ind['best_bid_vol']), (1.00, 30))
+        self.assertEqual((ind['best_ask_price'], ind['best_ask_vol']), (1.02, 10))
+        self.assertEqual(ind['spread'], 0.02)
+        self.assertEqual(ind['mid_price'], 1.01)
+        self.assertEqual(ind['microprice'], 1.015)
+        self.assertAlmostEqual(ind['imbalance'], (30 - 40) / 70)
+        self.assertEqual((ind['bid_volume'], ind['ask_volume']), (30, 40))
+        self.assertEqual((ind['bid_levels'], ind['ask_levels']), (1, 2))
+        self.assertEqual((ind['largest_ask_price'], ind['largest_ask_vol'], ind['largest_ask_position']), (1.03, 30, 1))
+        self.assertIs(ob.get_indicators(5), ind)
+
+        ob.ask_queue.reduce('a1', 4)
+        ind = ob.get_indicators(5)
+        self.assertEqual(ind['best_ask_vol'], 6)
+        self.assertEqual(ind['ask_volume'], 36)
+        self.assertEqual(len(ob.ask_queue), 2)
+
+    def test_empty_side(self):
+        ob = OrderBook(initial_price=2.00)
+        ob.add_order(Order('b1', 1, 1.90, 5, OrderAction.BID, OrderType.LIMIT))
+        ind = ob.get_indicators()
+        self.assertEqual(ind['spread'], 0.0)
+        self.assertEqual(ind['mid_price'], 2.00)
+        self.assertEqual(ind['best_ask_price'], 0)
+        self.assertEqual(ind['imbalance'], 1.0)
@@ -0,0 +1,90 @@
+import unittest
+import numpy as np
+from Agent.Agent import Agent
+from Agent.HawkesFlowAgent import HawkesFlowAgent
+from Agent.PoissonFlowAgent import PoissonFlowAgent, LIMIT_BID, LIMIT_ASK, MARKET_BID, MARKET_ASK, CANCEL
+from OrderBook.OrderBook import OrderBook
+from OrderBook.Matchmaker import MatchMaker
+from Order.OrderAction import OrderAction
+from Order.OrderType import OrderType
+from Order.OrderStatus import OrderStatus
+
+def setup_flow(seed=0, cls=PoissonFlowAgent, **kwargs):
+    ob = OrderBook(tick_size=0.01)
+    flow = cls(ob.get_id('AGENT'), cash=ob.scale.to_units(100_000), seed=seed, **kwargs)
+    flow.update_holdings(ob.scale.to_ticks(1.00), 50_000)
+    ob.upsert_agent(flow, flow.FLOW_TAG)
+    return ob, flow
+
+
+class TestPoissonFlowAgent(unittest.TestCase):
+
+    def test_event_rates(self):
+        ob, flow = setup_flow(limit_rate=8, market_rate=2)
+        counts = np.zeros(5)
+        for _ in range(2000):
+            counts += np.bincount(flow.draw_events(), minlength=5)
+        means = counts / 2000
+        self.assertTrue(np.allclose(means[[LIMIT_BID, LIMIT_ASK, MARKET_BID, MARKET_ASK]], [8, 8, 2, 2], rtol=0.05))
+        self.assertEqual(means[CANCEL], 0)      # No resting orders to cancel yet
+
+    def test_builds_book_and_conserves_account(self):
+        # Submission is shared, so every arrival model has to keep the book and the account consistent
+        for cls in (PoissonFlowAgent, HawkesFlowAgent):
+            with self.subTest(cls=cls.__name__):
+                ob, flow = setup_flow(cls=cls, limit_rate=20, market_rate=4, cancel_rate=0.02)
+                cash, shares = flow.cash, flow.get_total_shares()
+                for _ in range(300):
+                    flow.act(ob)
+                    best_bid, best_ask = ob.bid_queue.best_price(), ob.ask_queue.best_price()
+                    if best_bid is not None and best_ask is not None:
+                        self.assertLess(best_bid, best_ask)
+
+                self.assertGreater(len(ob.bid_queue), 100)
+                self.assertGreater(len(ob.ask_queue), 100)
+                self.assertGreater(len(ob.trades), 0)
+                resting_cash = sum(ob.scale.value(o.price, o.volume) for o in ob.bid_queue.iter_orders())
+                resting_shares = sum(o.volume for o in ob.ask_queue.iter_orders())
+                self.assertEqual(flow.cash + resting_cash, cash)
+                self.assertEqual(flow.get_total_shares() + resting_shares, shares)
+                self.assertEqual(set(ob.open_orders[flow.id]), set(flow.active_bids) | set(flow.active_asks))
+
+    def test_limit_prices_follow_beta_offsets(self):
+        ob, flow = setup_flow(limit_rate=50, market_rate=0, cancel_rate=0)
+        flow.act(ob)
+        bids = [o.price for o in ob.bid_queue.iter_orders()]
+        asks = [o.price for o in ob.ask_queue.iter_orders()]
+        # Max variance at 1.00 is 0.05 -> bids in [0.95, 1.00], asks in [1.00, 1.05]
+        self.assertTrue(bids and all(95 <= p <= 100 for p in bids))
+        self.assertTrue(asks and all(100 <= p <= 105 for p in asks))
+
+    def test_cancels_own_resting_orders(self):
+        ob, flow = setup_flow(limit_rate=20, market_rate=0, cancel_rate=0.5)
+        flow.act(ob)
+        before = len(flow.active_bids) + len(flow.active_asks)
+        flow.limit_rate = 0
+        flow.act(ob)
+        after = len(flow.active_bids) + len(flow.active_asks)
+        self.assertLess(after, before)
+        self.assertEqual(len(ob.bid_queue) + len(ob.ask_queue), after)
+
+    def test_other_agents_trade_against_flow(self):
+        ob, flow = setup_flow(limit_rate=20, market_rate=0, cancel_rate=0)
+        for _ in range(5):
+            flow.act(ob)
+        taker = Agent(ob.get_id('AGENT'), cash=ob.scale.to_units(1_000))
+        ob.upsert_agent(taker)
+        order = ob.new_order(taker.id, -1, 50, OrderAction.BID, OrderType.MARKET)
+        MatchMaker().match(ob, order)
+        self.assertEqual(order.status, OrderStatus.CLOSED)
+        self.assertEqual(taker.get_total_shares(), 50)
+
+    def test_history_kept_small(self):
+        ob, flow = setup_flow()
+        for _ in range(50):
+            flow.act(ob)
+        self.assertLess(len(flow.history), 100)
+        ob, flow = setup_flow(keep_history=True)
+        for _ in range(50):
+            flow.act(ob)
+        self.assertGreater(len(flow.history), 500)
@@ -0,0 +1,85 @@
+import unittest
+from OrderBook.PriceLevelQueue import PriceLevelQueue
+from Order.Order import Order
+from Order.OrderAction import OrderAction
+from Order.OrderType import OrderType
+
+class TestPriceLevelQueue(unittest.TestCase):
+
+    def test_ask_priority(self):
+        q = PriceLevelQueue(OrderAction.ASK)
+        o1 = Order(1, 1, 1.00, 10, OrderAction.ASK, OrderType.LIMIT)
+        o2 = Order(2, 1, 1.10, 10, OrderAction.ASK, OrderType.LIMIT)
+        o3 = Order(3, 1, 0.90, 10, OrderAction.ASK, OrderType.LIMIT)
+        o4 = Order(4, 1, 1.00, 20, OrderAction.ASK, OrderType.LIMIT)
+        for o in (o1, o2, o3, o4):
+            q.push(o)
+
+        self.assertEqual(q.best_price(), 0.90)
+        self.assertEqual([o.id for o in q.peek(4)], [3, 1, 4, 2])
+        self.assertIs(q.pop_order(), o3)
+        self.assertIs(q.pop_order(), o1)
+        self.assertEqual(len(q), 2)
+
+    def test_bid_priority(self):
+        q = PriceLevelQueue(OrderAction.BID)
+        o1 = Order(1, 1, 1.00, 10, OrderAction.BID, OrderType.LIMIT)
+        o2 = Order(2, 1, 1.10, 10, OrderAction.BID, OrderType.LIMIT)
+        o3 = Order(3, 1, 0.90, 10, OrderAction.BID, OrderType.LIMIT)
+        o4 = Order(4, 1, 1.00, 20, OrderAction.BID, OrderType.LIMIT)
+        for o in (o1, o2, o3, o4):
+            q.push(o)
+
+        self.assertEqual(q.best_price(), 1.10)
+        self.assertEqual([o.id for o in q.peek(4)], [2, 1, 4, 3])
+
+    def test_remove(self):
+        q = PriceLevelQueue(OrderAction.ASK)
+        o1 = Order(1, 1, 1.00, 10, OrderAction.ASK, OrderType.LIMIT)
+        o2 = Order(2, 1, 0.90, 10, OrderAction.ASK, OrderType.LIMIT)
+        q.push(o1)
+        q.push(o2)
+
+        self.assertIs(q.remove(2), o2)
+        self.assertIsNone(q.remove(2))
+        self.assertNotIn(2, q)
+        self.assertEqual(q.keys, [-1.00])
+        self.assertEqual(q.best_price(), 1.00)
+
+    def test_push_front(self):
+        q = PriceLevelQueue(OrderAction.ASK)
+        o1 = Order(1, 1, 1.00, 10, OrderAction.ASK, OrderType.LIMIT)
+        o2 = Order(2, 1, 1.00, 10, OrderAction.ASK, OrderType.LIMIT)
+        q.push(o1)
+        q.push(o2)
+
+        popped = q.pop_order()
+        q.push(popped, front=True)
+        self.assertIs(q.peek_order(), o1)
+
+    def test_empty(self):
+        q = PriceLevelQueue(OrderAction.BID)
+        self.assertIsNone(q.best_price())
+        self.assertIsNone(q.peek_order())
+        self.assertIsNone(q.pop_order())
+        self.assertEqual(q.peek(3), [])
+        self.assertFalse(q)
+
+    def test_depth_sizes(self):
+        q = PriceLevelQueue(OrderAction.ASK)
+        o1 = Order(1, 1, 1.00, 10, OrderAction.ASK, OrderType.LIMIT)
+        o2 = Order(2, 1, 1.00, 5, OrderAction.ASK, OrderType.LIMIT)
+        o3 = Order(3, 1, 1.10, 7, OrderAction.ASK, OrderType.LIMIT)
+        for o in (o1, o2, o3):
+            q.push(o)
+        self.assertEqual(q.depth(5), [(1.00, 15), (1.10, 7)])
+        self.assertEqual(q.depth(1), [(1.00, 15)])
+
+        version = q.version
+        q.reduce(1, 4)
+        self.assertEqual(q.depth(1), [(1.00, 11)])
+        self.assertGreater(q.version, version)
+
+        q.remove(2)
+        q.pop_order()
+        self.assertEqual(q.depth(5), [(1.10, 7)])
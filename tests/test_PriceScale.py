@@ -0,0 +1,43 @@
+import unittest
+from Util.PriceScale import PriceScale
+from OrderBook.OrderBook import OrderBook
+from Order.Order import Order
+from Order.OrderAction import OrderAction
+from Order.OrderType import OrderType
+from Agent.Agent import Agent
+
+class TestPriceScale(unittest.TestCase):
+
+    def test_float_mode(self):
+        scale = PriceScale()
+        self.assertFalse(scale.fixed_point)
+        self.assertEqual(scale.to_ticks(1.1234567), 1.123457)
+        self.assertEqual(scale.from_ticks(1.5), 1.5)
+        self.assertEqual(scale.value(0.1, 3), 0.3)
+
+    def test_fixed_point_mode(self):
+        scale = PriceScale(tick_size=0.01)
+        self.assertTrue(scale.fixed_point)
+        self.assertEqual(scale.to_ticks(1.234), 123)
+        self.assertEqual(scale.to_ticks(0.0001), 1)
+        self.assertEqual(scale.from_ticks(123), 1.23)
+        self.assertEqual(scale.to_units(100), 10000)
+        self.assertEqual(scale.from_units(10001), 100.01)
+        self.assertEqual(scale.value(123, 3), 369)
+
+    def test_fixed_point_agent_cash(self):
+        a = Agent(1, cash=10000)
+        a.update_cash(-369)
+        self.assertEqual(a.cash, 9631)
+        self.assertIs(type(a.cash), int)
+
+    def test_fixed_point_snapshot(self):
+        ob = OrderBook(initial_price=1.00, tick_size=0.01)
+        ob.add_order(Order(1, 1, ob.scale.to_ticks(1.05), 10, OrderAction.ASK, OrderType.LIMIT))
+        ob.add_order(Order(2, 1, ob.scale.to_ticks(0.95), 5, OrderAction.BID, OrderType.LIMIT))
+
+        snap = ob.get_snapshot()[0]
+        self.assertEqual(ob.current_price, 100)
+        self.assertEqual(snap['current_price'], 1.00)
+        self.assertEqual(snap['asks'], [{'price': 1.05, 'size': 10}])
+        self.assertEqual(snap['bids'], [{'price': 0.95, 'size': 5}])
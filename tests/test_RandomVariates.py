@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+from scipy import stats
+from Util.RandomVariates import RandomVariates
+from Agent.Agent import Agent
+from Order.OrderAction import OrderAction
+
+class TestRandomVariates(unittest.TestCase):
+
+    def sample(self, draw, n=20_000):
+        return np.array([draw() for _ in range(n)])
+
+    def test_distributions_match(self):
+        v = RandomVariates(block_size=1000, seed=1)
+        cases = [
+            (lambda: v.beta(2, 5), stats.beta(2, 5).cdf),
+            (lambda: v.pareto(5), stats.lomax(5).cdf),
+            (lambda: v.exponential(0.5), stats.expon(scale=0.5).cdf),
+            (lambda: v.normal(0.01, 0.02), stats.norm(0.01, 0.02).cdf),
+            (lambda: v.half_normal(0.001), stats.truncnorm(0, np.inf, loc=0, scale=0.001).cdf),
+            (lambda: v.uniform(-1, 2), stats.uniform(-1, 3).cdf),
+        ]
+        for draw, cdf in cases:
+            self.assertGreater(stats.kstest(self.sample(draw), cdf).pvalue, 0.001)
+
+    def test_seeded_runs_repeat(self):
+        a = RandomVariates(block_size=64, seed=7)
+        b = RandomVariates(block_size=64, seed=7)
+        self.assertEqual([a.beta(2, 5) for _ in range(200)], [b.beta(2, 5) for _ in range(200)])
+        a.seed(3)
+        b.seed(3)
+        self.assertEqual(a.normal(), b.normal())
+
+    def test_buffers_per_parameter_set(self):
+        v = RandomVariates(block_size=10, seed=0)
+        v.beta(2, 5)
+        v.beta(5, 2)
+        self.assertEqual(len(v._buffers[('beta', 2, 5)]), 9)
+        self.assertEqual(len(v._buffers[('beta', 5, 2)]), 9)
+        for _ in range(9):
+            v.beta(2, 5)
+        v.beta(2, 5)     # Refills
+        self.assertEqual(len(v._buffers[('beta', 2, 5)]), 9)
+
+    def test_agent_beta_price(self):
+        agent = Agent(1)
+        bids = [agent._get_beta_price(1.00, OrderAction.BID) for _ in range(2000)]
+        asks = [agent._get_beta_price(1.00, OrderAction.ASK) for _ in range(2000)]
+        self.assertTrue(all(0 < p < 1.00 for p in bids))
+        self.assertTrue(all(p > 1.00 for p in asks))
+        hits = Agent._get_max_variance.cache_info().hits
+        self.assertEqual(agent._get_max_variance(2.5), Agent(2)._get_max_variance(2.5))
+        self.assertEqual(Agent._get_max_variance.cache_info().hits, hits + 1)    # Shared by every agent
@@ -0,0 +1,92 @@
+import unittest
+from OrderBook.OrderBook import OrderBook
+from OrderBook.Matchmaker import MatchMaker
+from OrderBook.SettlementBuffer import SettlementBuffer
+from Order.OrderAction import OrderAction
+from Order.OrderType import OrderType
+from Order.OrderStatus import OrderStatus
+from Agent.Agent import Agent
+
+def setup_deferred(tick_size=None):
+    ''' Deferred-settlement book with one maker resting 10 share asks at 1.01, 1.02 and 1.03 '''
+    ob = OrderBook(tick_size=tick_size, deferred_settlement=True)
+    maker = Agent(ob.get_id('AGENT'), cash=0)
+    taker = Agent(ob.get_id('AGENT'), cash=ob.scale.to_units(100))
+    ob.upsert_agent(maker)
+    ob.upsert_agent(taker)
+    for price in (1.01, 1.02, 1.03):
+        order = ob.new_order(maker.id, ob.scale.to_ticks(price), 10, OrderAction.ASK, OrderType.LIMIT, [(ob.scale.to_ticks(1.00), 10)])
+        maker.upsert_active_ask(order)
+        ob.add_order(order)
+    return ob, maker, taker
+
+
+class TestSettlementBuffer(unittest.TestCase):
+
+    def test_buffer_nets_per_agent(self):
+        a1 = Agent(1, cash=10)
+        a2 = Agent(2, cash=10)
+        buffer = SettlementBuffer()
+        buffer.add_cash(a1, 1.25)
+        buffer.add_cash(a2, -2.5)
+        buffer.add_cash(a1, 0.75)
+        buffer.add_shares(a1, 1.01, 5)
+        buffer.add_shares(a1, 1.01, 3)
+        buffer.add_shares(a2, 1.02, 4)
+        self.assertEqual(buffer.pending_cash(a2), -2.5)
+        self.assertEqual(len(buffer), 6)
+
+        buffer.settle()
+
+        self.assertEqual(a1.cash, 12)
+        self.assertEqual(a2.cash, 7.5)
+        self.assertEqual(a1.holdings, {1.01: 8})
+        self.assertEqual(a2.holdings, {1.02: 4})
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(buffer.pending_cash(a2), 0)
+
+    def test_match_defers_until_settle(self):
+        ob, maker, taker = setup_deferred()
+        order = ob.new_order(taker.id, -1, 15, OrderAction.BID, OrderType.MARKET)
+
+        MatchMaker().match(ob, order)
+
+        # Book and order state change immediately, cash and holdings wait for settle()
+        self.assertEqual(order.status, OrderStatus.CLOSED)
+        self.assertEqual(ob.peek_best(OrderAction.ASK)[0][2], 5)
+        self.assertEqual(taker.cash, 100)
+        self.assertEqual(taker.holdings, {})
+
+        ob.settle()
+
+        self.assertAlmostEqual(taker.cash, 100 - 10.1 - 5.1)
+        self.assertAlmostEqual(maker.cash, 15.2)
+        self.assertEqual(taker.holdings, {1.01: 10, 1.02: 5})
+
+    def test_market_bid_sees_pending_debits(self):
+        ob, maker, taker = setup_deferred(tick_size=0.01)
+        taker.cash = 1500
+
+        first = ob.new_order(taker.id, -1, 10, OrderAction.BID, OrderType.MARKET)
+        MatchMaker().match(ob, first)
+        second = ob.new_order(taker.id, -1, 10, OrderAction.BID, OrderType.MARKET)
+        MatchMaker().match(ob, second)
+
+        # 1010 already spent this tick, only 490 left -> 4 shares @ 1.02
+        self.assertEqual(second.volume, 6)
+        ob.settle()
+        self.assertEqual(taker.cash, 1500 - 1010 - 408)
+        self.assertIs(type(taker.cash), int)
+        self.assertEqual(taker.holdings, {101: 10, 102: 4})
+        self.assertEqual(maker.cash, 1418)
+
+    def test_reset_applies_pending_fills(self):
+        ob, maker, taker = setup_deferred()
+        MatchMaker().match(ob, ob.new_order(taker.id, -1, 15, OrderAction.BID, OrderType.MARKET))
+
+        ob.reset()
+
+        self.assertAlmostEqual(taker.cash, 100 - 15.20)
+        self.assertEqual(taker.get_total_shares(), 15)
+        self.assertAlmostEqual(maker.cash, 15.20)
+        self.assertEqual(len(ob.settlement), 0)
@@ -0,0 +1,42 @@
+import unittest
+from OrderBook.StopIndex import StopIndex
+from Order.Order import Order
+from Order.OrderAction import OrderAction
+from Order.OrderType import OrderType
+
+def stop(id, side, stop_price):
+    return Order(id, 1, -1, 10, side, OrderType.STOP, stop_price=stop_price)
+
+class TestStopIndex(unittest.TestCase):
+
+    def test_buy_stops_trigger_at_or_above(self):
+        stops = StopIndex(OrderAction.BID)
+        for id, price in ((1, 1.10), (2, 1.05), (3, 1.20), (4, 1.05)):
+            stops.add(stop(id, OrderAction.BID, price))
+
+        self.assertEqual(stops.next_trigger(), 1.05)
+        self.assertEqual(stops.pop_triggered(1.04), [])
+        self.assertEqual([o.id for o in stops.pop_triggered(1.10)], [2, 4, 1])
+        self.assertEqual(len(stops), 1)
+        self.assertEqual(stops.next_trigger(), 1.20)
+
+    def test_sell_stops_trigger_at_or_below(self):
+        stops = StopIndex(OrderAction.ASK)
+        for id, price in ((1, 0.90), (2, 0.95), (3, 0.80)):
+            stops.add(stop(id, OrderAction.ASK, price))
+
+        self.assertEqual(stops.next_trigger(), 0.95)
+        self.assertEqual([o.id for o in stops.pop_triggered(0.90)], [2, 1])
+        self.assertEqual(stops.keys, [0.80])
+
+    def test_remove(self):
+        stops = StopIndex(OrderAction.ASK)
+        stops.add(stop(1, OrderAction.ASK, 0.90))
+        stops.add(stop(2, OrderAction.ASK, 0.90))
+
+        self.assertEqual(stops.remove(1).id, 1)
+        self.assertIsNone(stops.remove(1))
+        self.assertNotIn(1, stops)
+        stops.remove(2)
+        self.assertEqual(stops.keys, [])
+        self.assertIsNone(stops.next_trigger())
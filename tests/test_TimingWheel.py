@@ -0,0 +1,40 @@
+import random
+import unittest
+from OrderBook.TimingWheel import TimingWheel
+
+class TestTimingWheel(unittest.TestCase):
+
+    def test_fires_at_tick(self):
+        wheel = TimingWheel(slots=4, levels=2)
+        wheel.schedule('a', 3)
+        wheel.schedule('b', 5)
+        wheel.schedule('c', 40)    # Past the 16 tick horizon -> overflow
+        self.assertEqual(len(wheel), 3)
+
+        self.assertEqual(wheel.advance(2), [])
+        self.assertEqual(wheel.advance(3), ['a'])
+        self.assertEqual(wheel.advance(39), ['b'])
+        self.assertEqual(wheel.advance(40), ['c'])
+        self.assertEqual(len(wheel), 0)
+
+    def test_past_ticks_fire_next(self):
+        wheel = TimingWheel(slots=4, levels=2, now=10)
+        wheel.schedule('late', 2)
+        self.assertEqual(wheel.advance(11), ['late'])
+
+    def test_matches_brute_force(self):
+        random.seed(7)
+        wheel = TimingWheel(slots=8, levels=3)
+        expected = {}
+        fired = {}
+        for now in range(1, 6000):
+            if now < 3000:
+                for _ in range(random.randint(0, 3)):
+                    item = len(expected)
+                    tick = now + random.randint(-5, 1200)
+                    wheel.schedule(item, tick)
+                    expected[item] = max(tick, now)    # Ticks that already passed fire on the next advance
+            for item in wheel.advance(now):
+                fired[item] = now
+
+        self.assertEqual(fired, expected)
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from OrderBook.OrderBook import OrderBook
+from OrderBook.Matchmaker import MatchMaker
+from OrderBook.TradeTape import TradeTape
+from Order.OrderAction import OrderAction
+from Order.OrderType import OrderType
+from Agent.Agent import Agent
+
+class TestTradeTape(unittest.TestCase):
+
+    def test_extend_and_grow(self):
+        tape = TradeTape(capacity=2)
+        tape.extend(1, [1.00, 1.01, 1.02], [5, 5, 10], 1, [7, 7, 7], [1, 2, 3], [10, 11, 12])
+        tape.extend(4, [0.99], [4], -1, [2], [7], [13])
+
+        self.assertEqual(len(tape), 4)
+        self.assertEqual(tape['seq'].tolist(), [1, 2, 3, 4])
+        self.assertEqual(tape['side'].tolist(), [1, 1, 1, -1])
+        self.assertEqual(tape['resting'].tolist(), [10, 11, 12, 13])
+        self.assertAlmostEqual(tape.vwap(), (5.00 + 5.05 + 10.2 + 3.96) / 24)
+        self.assertAlmostEqual(tape.vwap(3), 0.99)
+        self.assertEqual(tape.since(3)['qty'].tolist(), [10, 4])
+        self.assertEqual(tape.last(1)['price'].tolist(), [0.99])
+
+    def test_views_are_zero_copy(self):
+        tape = TradeTape()
+        tape.extend(1, [1.00, 1.01], [5, 5], 1, [7, 7], [1, 2], [10, 11])
+        view = tape.slice()['price']
+        self.assertTrue(view.base is not None)
+        self.assertTrue(tape['qty'].base is not None)
+
+    def test_string_ids_are_interned(self):
+        tape = TradeTape()
+        tape.extend(1, [1.00, 1.01], [5, 5], 1, ['A-1', 'A-1'], ['A-2', 'A-3'], ['O-1', 'O-2'])
+        self.assertEqual(tape['buyer'][0], tape['buyer'][1])
+        self.assertEqual(tape.decode(tape['seller'][1]), 'A-3')
+        self.assertEqual(tape.decode(tape['resting'][0]), 'O-1')
+
+    def test_flush_memmap(self):
+        tape = TradeTape(fixed_point=True)
+        tape.extend(1, [101, 102], [5, 5], -1, [3, 4], [7, 7], [10, 11])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'tape.npy')
+            tape.flush(path)
+            mm = TradeTape.load(path)
+            self.assertEqual(mm['price'].tolist(), [101, 102])
+            self.assertEqual(mm['buyer'].tolist(), [3, 4])
+            del mm
+
+    def test_match_records_fills(self):
+        ob = OrderBook()
+        maker = Agent(ob.get_id('AGENT'), cash=0)
+        taker = Agent(ob.get_id('AGENT'), cash=100)
+        ob.upsert_agent(maker)
+        ob.upsert_agent(taker)
+        asks = []
+        for price in (1.01, 1.02):
+            ask = ob.new_order(maker.id, price, 10, OrderAction.ASK, OrderType.LIMIT, [(1.00, 10)])
+            maker.upsert_active_ask(ask)
+            ob.add_order(ask)
+            asks.append(ask)
+
+        order = ob.new_order(taker.id, -1, 15, OrderAction.BID, OrderType.MARKET)
+        MatchMaker().match(ob, order)
+
+        tape = ob.trades
+        self.assertEqual(len(tape), 2)
+        self.assertEqual(tape['price'].tolist(), [1.01, 1.02])
+        self.assertEqual(tape['qty'].tolist(), [10, 5])
+        self.assertEqual(tape['side'].tolist(), [1, 1])
+        self.assertEqual([tape.decode(c) for c in tape['buyer']], [taker.id, taker.id])
+        self.assertEqual([tape.decode(c) for c in tape['seller']], [maker.id, maker.id])
+        self.assertEqual([tape.decode(c) for c in tape['resting']], [asks[0].id, asks[1].id])
+        self.assertGreater(tape['seq'][0], order.timestamp)
+        self.assertAlmostEqual(tape.vwap(), (10.1 + 5.1) / 15)